@@ -0,0 +1,127 @@
+"""
+Database profiles, selected from the environment by `database_config()`.
+
+DB_ENGINE=sqlite (default)
+    SQLITE_PATH, SQLITE_BUSY_TIMEOUT (seconds), SQLITE_MMAP_SIZE (bytes),
+    SQLITE_CACHE_SIZE (KiB). Every new connection switches to WAL, so
+    readers no longer wait for a writer, with synchronous=NORMAL (durable
+    up to the last checkpoint on power loss, safe on crashes). Write
+    transactions start as IMMEDIATE so concurrent writers queue on the
+    busy timeout instead of failing on lock upgrades.
+
+DB_ENGINE=postgresql
+    POSTGRES_DB, POSTGRES_USER, POSTGRES_PASSWORD, POSTGRES_HOST,
+    POSTGRES_PORT. DB_POOL=1 keeps a psycopg connection pool per process
+    (DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE). DB_PGBOUNCER=1 is for a
+    transaction-pooling PgBouncer in front of the server: it disables
+    server-side cursors, which do not survive across its transactions.
+
+Both: DB_CONN_MAX_AGE (seconds, default 60) keeps connections open across
+requests; use 0 under ASGI and with DB_POOL.
+
+Read replicas: DB_REPLICAS is a comma-separated list of SQLite files, or of
+PostgreSQL hosts (`host` or `host:port`), that replicate the primary. Each
+becomes a `replica_<n>` alias with the primary's settings otherwise;
+`form.replicas.ReplicaRouter` sends reads to them.
+"""
+import hashlib
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+
+def _flag(env, name):
+    return env.get(name, '0') == '1'
+
+
+def sqlite_config(env, base_dir):
+    busy_timeout = float(env.get('SQLITE_BUSY_TIMEOUT', 5))
+    pragmas = [
+        'PRAGMA journal_mode=WAL',
+        'PRAGMA synchronous=NORMAL',
+        f"PRAGMA mmap_size={int(env.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))}",
+        # Negative sizes are in KiB rather than pages.
+        f"PRAGMA cache_size=-{int(env.get('SQLITE_CACHE_SIZE', 64 * 1024))}",
+    ]
+    return {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': env.get('SQLITE_PATH') or base_dir / 'db.sqlite3',
+        'OPTIONS': {
+            # Applied by sqlite3.connect() as the busy timeout.
+            'timeout': busy_timeout,
+            'init_command': '; '.join(pragmas),
+            'transaction_mode': 'IMMEDIATE',
+        },
+    }
+
+
+def postgresql_config(env):
+    options = {}
+    config = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': env.get('POSTGRES_DB', 'forms'),
+        'USER': env.get('POSTGRES_USER', 'forms'),
+        'PASSWORD': env.get('POSTGRES_PASSWORD', ''),
+        'HOST': env.get('POSTGRES_HOST', 'localhost'),
+        'PORT': env.get('POSTGRES_PORT', '5432'),
+        'OPTIONS': options,
+    }
+    if _flag(env, 'DB_POOL'):
+        options['pool'] = {
+            'min_size': int(env.get('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(env.get('DB_POOL_MAX_SIZE', 10)),
+        }
+    if _flag(env, 'DB_PGBOUNCER'):
+        config['DISABLE_SERVER_SIDE_CURSORS'] = True
+    return config
+
+
+def database_config(env=None, base_dir=None):
+    """
+    The `default` entry of `DATABASES` for the profile selected in `env`
+    (default: `os.environ`).
+    """
+    env = os.environ if env is None else env
+    engine = env.get('DB_ENGINE', 'sqlite')
+    if engine == 'sqlite':
+        config = sqlite_config(env, base_dir)
+    elif engine in ('postgresql', 'postgres'):
+        config = postgresql_config(env)
+    else:
+        raise ImproperlyConfigured(f"Unknown DB_ENGINE {engine!r}; use 'sqlite' or 'postgresql'.")
+
+    # Django refuses persistent connections together with its pool.
+    pooled = 'pool' in config['OPTIONS']
+    config['CONN_MAX_AGE'] = 0 if pooled else int(env.get('DB_CONN_MAX_AGE', 60))
+    config['CONN_HEALTH_CHECKS'] = not pooled
+    return config
+
+
+def replica_configs(primary, env=None):
+    """
+    `DATABASES` entries for the replicas of `primary` listed in DB_REPLICAS,
+    keyed by alias.
+    """
+    env = os.environ if env is None else env
+    replicas = {}
+    for n, location in enumerate(filter(None, env.get('DB_REPLICAS', '').split(',')), start=1):
+        location = location.strip()
+        config = {**primary, 'OPTIONS': {**primary['OPTIONS']}, 'TEST': {'MIRROR': 'default'}}
+        if primary['ENGINE'].endswith('sqlite3'):
+            config['NAME'] = location
+        else:
+            host, _, port = location.partition(':')
+            config['HOST'] = host
+            config['PORT'] = port or primary['PORT']
+        replicas[f'replica_{n}'] = config
+    return replicas
+
+
+def cache_key_prefix(config):
+    """
+    A cache KEY_PREFIX naming the database in `config`, so databases that
+    share a cache (project, tests, benchmarks) never see each other's
+    entries.
+    """
+    identity = ':'.join(str(config.get(key) or '') for key in ('ENGINE', 'HOST', 'PORT', 'NAME'))
+    return 'db-' + hashlib.sha1(identity.encode()).hexdigest()[:12]
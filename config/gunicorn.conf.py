@@ -0,0 +1,54 @@
+"""
+Gunicorn settings for serving the project in production.
+
+    gunicorn --config config/gunicorn.conf.py config.wsgi:application
+
+For ASGI, run config.asgi:application with
+GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker. Every setting can be
+overridden from the environment.
+"""
+import glob
+import multiprocessing
+import os
+
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'sync')
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+# Import Django and the project once in the master; workers are forked
+# with it already loaded. Nothing opens database connections or starts
+# threads at import time (the ingestion queue and the metrics registry
+# start lazily in each worker).
+preload_app = True
+
+# Recycle workers now and then to bound memory growth.
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 10000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 1000))
+
+# Worker heartbeats go to tmpfs rather than a possibly slow container disk.
+worker_tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-') or None  # Empty to disable
+
+
+def on_starting(server):
+    # Per-process metric files of a previous run would be merged into the
+    # new one's totals (see form/metrics.py).
+    directory = os.environ.get('METRICS_DIR')
+    if directory:
+        for path in glob.glob(os.path.join(directory, 'metrics-*.json')):
+            os.remove(path)
+
+
+def child_exit(server, worker):
+    # Keep a recycled worker's counts but not its file, which every scrape
+    # would otherwise read for the rest of the run.
+    directory = os.environ.get('METRICS_DIR')
+    if directory:
+        from form.metrics import retire_process
+
+        retire_process(directory, worker.pid)
@@ -10,8 +10,15 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
+import sys
+import tempfile
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
+from .database import cache_key_prefix, database_config, replica_configs
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -19,13 +26,22 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.1/howto/deployment/checklist/
 
-# SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = 'django-insecure-xfr8nlltle#35e!itq^wz^#fu8ws69&46wj5*hzi)iq$ibmk7r'
-
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+# Off unless DEBUG=1; with DEBUG on Django also keeps every SQL query of a
+# request in memory.
+DEBUG = os.environ.get('DEBUG', '0') == '1'
+
+TESTING = sys.argv[1:2] == ['test'] or 'pytest' in sys.modules
+
+# SECURITY WARNING: keep the secret key used in production secret!
+# The key committed here is only used for development (DEBUG=1) and tests.
+SECRET_KEY = os.environ.get('SECRET_KEY')
+if not SECRET_KEY:
+    if not (DEBUG or TESTING):
+        raise ImproperlyConfigured("Set SECRET_KEY, or DEBUG=1 for development.")
+    SECRET_KEY = 'django-insecure-xfr8nlltle#35e!itq^wz^#fu8ws69&46wj5*hzi)iq$ibmk7r'
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = [host for host in os.environ.get('ALLOWED_HOSTS', 'localhost,127.0.0.1').split(',') if host]
 
 
 # Application definition
@@ -47,7 +63,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'form.metrics.MetricsMiddleware',
+    'form.replicas.ReplicaPinMiddleware',
+    'form.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'form.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -80,11 +100,57 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# SQLite (default) or PostgreSQL, tuned from the environment; see
+# config/database.py.
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+    'default': database_config(base_dir=BASE_DIR),
+}
+DATABASES.update(replica_configs(DATABASES['default']))
+
+# Read replicas (form.replicas): reads of the form app go to a replica that
+# answers and lags by at most REPLICA_MAX_LAG; clients that wrote read from
+# the primary for REPLICA_PIN_SECONDS.
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['form.replicas.ReplicaRouter']
+REPLICA_MAX_LAG = float(os.environ.get('REPLICA_MAX_LAG', 5.0))  # seconds
+REPLICA_CHECK_INTERVAL = float(os.environ.get('REPLICA_CHECK_INTERVAL', 5.0))  # seconds
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', 10))
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+#
+# The `forms` cache holds form version markers, pre-rendered form
+# payloads and ingestion receipts. Entries never expire and are only
+# invalidated by the process that handles a write, so with several worker
+# processes it must be shared by all of them: the Docker image uses a
+# directory every gunicorn worker on the host shares, and across several
+# hosts point it at memcached or Redis, e.g.
+# FORM_CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+# FORM_CACHE_LOCATION=redis://cache:6379/1
+# The default process-local LocMemCache is only correct with a single
+# process (runserver, one worker). Keys are prefixed with the database they
+# describe, and tests always use their own LocMemCache.
+
+FORMS_CACHE = {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    'LOCATION': 'forms',
+    'TIMEOUT': None,
+    'KEY_PREFIX': cache_key_prefix(DATABASES['default']),
+}
+if not TESTING and os.environ.get('FORM_CACHE_BACKEND'):
+    FORMS_CACHE['BACKEND'] = os.environ['FORM_CACHE_BACKEND']
+    FORMS_CACHE['LOCATION'] = os.environ.get('FORM_CACHE_LOCATION', os.path.join(tempfile.gettempdir(), 'form_cache'))
+    FORMS_CACHE['OPTIONS'] = {
+        # A file backend lists the whole directory to cull past this.
+        'MAX_ENTRIES': int(os.environ.get('FORM_CACHE_MAX_ENTRIES', 10000)),
     }
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'forms': FORMS_CACHE,
 }
 
 
@@ -123,6 +189,24 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.1/howto/static-files/
 
 STATIC_URL = 'static/'
+STATIC_ROOT = os.environ.get('STATIC_ROOT', BASE_DIR / 'staticfiles')
+
+# Static files are served by WhiteNoise from STATIC_ROOT, compressed at
+# collectstatic time. STATIC_MANIFEST=1 (set in the Docker image, where
+# collectstatic has run) also serves content-hashed names with far-future
+# cache headers.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': (
+            'whitenoise.storage.CompressedManifestStaticFilesStorage'
+            if os.environ.get('STATIC_MANIFEST') == '1'
+            else 'whitenoise.storage.CompressedStaticFilesStorage'
+        ),
+    },
+}
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
@@ -137,6 +221,10 @@ REST_FRAMEWORK = {
 
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
 
+    # Keyset pagination on the primary key; see form/pagination.py.
+    'DEFAULT_PAGINATION_CLASS': 'form.pagination.IdCursorPagination',
+    'PAGE_SIZE': int(os.environ.get('API_PAGE_SIZE', 50)),
+
      'DEFAULT_RENDERER_CLASSES':[
         'form.renders.CustomRenderer',
         'rest_framework.renderers.JSONRenderer',
@@ -145,6 +233,38 @@ REST_FRAMEWORK = {
 }
 
 
+# Response ingestion
+#
+# 'sync' writes every submission in its request. 'queue' validates it,
+# answers 202 Accepted with a receipt and leaves the write to a batching
+# background thread (see form/ingestion.py).
+
+INGESTION_MODE = os.environ.get('INGESTION_MODE', 'sync')
+INGESTION_QUEUE_SIZE = int(os.environ.get('INGESTION_QUEUE_SIZE', 10000))
+INGESTION_BATCH_SIZE = int(os.environ.get('INGESTION_BATCH_SIZE', 500))
+INGESTION_FLUSH_INTERVAL = float(os.environ.get('INGESTION_FLUSH_INTERVAL', 0.2))  # seconds
+INGESTION_PUT_TIMEOUT = float(os.environ.get('INGESTION_PUT_TIMEOUT', 0.05))  # seconds
+
+
+# Hard upper bound for the `page_size` query parameter.
+API_MAX_PAGE_SIZE = int(os.environ.get('API_MAX_PAGE_SIZE', 500))
+
+
+# Responses of at least this many bytes are gzipped for clients that accept it
+# (form.middleware.CompressionMiddleware).
+GZIP_MIN_SIZE = int(os.environ.get('GZIP_MIN_SIZE', 1024))
+
+# Request instrumentation (form.metrics). With METRICS_DIR set, worker
+# processes share their histograms through files in that directory.
+# /metrics answers staff users, `Authorization: Bearer <METRICS_TOKEN>` and
+# the client addresses in METRICS_ALLOWED_IPS (comma separated).
+METRICS_DIR = os.environ.get('METRICS_DIR') or None
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN') or None
+METRICS_ALLOWED_IPS = [ip for ip in os.environ.get('METRICS_ALLOWED_IPS', '').split(',') if ip]
+METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 1.0))  # seconds
+METRICS_SERVER_TIMING = os.environ.get('METRICS_SERVER_TIMING', '1') == '1'
+
+
 SPECTACULAR_SETTINGS = {
     'TITLE': 'Form API Documentation',  # Title in the header
     'DESCRIPTION': 'This is the API documentation for my project.',
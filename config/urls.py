@@ -17,11 +17,13 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import include, path
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
+from form.metrics import metrics_view
 
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('form/', include('form.urls')),
+    path('metrics', metrics_view, name='metrics'),  # Prometheus scrape endpoint
 
     path('schema/', SpectacularAPIView.as_view(), name='schema'),  # OpenAPI schema
     path('docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'), 
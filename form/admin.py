@@ -1,6 +1,16 @@
+from django import forms
 from django.contrib import admin
-from django.core.exceptions import ValidationError
-from .models import Form, Question, FormResponse
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.exceptions import PermissionDenied, ValidationError
+from django.db import connection, transaction
+from django.db.models.expressions import RawSQL
+from django.template.response import TemplateResponse
+from django.urls import path
+from rest_framework import serializers
+from .models import Form, Question, FormResponse, Submission
+from .search import index_exists, matching_ids_sql
+from .stats import rebuild_question_stats, record_answers
+from .validators import get_validator
 
 
 class QuestionInline(admin.TabularInline):
@@ -24,17 +34,63 @@ class QuestionInline(admin.TabularInline):
         super().save_model(request, obj, form, change)
 
 
-class ResponseInline(admin.TabularInline):
-    model = FormResponse
-    extra = 0
-    fields = ('question', 'answer')
-    readonly_fields = ('question', 'answer')
+class AutocompleteFilter(admin.SimpleListFilter):
+    """
+    List filter for a foreign key that searches the related objects through
+    the admin autocomplete view instead of listing every one of them.
 
-    def get_queryset(self, request):
-        # This limits the responses to only the form being viewed
-        queryset = super().get_queryset(request)
-        form_id = request.resolver_match.kwargs.get('object_id')
-        return queryset.filter(form__id=form_id)
+    The related model's admin must define `search_fields`.
+    """
+    template = 'admin/form/autocomplete_filter.html'
+    field_name = None
+
+    def __init__(self, request, params, model, model_admin):
+        self.parameter_name = f'{self.field_name}__id__exact'
+        super().__init__(request, params, model, model_admin)
+        field = model._meta.get_field(self.field_name)
+        # Binding a choice field gives the widget a queryset; only the
+        # selected object is ever loaded from it.
+        self.widget = forms.ModelChoiceField(
+            field.remote_field.model._default_manager.all(),
+            widget=AutocompleteSelect(field, model_admin.admin_site),
+            required=False,
+        ).widget
+
+    def rendered_widget(self):
+        return self.widget.render(self.parameter_name, self.value(), attrs={'id': f'filter_{self.parameter_name}'})
+
+    def has_output(self):
+        return True
+
+    def lookups(self, request, model_admin):
+        return ()
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(**{f'{self.field_name}_id': self.value()})
+        return queryset
+
+
+class AutocompleteFilterMixin:
+    """
+    Adds the select2/autocomplete assets `AutocompleteFilter` needs to a
+    ModelAdmin's changelist.
+    """
+
+    @property
+    def media(self):
+        widget = AutocompleteSelect(FormResponse._meta.get_field('form'), self.admin_site)
+        return super().media + widget.media
+
+
+class FormAutocompleteFilter(AutocompleteFilter):
+    title = 'form'
+    field_name = 'form'
+
+
+class QuestionAutocompleteFilter(AutocompleteFilter):
+    title = 'question'
+    field_name = 'question'
 
 
 @admin.register(Form)
@@ -43,28 +99,141 @@ class FormAdmin(admin.ModelAdmin):
     search_fields = ('title',)
     inlines = [QuestionInline]
     ordering = ('-created_at',)
-    
-    def get_inline_instances(self, request, obj=None):
-        # Show ResponseInline only when viewing a specific form
-        inline_instances = super().get_inline_instances(request, obj)
-        if obj:
-            inline_instances.append(ResponseInline(self.model, self.admin_site))
-        return inline_instances
+    responses_page_size = 50
+
+    def get_urls(self):
+        # Responses are not an inline: the change page loads them page by
+        # page from this view, so its cost does not grow with the form.
+        urls = [
+            path(
+                '<path:object_id>/responses/',
+                self.admin_site.admin_view(self.responses_view),
+                name='form_form_responses',
+            ),
+        ]
+        return urls + super().get_urls()
+
+    def responses_view(self, request, object_id):
+        """
+        One page of a form's responses as table rows, after `?after=<id>`.
+
+        The id to continue from is sent in the `X-Next-After` header.
+        """
+        if not self.admin_site._registry[FormResponse].has_view_permission(request):
+            raise PermissionDenied
+        try:
+            after = int(request.GET.get('after', 0))
+        except ValueError:
+            after = 0
+        responses = list(
+            FormResponse.objects
+            .filter(form_id=object_id, id__gt=after)
+            .select_related('question')
+            .order_by('id')[:self.responses_page_size + 1]
+        )
+        response = TemplateResponse(
+            request, 'admin/form/form/responses_panel.html', {'responses': responses[:self.responses_page_size]}
+        )
+        if len(responses) > self.responses_page_size:
+            response['X-Next-After'] = responses[self.responses_page_size - 1].pk
+        return response
 
 
 
 @admin.register(Question)
-class QuestionAdmin(admin.ModelAdmin):
+class QuestionAdmin(AutocompleteFilterMixin, admin.ModelAdmin):
     list_display = ('id', 'form', 'text', 'question_type', 'required', 'max_length', 'number_type', 'min_value', 'max_value')
-    list_filter = ('form', 'question_type', 'required')
+    list_filter = (FormAutocompleteFilter, 'question_type', 'required')
+    autocomplete_fields = ('form',)
     search_fields = ('text',)
     ordering = ('form', 'id')
 
 
+# Admin writes keep QuestionStats in step like the API: inserts are
+# recorded, edits and deletions recount the questions they touch.
+
+@admin.register(Submission)
+class SubmissionAdmin(admin.ModelAdmin):
+    list_display = ('id', 'form', 'token', 'created_at')
+    autocomplete_fields = ('form',)
+    search_fields = ('token',)
+    ordering = ('-created_at',)
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            question_ids = set(obj.answers.values_list('question_id', flat=True))
+            super().delete_model(request, obj)
+            rebuild_question_stats(question_ids)
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            question_ids = set(
+                FormResponse.objects.filter(submission__in=queryset).values_list('question_id', flat=True)
+            )
+            super().delete_queryset(request, queryset)
+            rebuild_question_stats(question_ids)
+
+
+class ResponseAdminForm(forms.ModelForm):
+    """
+    Checks an answer like the API does and derives its `numeric_answer`.
+    """
+
+    class Meta:
+        model = FormResponse
+        fields = ('form', 'submission', 'question', 'answer')
+
+    def clean(self):
+        data = super().clean()
+        form, submission, question = data.get('form'), data.get('submission'), data.get('question')
+        if form is not None and question is not None and question.form_id != form.id:
+            self.add_error('question', "Question does not belong to this form.")
+        if form is not None and submission is not None and submission.form_id != form.id:
+            self.add_error('submission', "Submission does not belong to this form.")
+        if question is not None and 'answer' in data:
+            try:
+                self.instance.numeric_answer = get_validator(question)(data['answer'])
+            except serializers.ValidationError as exc:
+                self.add_error('answer', [str(message) for message in exc.detail])
+        return data
+
+
 @admin.register(FormResponse)
-class ResponseAdmin(admin.ModelAdmin):
-    list_display = ('id', 'form', 'question', 'answer')
-    list_filter = ('form', 'question')
+class ResponseAdmin(AutocompleteFilterMixin, admin.ModelAdmin):
+    form = ResponseAdminForm
+    list_display = ('id', 'form', 'submission', 'question', 'answer')
+    list_filter = (FormAutocompleteFilter, QuestionAutocompleteFilter)
+    # Select widgets would list every form, question and submission.
+    autocomplete_fields = ('form', 'question', 'submission')
+    readonly_fields = ('numeric_answer',)
     search_fields = ('answer',)
     ordering = ('form', 'id')
+    show_full_result_count = False  # Skip the unfiltered COUNT(*) over all responses
+
+    def save_model(self, request, obj, form, change):
+        with transaction.atomic():
+            super().save_model(request, obj, form, change)
+            if change:
+                rebuild_question_stats({form.initial['question'], obj.question_id})
+            else:
+                record_answers([obj])
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            super().delete_model(request, obj)
+            rebuild_question_stats([obj.question_id])
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            question_ids = set(queryset.values_list('question_id', flat=True))
+            super().delete_queryset(request, queryset)
+            rebuild_question_stats(question_ids)
+
+    def get_search_results(self, request, queryset, search_term):
+        # Look answers up in the FTS5 index instead of LIKE '%term%' over
+        # the whole table; fall back to the default search without it.
+        if search_term.split() and index_exists(connection):
+            sql, params = matching_ids_sql(search_term)
+            return queryset.filter(id__in=RawSQL(sql, params)), False
+        return super().get_search_results(request, queryset, search_term)
 
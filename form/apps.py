@@ -1,6 +1,16 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
 
 
 class FormConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'form'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .metrics import install_query_timer
+        from .search import restore_triggers
+
+        post_migrate.connect(restore_triggers, sender=self)
+        connection_created.connect(install_query_timer)
@@ -0,0 +1,167 @@
+"""
+Async versions of the hottest form endpoints, for ASGI deployments.
+
+They answer exactly like the corresponding `FormViewSet` actions (same
+`CustomRenderer` envelope, ETags and payload cache entries) but read
+through Django's async ORM and cache API, so one ASGI worker can keep many
+such requests in flight while they wait on the database or cache:
+
+- GET /form/async/forms/{id}/ -> Retrieve a form with its questions
+- GET /form/async/forms/{id}/questions/ -> The form's questions (cursor paginated)
+- POST /form/async/forms/{id}/submit/ -> Submit answers to all questions of a form
+
+Writes still run in one transaction, which the async ORM cannot span, so
+storing a submission goes through `sync_to_async`; so does reading a
+questions page, to reuse DRF's (sync) cursor pagination as is.
+"""
+import io
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.db.models import Prefetch
+from django.http import HttpResponse
+from django.urls import reverse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition, require_POST, require_safe
+from rest_framework import status
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.exceptions import NotFound, ParseError, PermissionDenied
+from rest_framework.parsers import JSONParser
+from rest_framework.request import Request
+
+from .caching import (
+    aget_cached_payload, arequest_form_version, aset_cached_payload, form_etag, form_last_modified,
+)
+from .ingestion import QueueFull, get_ingestion_queue, queue_enabled, save_submissions
+from .middleware import precompress
+from .models import Form, Question, Submission
+from .pagination import IdCursorPagination
+from .renders import CustomRenderer
+from .replicas import pin_to_primary
+from .serializers import FormSerializer, FormSubmissionSerializer, QuestionSerializer, SubmissionSerializer
+from .views import with_answers
+
+
+FORM_NOT_FOUND = "No Form matches the given query."
+
+
+def render(data, status_code=status.HTTP_200_OK, headers=None):
+    renderer = CustomRenderer()
+    response = HttpResponse(status=status_code, content_type=renderer.media_type, headers=headers)
+    response.content = renderer.render(data, renderer.media_type, {'response': response})
+    return response
+
+
+def form_condition(view):
+    """
+    `condition()` with the form's ETag and Last-Modified for an async view.
+
+    The version marker is looked up asynchronously first; the (sync) ETag
+    and Last-Modified functions then read it from the request.
+    """
+    conditional = condition(etag_func=form_etag, last_modified_func=form_last_modified)(view)
+
+    @wraps(view)
+    async def inner(request, pk):
+        if await arequest_form_version(request, pk) is None:
+            return render({'detail': FORM_NOT_FOUND}, status.HTTP_404_NOT_FOUND)
+        return await conditional(request, pk=pk)
+    return inner
+
+
+async def cached(request, pk, variant, build):
+    """
+    Async `FormViewSet.cached_render`: serve the rendered payload of a form
+    from the cache, or build and store it.
+    """
+    version = await arequest_form_version(request, pk)
+    if request.GET:
+        return await build()
+
+    variant = f'{variant}:{request.build_absolute_uri("/")}'
+    payload = await aget_cached_payload(pk, variant, version)
+    if payload is not None:
+        content, gzipped = payload
+        response = HttpResponse(content, content_type=CustomRenderer.media_type)
+        response.gzipped_content = gzipped
+        return response
+    # Built from the primary, like FormViewSet.cached_render.
+    pin_to_primary()
+    response = await build()
+    if response.status_code == status.HTTP_200_OK:
+        response.gzipped_content = await sync_to_async(precompress, thread_sensitive=False)(response.content)
+        await aset_cached_payload(pk, variant, version, response.content, response.gzipped_content)
+    return response
+
+
+@require_safe
+@form_condition
+async def form_detail(request, pk):
+    async def build():
+        form = await Form.objects.prefetch_related(
+            Prefetch('questions', queryset=Question.objects.order_by('id'))
+        ).filter(pk=pk).afirst()
+        if form is None:
+            return render({'detail': FORM_NOT_FOUND}, status.HTTP_404_NOT_FOUND)
+        return render(FormSerializer(form).data)
+
+    # Same bytes as FormViewSet.retrieve, so the cache entry is shared.
+    return await cached(request, pk, 'detail', build)
+
+
+@require_safe
+@form_condition
+async def form_questions(request, pk):
+    async def build():
+        paginator = IdCursorPagination()
+        try:
+            page = await paginator.apaginate_queryset(Question.objects.filter(form_id=pk), Request(request))
+        except NotFound as exc:
+            return render({'detail': exc.detail}, status.HTTP_404_NOT_FOUND)
+        return render(paginator.get_paginated_response(QuestionSerializer(page, many=True).data).data)
+
+    # Pagination links point at this view, so it has its own entry.
+    return await cached(request, pk, 'async-questions', build)
+
+
+# Exempt from the middleware's check only for anonymous clients; a logged-in
+# session is checked below, as DRF's SessionAuthentication does for the
+# sync endpoint.
+@csrf_exempt
+@require_POST
+async def form_submit(request, pk):
+    if (await request.auser()).is_authenticated:
+        try:
+            SessionAuthentication().enforce_csrf(request)
+        except PermissionDenied as exc:
+            return render({'detail': exc.detail}, status.HTTP_403_FORBIDDEN)
+    form = await Form.objects.prefetch_related(
+        Prefetch('questions', queryset=Question.objects.order_by('id'))
+    ).filter(pk=pk).afirst()
+    if form is None:
+        return render({'detail': FORM_NOT_FOUND}, status.HTTP_404_NOT_FOUND)
+    try:
+        data = JSONParser().parse(io.BytesIO(request.body))
+    except ParseError as exc:
+        return render({'detail': exc.detail}, status.HTTP_400_BAD_REQUEST)
+
+    serializer = FormSubmissionSerializer(data=data, context={'form': form})
+    if not serializer.is_valid():
+        return render(serializer.errors, status.HTTP_400_BAD_REQUEST)
+
+    submission = Submission(form=form)
+    if 'token' in serializer.validated_data:
+        submission.token = serializer.validated_data['token']
+    responses = serializer.validated_data['responses']
+
+    if queue_enabled():
+        # put() may block for INGESTION_PUT_TIMEOUT; keep it off the loop.
+        try:
+            receipt = await sync_to_async(get_ingestion_queue().put, thread_sensitive=False)(submission, responses)
+        except QueueFull as exc:
+            return render({'detail': str(exc)}, status.HTTP_503_SERVICE_UNAVAILABLE, {'Retry-After': '1'})
+        location = request.build_absolute_uri(reverse('receipt-detail', args=[receipt]))
+        return render({'receipt': receipt, 'status': 'queued'}, status.HTTP_202_ACCEPTED, {'Location': location})
+
+    await sync_to_async(save_submissions)([(submission, responses)])
+    return render(SubmissionSerializer(with_answers(submission, responses)).data, status.HTTP_201_CREATED)
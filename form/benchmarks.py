@@ -0,0 +1,380 @@
+"""
+Load and latency benchmarks for the form API (see `manage.py bench`).
+
+`seed` builds a reproducible dataset: many small forms, one form with many
+questions and one form with many responses. Scenarios drive the real URL
+routes through Django's WSGI handler with the test client, one client per
+concurrent worker thread, or through the ASGI handler from concurrent
+tasks on one event loop (a single ASGI worker), and `summarize` turns the samples into throughput,
+latency percentiles and per-request query counts (read from the
+`Server-Timing` header, see form/metrics.py).
+"""
+import asyncio
+import json
+import math
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.auth import get_user_model
+from django.db import connections, transaction
+from django.test import AsyncClient, Client
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Form, Question, FormResponse, Submission
+from .stats import rebuild_stats
+
+
+SEED_BATCH_SIZE = 10000
+
+SMALL_TITLE = 'bench:form {}'
+LARGE_TITLE = 'bench:large'
+BUSY_TITLE = 'bench:busy'
+
+# Questions of the busy form, i.e. one submission's worth of answers.
+BUSY_QUESTIONS = [
+    dict(text="Name?", question_type='short_answer', max_length=200),
+    dict(text="Comments?", question_type='complete_answer', max_length=5000),
+    dict(text="Email?", question_type='email', max_length=254),
+    dict(text="Age?", question_type='numeric_answer', number_type='integer', min_value=0, max_value=100),
+    dict(text="Rating?", question_type='numeric_answer', number_type='float', min_value=0, max_value=10),
+]
+
+# Size of the form the form-import scenario creates per request.
+IMPORT_QUESTIONS = 1000
+IMPORT_TITLE = 'bench:import'
+
+WORDS = "good bad slow fast coffee service price staff clean friendly late helpful".split()
+
+
+class Dataset:
+    __slots__ = ('small_forms', 'large_form', 'busy_form', 'busy_questions', 'responses')
+
+    def __init__(self, small_forms, large_form, busy_form, busy_questions, responses):
+        self.small_forms = small_forms
+        self.large_form = large_form
+        self.busy_form = busy_form
+        self.busy_questions = busy_questions
+        self.responses = responses
+
+    def describe(self):
+        return {
+            'forms': len(self.small_forms) + 2,
+            'large_form_questions': Question.objects.filter(form_id=self.large_form).count(),
+            'responses': self.responses,
+        }
+
+
+def load_dataset():
+    """Return the dataset seeded earlier into this database, if any."""
+    busy = Form.objects.filter(title=BUSY_TITLE).first()
+    large = Form.objects.filter(title=LARGE_TITLE).first()
+    if busy is None or large is None:
+        return None
+    return Dataset(
+        small_forms=list(Form.objects.filter(title__startswith='bench:form ').values_list('id', flat=True)),
+        large_form=large.id,
+        busy_form=busy.id,
+        busy_questions=list(Question.objects.filter(form=busy).order_by('id')),
+        responses=FormResponse.objects.filter(form=busy).count(),
+    )
+
+
+def answer_for(question, rng):
+    """A valid answer to one of the `BUSY_QUESTIONS`, and its numeric value."""
+    if question.question_type == 'numeric_answer':
+        if question.number_type == 'integer':
+            value = rng.randint(int(question.min_value), int(question.max_value))
+        else:
+            value = round(rng.uniform(question.min_value, question.max_value), 2)
+        return str(value), float(value)
+    if question.question_type == 'email':
+        return f"user{rng.randrange(10 ** 6)}@example.com", None
+    words = rng.randint(2, 6 if question.question_type == 'short_answer' else 40)
+    return ' '.join(rng.choice(WORDS) for _ in range(words)), None
+
+
+def seed(forms=1000, questions=1000, responses=1000000, seed=0, log=None):
+    """
+    Create the benchmark dataset with bulk inserts, or return the existing
+    one.
+
+    - `forms` small forms with three questions each
+    - one form with `questions` questions
+    - one form with `responses` answers, five per submission
+    """
+    dataset = load_dataset()
+    if dataset is not None:
+        return dataset
+
+    rng = random.Random(seed)
+    log = log or (lambda message: None)
+
+    with transaction.atomic():
+        small = Form.objects.bulk_create(Form(title=SMALL_TITLE.format(i)) for i in range(forms))
+        Question.objects.bulk_create(
+            (Question(form=form, text=f"Question {i}?", question_type='short_answer', max_length=200)
+             for form in small for i in range(3)),
+            batch_size=SEED_BATCH_SIZE,
+        )
+        large = Form.objects.create(title=LARGE_TITLE)
+        Question.objects.bulk_create(
+            (Question(form=large, text=f"Question {i}?", question_type='short_answer', max_length=200)
+             for i in range(questions)),
+            batch_size=SEED_BATCH_SIZE,
+        )
+        busy = Form.objects.create(title=BUSY_TITLE)
+        busy_questions = Question.objects.bulk_create(Question(form=busy, **spec) for spec in BUSY_QUESTIONS)
+    log(f"Seeded {forms + 2} forms and {forms * 3 + questions + len(busy_questions)} questions")
+
+    per_submission = len(busy_questions)
+    submissions = math.ceil(responses / per_submission)
+    started = timezone.now() - timedelta(seconds=submissions)
+    written = 0
+    for offset in range(0, submissions, SEED_BATCH_SIZE // per_submission):
+        count = min(SEED_BATCH_SIZE // per_submission, submissions - offset)
+        with transaction.atomic():
+            batch = Submission.objects.bulk_create(
+                Submission(form=busy, created_at=started + timedelta(seconds=offset + i))
+                for i in range(count)
+            )
+            answers = []
+            for submission in batch:
+                for question in busy_questions[:responses - written - len(answers)]:
+                    answer, value = answer_for(question, rng)
+                    answers.append(FormResponse(
+                        form=busy, submission=submission, question=question, answer=answer, numeric_answer=value,
+                    ))
+            FormResponse.objects.bulk_create(answers)
+        written += len(answers)
+        log(f"Seeded {written}/{responses} responses")
+    rebuild_stats(busy_questions)
+
+    return Dataset([form.id for form in small], large.id, busy.id, busy_questions, written)
+
+
+class Scenario:
+    """
+    One kind of request. `build(dataset, rng)` returns the path and, for
+    writes, the JSON body. `staff` scenarios are sent by a logged-in admin.
+    """
+    __slots__ = ('name', 'method', 'build', 'staff')
+
+    def __init__(self, name, method, build, staff=False):
+        self.name = name
+        self.method = method
+        self.build = build
+        self.staff = staff
+
+
+def bench_admin():
+    user, _ = get_user_model().objects.get_or_create(
+        username='bench-admin', defaults={'is_staff': True, 'is_superuser': True},
+    )
+    return user
+
+
+def _create_response(dataset, rng):
+    question = rng.choice(dataset.busy_questions)
+    answer, _ = answer_for(question, rng)
+    return reverse('response-list', args=[dataset.busy_form]), {'question': question.id, 'answer': answer}
+
+
+def _submit(name):
+    def build(dataset, rng):
+        answers = [{'question': question.id, 'answer': answer_for(question, rng)[0]} for question in dataset.busy_questions]
+        return reverse(name, args=[dataset.busy_form]), {'answers': answers}
+    return build
+
+
+def _import(dataset, rng):
+    # A large form mixing every question type.
+    questions = [dict(BUSY_QUESTIONS[i % len(BUSY_QUESTIONS)], text=f"Question {i}?")
+                 for i in range(IMPORT_QUESTIONS)]
+    return reverse('form-import'), {'title': IMPORT_TITLE, 'questions': questions}
+
+
+SCENARIOS = {scenario.name: scenario for scenario in [
+    Scenario('form-list', 'GET', lambda d, rng: (reverse('form-list'), None)),
+    Scenario('form-list-sparse', 'GET', lambda d, rng: (reverse('form-list') + '?fields=id,title', None)),
+    Scenario('form-detail', 'GET', lambda d, rng: (reverse('form-detail', args=[rng.choice(d.small_forms)]), None)),
+    Scenario('form-detail-large', 'GET', lambda d, rng: (reverse('form-detail', args=[d.large_form]), None)),
+    Scenario('get-questions', 'GET', lambda d, rng: (reverse('form-get-questions', args=[d.large_form]), None)),
+    Scenario('response-list', 'GET', lambda d, rng: (reverse('response-list', args=[d.busy_form]), None)),
+    # An incremental sync from a random point of the feed
+    Scenario('response-changes', 'GET', lambda d, rng: (
+        reverse('response-changes-list') + f'?after={rng.randrange(d.responses)}&limit=100', None,
+    ), staff=True),
+    Scenario('response-create', 'POST', _create_response),
+    Scenario('form-submit', 'POST', _submit('form-submit')),
+    Scenario('form-import', 'POST', _import, staff=True),
+    # form/async_views.py
+    Scenario('async-form-detail', 'GET',
+             lambda d, rng: (reverse('async-form-detail', args=[rng.choice(d.small_forms)]), None)),
+    Scenario('async-get-questions', 'GET', lambda d, rng: (reverse('async-form-questions', args=[d.large_form]), None)),
+    Scenario('async-form-submit', 'POST', _submit('async-form-submit')),
+]}
+
+QUERIES_RE = re.compile(r'db;[^,]*desc="(\d+) queries"')
+
+
+def _sample(response, elapsed):
+    match = QUERIES_RE.search(response.get('Server-Timing', ''))
+    return elapsed, response.status_code, int(match.group(1)) if match else None
+
+
+def _request(client, scenario, dataset, rng):
+    path, body = scenario.build(dataset, rng)
+    started = time.perf_counter()
+    response = client.generic(
+        scenario.method, path, json.dumps(body) if body is not None else '', content_type='application/json',
+    )
+    if response.streaming:
+        b''.join(response.streaming_content)
+    return _sample(response, time.perf_counter() - started)
+
+
+async def _arequest(client, scenario, dataset, rng):
+    path, body = scenario.build(dataset, rng)
+    started = time.perf_counter()
+    response = await client.generic(
+        scenario.method, path, json.dumps(body) if body is not None else '', content_type='application/json',
+    )
+    if response.streaming:
+        [chunk async for chunk in response.streaming_content]
+    return _sample(response, time.perf_counter() - started)
+
+
+def run_scenario(scenario, dataset, requests=200, concurrency=4, warmup=10, seed=0, asgi=False):
+    """
+    Send `requests` requests of `scenario` from `concurrency` workers after
+    `warmup` unmeasured ones, and return the samples and the wall time.
+
+    Each worker thread has its own client and database connection. With a
+    concurrency of 1 everything runs in the calling thread. With `asgi` the
+    workers are tasks on one event loop instead.
+    """
+    if asgi:
+        return async_to_sync(arun_scenario)(scenario, dataset, requests, concurrency, warmup, seed)
+    user = bench_admin() if scenario.staff else None
+
+    def make_client():
+        client = Client(raise_request_exception=False)
+        if user is not None:
+            client.force_login(user)
+        return client
+
+    client = make_client()
+    rng = random.Random(seed)
+    for _ in range(warmup):
+        _request(client, scenario, dataset, rng)
+
+    def worker(count, worker_seed):
+        client = make_client()
+        rng = random.Random(worker_seed)
+        try:
+            return [_request(client, scenario, dataset, rng) for _ in range(count)]
+        finally:
+            if threading.current_thread() is not threading.main_thread():
+                connections.close_all()
+
+    shares = [requests // concurrency + (i < requests % concurrency) for i in range(concurrency)]
+    started = time.perf_counter()
+    if concurrency == 1:
+        samples = worker(requests, seed + 1)
+    else:
+        with ThreadPoolExecutor(concurrency) as executor:
+            futures = [executor.submit(worker, count, seed + 1 + i) for i, count in enumerate(shares)]
+            samples = [sample for future in futures for sample in future.result()]
+    return samples, time.perf_counter() - started
+
+
+async def arun_scenario(scenario, dataset, requests=200, concurrency=4, warmup=10, seed=0):
+    user = await sync_to_async(bench_admin)() if scenario.staff else None
+
+    async def make_client():
+        client = AsyncClient(raise_request_exception=False)
+        if user is not None:
+            await client.aforce_login(user)
+        return client
+
+    client = await make_client()
+    rng = random.Random(seed)
+    for _ in range(warmup):
+        await _arequest(client, scenario, dataset, rng)
+
+    async def worker(count, worker_seed):
+        client = await make_client()
+        rng = random.Random(worker_seed)
+        return [await _arequest(client, scenario, dataset, rng) for _ in range(count)]
+
+    shares = [requests // concurrency + (i < requests % concurrency) for i in range(concurrency)]
+    started = time.perf_counter()
+    results = await asyncio.gather(*(worker(count, seed + 1 + i) for i, count in enumerate(shares)))
+    return [sample for samples in results for sample in samples], time.perf_counter() - started
+
+
+def percentile(ordered, q):
+    # Nearest-rank percentile of an ascending list.
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+def summarize(name, samples, elapsed, concurrency):
+    latencies = sorted(sample[0] * 1000 for sample in samples)
+    queries = [sample[2] for sample in samples if sample[2] is not None]
+    return {
+        'scenario': name,
+        'requests': len(samples),
+        'concurrency': concurrency,
+        'errors': sum(1 for sample in samples if sample[1] >= 400),
+        'throughput': len(samples) / elapsed if elapsed else 0,
+        'latency_ms': {
+            'mean': sum(latencies) / len(latencies),
+            'p50': percentile(latencies, 0.5),
+            'p95': percentile(latencies, 0.95),
+            'p99': percentile(latencies, 0.99),
+            'max': latencies[-1],
+        },
+        'queries': {
+            'mean': sum(queries) / len(queries) if queries else None,
+            'max': max(queries) if queries else None,
+        },
+    }
+
+
+# (label, value getter, True if larger is worse)
+COMPARED = [
+    ('p50', lambda r: r['latency_ms']['p50'], True),
+    ('p95', lambda r: r['latency_ms']['p95'], True),
+    ('p99', lambda r: r['latency_ms']['p99'], True),
+    ('throughput', lambda r: r['throughput'], False),
+    ('queries', lambda r: r['queries']['mean'], True),
+]
+
+
+def compare(baseline, current, tolerance=0.1):
+    """
+    Compare two result files scenario by scenario.
+
+    Returns (scenario, metric, before, after, relative change, regressed)
+    rows; a metric regressed if it got worse by more than `tolerance`.
+    """
+    before = {result['scenario']: result for result in baseline['results']}
+    rows = []
+    for result in current['results']:
+        old = before.get(result['scenario'])
+        if old is None:
+            continue
+        for label, get, larger_is_worse in COMPARED:
+            a, b = get(old), get(result)
+            if a is None or b is None:
+                continue
+            change = (b - a) / a if a else (0.0 if a == b else math.inf)
+            worse = change if larger_is_worse else -change
+            rows.append((result['scenario'], label, a, b, change, worse > tolerance))
+    return rows
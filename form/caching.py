@@ -0,0 +1,159 @@
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+
+from .models import Form
+
+
+VERSION_KEY = 'form:version:{}'
+# All rendered variants of one form share an entry, so invalidating a form
+# is a single delete. Each variant is (content, gzipped content); v2 keeps
+# shared caches from serving entries of the older bytes-only layout.
+PAYLOAD_KEY = 'form:payload:v2:{}'
+HITS_KEY = 'form:payload:hits'
+MISSES_KEY = 'form:payload:misses'
+
+
+def form_cache():
+    return caches['forms']
+
+
+def get_form_version(form_id):
+    """
+    Return the version marker (`Form.updated_at`) of a form, or None if
+    the form does not exist.
+
+    Served from the cache when possible, otherwise a single primary-key
+    lookup. Signals keep the cached value in step with writes. The lookup
+    always reads the primary: a marker from a lagging replica would be
+    cached after the write's invalidation and never replaced.
+    """
+    cache = form_cache()
+    key = VERSION_KEY.format(form_id)
+    version = cache.get(key)
+    if version is None:
+        version = Form.objects.using(DEFAULT_DB_ALIAS).filter(pk=form_id).values_list('updated_at', flat=True).first()
+        if version is not None:
+            cache.set(key, version)
+    return version
+
+
+async def aget_form_version(form_id):
+    """Async `get_form_version`, for the async views."""
+    cache = form_cache()
+    key = VERSION_KEY.format(form_id)
+    version = await cache.aget(key)
+    if version is None:
+        version = await (
+            Form.objects.using(DEFAULT_DB_ALIAS).filter(pk=form_id).values_list('updated_at', flat=True).afirst()
+        )
+        if version is not None:
+            await cache.aset(key, version)
+    return version
+
+
+def invalidate_form_version(form_id):
+    form_cache().delete(VERSION_KEY.format(form_id))
+
+
+def request_form_version(request, pk):
+    # condition() asks for the ETag and Last-Modified separately; remember
+    # the marker on the request so both come from one lookup.
+    versions = request.__dict__.setdefault('_form_versions', {})
+    if pk not in versions:
+        versions[pk] = get_form_version(pk)
+    return versions[pk]
+
+
+async def arequest_form_version(request, pk):
+    versions = request.__dict__.setdefault('_form_versions', {})
+    if pk not in versions:
+        versions[pk] = await aget_form_version(pk)
+    return versions[pk]
+
+
+def form_etag(request, pk=None, **kwargs):
+    version = request_form_version(request, pk)
+    if version is None:
+        return None
+    return f'"form-{pk}-{int(version.timestamp() * 1_000_000)}"'
+
+
+def form_last_modified(request, pk=None, **kwargs):
+    return request_form_version(request, pk)
+
+
+def _count(key):
+    cache = form_cache()
+    cache.add(key, 0)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Evicted between add() and incr(); losing one count is fine.
+        pass
+
+
+async def _acount(key):
+    cache = form_cache()
+    await cache.aadd(key, 0)
+    try:
+        await cache.aincr(key)
+    except ValueError:
+        pass
+
+
+def get_cached_payload(form_id, variant, version):
+    """
+    Return the rendered bytes stored for `variant` of a form at `version`
+    and their gzipped copy (None if not worth compressing), or None.
+    """
+    entry = form_cache().get(PAYLOAD_KEY.format(form_id))
+    if entry is not None and entry['version'] == version and variant in entry['variants']:
+        _count(HITS_KEY)
+        return entry['variants'][variant]
+    _count(MISSES_KEY)
+    return None
+
+
+def set_cached_payload(form_id, variant, version, content, gzipped=None):
+    cache = form_cache()
+    key = PAYLOAD_KEY.format(form_id)
+    entry = cache.get(key)
+    if entry is None or entry['version'] != version:
+        entry = {'version': version, 'variants': {}}
+    entry['variants'][variant] = (bytes(content), gzipped)
+    cache.set(key, entry)
+
+
+async def aget_cached_payload(form_id, variant, version):
+    entry = await form_cache().aget(PAYLOAD_KEY.format(form_id))
+    if entry is not None and entry['version'] == version and variant in entry['variants']:
+        await _acount(HITS_KEY)
+        return entry['variants'][variant]
+    await _acount(MISSES_KEY)
+    return None
+
+
+async def aset_cached_payload(form_id, variant, version, content, gzipped=None):
+    cache = form_cache()
+    key = PAYLOAD_KEY.format(form_id)
+    entry = await cache.aget(key)
+    if entry is None or entry['version'] != version:
+        entry = {'version': version, 'variants': {}}
+    entry['variants'][variant] = (bytes(content), gzipped)
+    await cache.aset(key, entry)
+
+
+def invalidate_form_payloads(form_id):
+    form_cache().delete(PAYLOAD_KEY.format(form_id))
+
+
+def payload_cache_stats():
+    cache = form_cache()
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': hits / total if total else None,
+    }
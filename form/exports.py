@@ -0,0 +1,98 @@
+import csv
+import io
+import json
+from itertools import groupby
+from operator import itemgetter
+
+from .models import FormResponse
+
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+def _submissions(form, chunk_size):
+    """
+    Yield `(submission_id, created_at, token, answers)` for each submission
+    to a form, where `answers` maps question id to answer.
+
+    Rows come straight from a chunked cursor as tuples, ordered so that a
+    submission's answers are adjacent; no model instances or serializers
+    are created, and only one submission is held in memory at a time.
+    """
+    rows = (
+        FormResponse.objects
+        .filter(form=form)
+        .order_by('submission_id', 'id')
+        .values_list('submission_id', 'submission__created_at', 'submission__token', 'question_id', 'answer')
+        .iterator(chunk_size=chunk_size)
+    )
+    for (submission_id, created_at, token), answers in groupby(rows, key=itemgetter(0, 1, 2)):
+        yield submission_id, created_at, token, {row[3]: row[4] for row in answers}
+
+
+def iter_csv(form, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Stream a form's submissions as CSV text, one row per submission and
+    one column per question, in chunks of `chunk_size` rows. Returns the
+    number of rows written.
+    """
+    questions = list(form.questions.order_by('id').values_list('id', 'text'))
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(['submission_id', 'submitted_at', 'token'] + [text for _, text in questions])
+    count = 0
+    for submission_id, created_at, token, answers in _submissions(form, chunk_size):
+        writer.writerow(
+            [submission_id, created_at.isoformat(), token]
+            + [answers.get(question_id, '') for question_id, _ in questions]
+        )
+        count += 1
+        if count % chunk_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+    return count
+
+
+def iter_ndjson(form, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Stream a form's submissions as newline-delimited JSON, one object per
+    submission, in chunks of `chunk_size` lines. Returns the number of
+    lines written.
+    """
+    count = 0
+    lines = []
+    for submission_id, created_at, token, answers in _submissions(form, chunk_size):
+        lines.append(json.dumps({
+            'submission': submission_id,
+            'created_at': created_at.isoformat(),
+            'token': token,
+            'answers': {str(question_id): answer for question_id, answer in answers.items()},
+        }))
+        count += 1
+        if len(lines) == chunk_size:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+    return count
+
+
+def write_export(chunks, write):
+    """
+    Pass every chunk of an exporter to `write` and return the number of
+    rows it wrote.
+    """
+    while True:
+        try:
+            chunk = next(chunks)
+        except StopIteration as stop:
+            return stop.value
+        write(chunk)
+
+
+EXPORTERS = {
+    'csv': iter_csv,
+    'ndjson': iter_ndjson,
+}
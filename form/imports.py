@@ -0,0 +1,372 @@
+"""
+Bulk import of form definitions and of historical responses.
+
+Forms
+-----
+
+A definition is one form with its questions, the keys being the model
+fields:
+
+    {"title": "Feedback", "questions": [
+        {"text": "Age?", "question_type": "numeric_answer", "number_type": "integer",
+         "min_value": 0, "max_value": 120},
+        ...
+    ]}
+
+`Question.save` runs `full_clean()`, so creating questions one by one
+validates and inserts them one at a time, each pass with its unique and
+foreign-key lookups. An import instead checks the field and `Question.clean`
+rules of the whole batch in memory, reports every error at once, and writes
+all forms and questions with two bulk inserts in one transaction. Nothing
+else is checked against the database: the questions belong to forms
+created by the same import.
+
+Responses
+---------
+
+`ResponseImporter` loads answers exported from another system, one answer
+per row (see `RESPONSE_COLUMNS`), with the rules of
+`ResponseSerializer.validate`. Rows are read as a stream and handled in
+chunks: each chunk is validated against questions loaded once per form,
+then written with the bulk inserts of `save_submissions` in its own
+transaction, which also records how far the input has been imported
+(`ResponseImport`). Memory is bounded by the chunk size and an import can
+resume after the last committed chunk.
+"""
+import csv
+import json
+from itertools import groupby
+
+from django.core.exceptions import NON_FIELD_ERRORS, ValidationError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import serializers
+from rest_framework.settings import api_settings
+
+from .ingestion import save_submissions
+from .models import Form, FormResponse, Question, Submission
+from .validators import get_validator
+
+
+IMPORT_BATCH_SIZE = 1000
+
+FORM_FIELDS = ('title', 'questions')
+QUESTION_FIELDS = ('text', 'question_type', 'required', 'max_length', 'min_value', 'max_value', 'number_type')
+
+RESPONSE_CHUNK_SIZE = 5000
+
+# form, question and answer are required. Consecutive rows with the same
+# form and `submission` (any key from the source system) become one
+# Submission; rows without one get a submission each.
+RESPONSE_COLUMNS = ('form', 'question', 'answer', 'submission', 'submitted_at', 'token')
+
+
+def read_definitions(lines):
+    """
+    Parse form definitions from JSON (one definition or a list of them) or
+    NDJSON (one definition per line) text, given as an iterable of lines.
+    Raises ValueError with the offending line on malformed input.
+    """
+    lines = list(lines)
+    text = ''.join(lines)
+    try:
+        document = json.loads(text) if text.strip() else []
+    except ValueError:
+        document = None  # Several documents: NDJSON
+    if document is not None:
+        return document if isinstance(document, list) else [document]
+
+    definitions = []
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            definitions.append(json.loads(line))
+        except ValueError as exc:
+            raise ValueError(f"line {number}: {exc}") from None
+    return definitions
+
+
+def _messages(exc):
+    if not hasattr(exc, 'error_dict'):
+        exc = ValidationError({NON_FIELD_ERRORS: exc.messages})
+    errors = {}
+    for field, messages in exc.message_dict.items():
+        errors[api_settings.NON_FIELD_ERRORS_KEY if field == NON_FIELD_ERRORS else field] = messages
+    return errors
+
+
+def _unknown(item, fields):
+    return {key: ["Unknown field."] for key in item if key not in fields}
+
+
+def build_question(item):
+    """
+    An unsaved `Question` for `item`, validated like `full_clean()` minus
+    the database checks, or a dict of errors.
+    """
+    if not isinstance(item, dict):
+        return None, {api_settings.NON_FIELD_ERRORS_KEY: ["Expected an object."]}
+    errors = _unknown(item, QUESTION_FIELDS)
+    question = Question(**{field: item[field] for field in QUESTION_FIELDS if field in item})
+    try:
+        # The form does not exist yet; validating it would query.
+        question.clean_fields(exclude={'form'})
+        # clean() compares values, so only run it on well-typed fields. It
+        # also fills in the default max_length.
+        question.clean()
+    except ValidationError as exc:
+        errors.update(_messages(exc))
+    return question, errors
+
+
+def build_form(definition):
+    if not isinstance(definition, dict):
+        return None, {api_settings.NON_FIELD_ERRORS_KEY: ["Expected an object."]}
+    errors = _unknown(definition, FORM_FIELDS)
+    form = Form(title=definition.get('title', ''))
+    try:
+        form.clean_fields()
+    except ValidationError as exc:
+        errors.update(_messages(exc))
+
+    items = definition.get('questions', [])
+    if not isinstance(items, list):
+        errors['questions'] = ["Expected a list of questions."]
+        items = []
+    questions, question_errors = [], {}
+    for index, item in enumerate(items):
+        question, item_errors = build_question(item)
+        if item_errors:
+            question_errors[str(index)] = item_errors
+        questions.append(question)
+    if question_errors:
+        errors['questions'] = question_errors
+    return (form, questions), errors
+
+
+def validate_definitions(definitions):
+    """
+    Build the forms and questions of `definitions` in one pass.
+
+    Returns a list of (form, questions) or raises a ValidationError with
+    the errors of every definition, keyed by position.
+    """
+    if not isinstance(definitions, list):
+        raise serializers.ValidationError({api_settings.NON_FIELD_ERRORS_KEY: ["Expected a list of forms."]})
+    built, errors = [], {}
+    for index, definition in enumerate(definitions):
+        result, form_errors = build_form(definition)
+        if form_errors:
+            errors[str(index)] = form_errors
+        built.append(result)
+    if errors:
+        raise serializers.ValidationError(errors)
+    return built
+
+
+def import_forms(definitions):
+    """
+    Validate and create the forms of `definitions` with their questions,
+    all or nothing. Returns the created forms with their questions in
+    `imported_questions`.
+    """
+    built = validate_definitions(definitions)
+    with transaction.atomic():
+        # Primary keys come back from the insert (SQLite >= 3.35, PostgreSQL).
+        forms = Form.objects.bulk_create([form for form, _ in built])
+        questions = []
+        for form, form_questions in built:
+            for question in form_questions:
+                question.form = form
+            form.imported_questions = form_questions
+            questions.extend(form_questions)
+        Question.objects.bulk_create(questions, batch_size=IMPORT_BATCH_SIZE)
+    return forms
+
+
+def flatten_errors(detail, path=()):
+    """Yield (path, message) for every message in nested error `detail`."""
+    if isinstance(detail, dict):
+        for key, value in detail.items():
+            yield from flatten_errors(value, (*path, str(key)))
+    elif isinstance(detail, list):
+        for value in detail:
+            yield from flatten_errors(value, path)
+    else:
+        yield '.'.join(path), str(detail)
+
+
+def read_response_rows(lines, format):
+    """
+    Yield `(row number, row)` from CSV with a header line or from NDJSON.
+
+    Rows are dicts, except NDJSON lines that are not JSON objects, which
+    are yielded as they are for validation to reject. Row numbers are CSV
+    records or NDJSON lines; resuming skips by them.
+    """
+    if format == 'csv':
+        yield from enumerate(csv.DictReader(lines), start=1)
+        return
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield number, json.loads(line)
+        except ValueError:
+            yield number, line
+
+
+class ChunkResult:
+    __slots__ = ('rows', 'imported', 'rejected')
+
+    def __init__(self, rows, imported, rejected):
+        self.rows = rows          # Number of the last input row in the chunk
+        self.imported = imported  # Answers written
+        self.rejected = rejected  # (row number, row, errors) of rejected rows
+
+
+def _pk(value):
+    if isinstance(value, bool):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class ResponseImporter:
+    """
+    Validates answer rows and writes them chunk by chunk.
+    """
+
+    def __init__(self, progress, chunk_size=RESPONSE_CHUNK_SIZE):
+        self.progress = progress
+        self.chunk_size = chunk_size
+        # form id -> {question id: question}, or None for a missing form
+        self.questions = {}
+
+    def form_questions(self, form_id):
+        if form_id not in self.questions:
+            questions = {question.id: question for question in Question.objects.filter(form_id=form_id)}
+            if not questions and not Form.objects.filter(pk=form_id).exists():
+                questions = None
+            self.questions[form_id] = questions
+        return self.questions[form_id]
+
+    def validate(self, row):
+        """
+        Return the unsaved `FormResponse` for `row` and an empty dict, or
+        None and the row's errors.
+        """
+        if not isinstance(row, dict):
+            return None, {api_settings.NON_FIELD_ERRORS_KEY: ["Expected a JSON object."]}
+        errors = {}
+        for field in ('form', 'question'):
+            if row.get(field) in (None, ''):
+                errors[field] = ["This field is required."]
+        # Blank answers are fine; the question's validator decides.
+        if row.get('answer') is None:
+            errors['answer'] = ["This field is required."]
+
+        form_id, question = _pk(row.get('form')), None
+        if 'form' not in errors:
+            if form_id is None:
+                errors['form'] = ["A valid integer is required."]
+            elif self.form_questions(form_id) is None:
+                errors['form'] = [f'Invalid pk "{row["form"]}" - object does not exist.']
+        if 'question' not in errors and 'form' not in errors:
+            question = self.form_questions(form_id).get(_pk(row.get('question')))
+            if question is None:
+                errors['question'] = ["Question does not belong to this form."]
+
+        answer = row.get('answer')
+        if isinstance(answer, (int, float)) and not isinstance(answer, bool):
+            answer = str(answer)
+        if 'answer' not in errors and not isinstance(answer, str):
+            errors['answer'] = ["Not a valid string."]
+        if not errors:
+            try:
+                numeric_answer = get_validator(question)(answer)
+            except serializers.ValidationError as exc:
+                errors['answer'] = [str(message) for message in exc.detail]
+
+        if row.get('submitted_at') and self.submitted_at(row) is None:
+            errors['submitted_at'] = ["Datetime has wrong format."]
+        if len(str(row.get('token') or '')) > 64:
+            errors['token'] = ["Ensure this field has no more than 64 characters."]
+        if errors:
+            return None, errors
+        return FormResponse(form_id=form_id, question=question, answer=answer, numeric_answer=numeric_answer), {}
+
+    def submitted_at(self, row):
+        value = row.get('submitted_at')
+        created_at = parse_datetime(value) if isinstance(value, str) else None
+        if created_at is not None and timezone.is_naive(created_at):
+            created_at = timezone.make_aware(created_at)
+        return created_at
+
+    def submission(self, form_id, row):
+        submission = Submission(form_id=form_id)
+        created_at = self.submitted_at(row)
+        if created_at is not None:
+            submission.created_at = created_at
+        if row.get('token'):
+            submission.token = str(row['token'])
+        return submission
+
+    @staticmethod
+    def group_key(item):
+        number, row = item
+        if isinstance(row, dict) and row.get('submission') not in (None, ''):
+            return row.get('form'), row['submission']
+        return None, number
+
+    def chunks(self, rows):
+        """
+        Group `(number, row)` pairs into lists of submissions of at least
+        `chunk_size` rows, never splitting a submission.
+        """
+        chunk, size = [], 0
+        for _, group in groupby(rows, key=self.group_key):
+            group = list(group)
+            chunk.append(group)
+            size += len(group)
+            if size >= self.chunk_size:
+                yield chunk
+                chunk, size = [], 0
+        if chunk:
+            yield chunk
+
+    def write(self, chunk):
+        items, rejected, imported = [], [], 0
+        for group in chunk:
+            answers = []
+            for number, row in group:
+                answer, errors = self.validate(row)
+                if errors:
+                    rejected.append((number, row, errors))
+                else:
+                    answers.append(answer)
+            if answers:
+                items.append((self.submission(answers[0].form_id, group[0][1]), answers))
+                imported += len(answers)
+
+        progress = self.progress
+        progress.rows = chunk[-1][-1][0]
+        progress.imported += imported
+        progress.rejected += len(rejected)
+        with transaction.atomic():
+            save_submissions(items)
+            progress.save()
+        return ChunkResult(progress.rows, imported, rejected)
+
+    def run(self, rows):
+        """
+        Import `(number, row)` pairs after the rows already committed by
+        `progress`, yielding a `ChunkResult` after each committed chunk.
+        """
+        done = self.progress.rows
+        for chunk in self.chunks((number, row) for number, row in rows if number > done):
+            yield self.write(chunk)
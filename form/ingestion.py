@@ -0,0 +1,219 @@
+"""
+Write-behind ingestion of validated submissions.
+
+With `INGESTION_MODE = 'queue'` the API hands validated submissions to a
+bounded in-process queue and answers 202 Accepted with a receipt. A
+background thread writes them in batches, so the number of write
+transactions follows the batch count rather than the request count.
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import close_old_connections, connection, transaction
+
+from .models import FormResponse, Submission
+from .stats import record_answers
+
+
+logger = logging.getLogger(__name__)
+
+RECEIPT_KEY = 'receipt:{}'
+RECEIPT_TIMEOUT = 24 * 60 * 60
+
+QUEUED = 'queued'
+STORED = 'stored'
+FAILED = 'failed'
+
+
+class QueueFull(Exception):
+    pass
+
+
+def save_submissions(items):
+    """
+    Write `(submission, answers)` pairs with one bulk insert per table in a
+    single transaction, updating question statistics in the same one.
+    """
+    with transaction.atomic():
+        Submission.objects.bulk_create([submission for submission, _ in items])
+        answers = []
+        for submission, submission_answers in items:
+            for answer in submission_answers:
+                answer.submission = submission  # Picks up the new primary key
+            answers.extend(submission_answers)
+        FormResponse.objects.bulk_create(answers)
+        record_answers(answers)
+
+
+def _receipt_cache():
+    return caches['forms']
+
+
+def set_receipt_status(receipts):
+    _receipt_cache().set_many(
+        {RECEIPT_KEY.format(receipt): status for receipt, status in receipts.items()},
+        timeout=RECEIPT_TIMEOUT,
+    )
+
+
+def get_receipt_status(receipt):
+    """
+    Return `(status, submission_id)` for a receipt, or None if unknown.
+    """
+    status = _receipt_cache().get(RECEIPT_KEY.format(receipt))
+    if status is not None:
+        return status
+    # The cache entry may have expired; the submission row is authoritative.
+    submission_id = Submission.objects.filter(receipt=receipt).values_list('id', flat=True).first()
+    if submission_id is not None:
+        return STORED, submission_id
+    return None
+
+
+class IngestionQueue:
+    """
+    Bounded queue of pending submissions with a batching flusher thread.
+
+    A batch is flushed once `batch_size` submissions are waiting or
+    `flush_interval` seconds after its first one arrived, whichever comes
+    first. `put` blocks for at most `put_timeout` seconds when the queue is
+    full and then raises `QueueFull`, pushing back on clients instead of
+    growing without bound.
+    """
+
+    def __init__(self, maxsize, batch_size, flush_interval, put_timeout):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self._queue = queue.Queue(maxsize)
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='form-ingestion', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self, timeout=10):
+        """
+        Stop accepting work, wait for the flusher and write what is left.
+        """
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+
+    def put(self, submission, answers):
+        """
+        Queue a validated submission and return its receipt.
+        """
+        if self._stopping.is_set():
+            raise QueueFull("Ingestion queue is shutting down.")
+        submission.receipt = uuid.uuid4().hex
+        set_receipt_status({submission.receipt: (QUEUED, None)})
+        try:
+            self._queue.put((submission, answers), timeout=self.put_timeout)
+        except queue.Full:
+            _receipt_cache().delete(RECEIPT_KEY.format(submission.receipt))
+            raise QueueFull("Ingestion queue is full.")
+        return submission.receipt
+
+    def qsize(self):
+        return self._queue.qsize()
+
+    def flush(self):
+        """
+        Write everything currently queued, in batches, on the calling thread.
+        """
+        while True:
+            batch = []
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not batch:
+                return
+            self._write(batch)
+
+    def _run(self):
+        try:
+            while not (self._stopping.is_set() and self._queue.empty()):
+                batch = self._take_batch()
+                if batch:
+                    # What the request cycle does for request threads: drop a
+                    # connection that broke or outlived CONN_MAX_AGE, and
+                    # health check the persistent one again.
+                    close_old_connections()
+                    self._write(batch)
+        finally:
+            connection.close()
+
+    def _take_batch(self):
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        try:
+            save_submissions(batch)
+        except Exception:
+            # One bad submission (e.g. its question was deleted meanwhile)
+            # must not sink the batch; retry one by one to isolate it.
+            logger.exception("Batch of %d submissions failed, retrying individually", len(batch))
+            if len(batch) > 1:
+                for submission, answers in batch:
+                    # Forget keys assigned by the rolled back insert.
+                    submission.pk = None
+                    for answer in answers:
+                        answer.pk = None
+                    self._write([(submission, answers)])
+                return
+            set_receipt_status({batch[0][0].receipt: (FAILED, None)})
+            return
+        set_receipt_status({submission.receipt: (STORED, submission.pk) for submission, _ in batch})
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_ingestion_queue():
+    """
+    Return the process's ingestion queue, starting it on first use.
+
+    Started lazily so that pre-forking servers get one flusher per worker.
+    """
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = IngestionQueue(
+                maxsize=settings.INGESTION_QUEUE_SIZE,
+                batch_size=settings.INGESTION_BATCH_SIZE,
+                flush_interval=settings.INGESTION_FLUSH_INTERVAL,
+                put_timeout=settings.INGESTION_PUT_TIMEOUT,
+            )
+            _queue.start()
+    return _queue
+
+
+def queue_enabled():
+    return settings.INGESTION_MODE == 'queue'
@@ -0,0 +1,126 @@
+import json
+import platform
+import time
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from config.database import cache_key_prefix
+
+from form.benchmarks import SCENARIOS, compare, run_scenario, seed, summarize
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a benchmark dataset into a separate database and measure throughput, "
+        "latency percentiles and query counts of the form API routes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenario', action='append', dest='scenarios', choices=sorted(SCENARIOS),
+                            help="Only this scenario (repeatable). Default: all.")
+        parser.add_argument('--forms', type=int, default=1000, help="Small forms to seed.")
+        parser.add_argument('--questions', type=int, default=1000, help="Questions of the large form.")
+        parser.add_argument('--responses', type=int, default=1000000, help="Responses to the busy form.")
+        parser.add_argument('--requests', type=int, default=200, help="Measured requests per scenario.")
+        parser.add_argument('--concurrency', type=int, default=4, help="Concurrent clients.")
+        parser.add_argument('--warmup', type=int, default=10, help="Unmeasured requests per scenario.")
+        parser.add_argument('--asgi', action='store_true',
+                            help="Send requests through the ASGI handler from --concurrency tasks on one "
+                                 "event loop (one worker) instead of WSGI threads.")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--database',
+                            help="Name of the benchmark database (default: bench.sqlite3 next to the "
+                                 "project database on SQLite, Django's test database name otherwise).")
+        parser.add_argument('--keepdb', action='store_true',
+                            help="Keep the benchmark database, and reuse an already seeded one.")
+        parser.add_argument('--output', help="Write the results as JSON to this file.")
+        parser.add_argument('--compare', help="Results file of an earlier run to compare against.")
+        parser.add_argument('--tolerance', type=float, default=0.1,
+                            help="Relative change counted as a regression by --compare (default: 0.1).")
+
+    def handle(self, *args, **options):
+        if options['concurrency'] < 1 or options['requests'] < 1:
+            raise CommandError("--requests and --concurrency must be positive.")
+        baseline = None
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)
+
+        # Never run against the project database: create (or reuse) a
+        # dedicated one the way the test runner does.
+        test_settings = connection.settings_dict.setdefault('TEST', {})
+        if options['database']:
+            test_settings['NAME'] = options['database']
+        elif connection.vendor == 'sqlite':
+            test_settings['NAME'] = str(settings.BASE_DIR / 'bench.sqlite3')
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options['keepdb'])
+        setup_test_environment(debug=False)
+        # Nor against its cache: versions and payloads of the benchmark
+        # forms must not reach (or come from) a cache the project shares.
+        isolated_cache = override_settings(CACHES={**settings.CACHES, 'forms': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'bench',
+            'TIMEOUT': None,
+            'KEY_PREFIX': cache_key_prefix(connection.settings_dict),
+        }})
+        isolated_cache.enable()
+        try:
+            started = time.perf_counter()
+            dataset = seed(options['forms'], options['questions'], options['responses'], options['seed'],
+                           log=self.stderr.write)
+            self.stderr.write(f"Dataset ready in {time.perf_counter() - started:.1f}s")
+            results = self.run(dataset, options)
+            report = {
+                'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+                'environment': {
+                    'python': platform.python_version(),
+                    'django': django.get_version(),
+                    'database': connection.vendor,
+                },
+                'dataset': dataset.describe(),
+                'results': results,
+            }
+        finally:
+            isolated_cache.disable()
+            teardown_test_environment()
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+        if baseline is not None:
+            self.report_comparison(baseline, report, options['tolerance'])
+
+    def run(self, dataset, options):
+        results = []
+        self.stdout.write(f"{'scenario':<20}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+                          f"{'queries':>9}{'errors':>8}")
+        for name in options['scenarios'] or SCENARIOS:
+            samples, elapsed = run_scenario(
+                SCENARIOS[name], dataset, options['requests'], options['concurrency'], options['warmup'],
+                options['seed'], options['asgi'],
+            )
+            result = summarize(name, samples, elapsed, options['concurrency'])
+            result['server'] = 'asgi' if options['asgi'] else 'wsgi'
+            results.append(result)
+            latency, queries = result['latency_ms'], result['queries']['mean']
+            self.stdout.write(
+                f"{name:<20}{result['throughput']:>10.1f}{latency['p50']:>10.2f}{latency['p95']:>10.2f}"
+                f"{latency['p99']:>10.2f}{'-' if queries is None else f'{queries:.1f}':>9}{result['errors']:>8}"
+            )
+        return results
+
+    def report_comparison(self, baseline, report, tolerance):
+        regressions = 0
+        self.stdout.write("")
+        for scenario, metric, before, after, change, regressed in compare(baseline, report, tolerance):
+            regressions += regressed
+            flag = "  REGRESSION" if regressed else ""
+            self.stdout.write(f"{scenario:<20}{metric:<12}{before:>10.2f} -> {after:>10.2f} ({change:+.1%}){flag}")
+        if regressions:
+            raise CommandError(f"{regressions} metric(s) regressed by more than {tolerance:.0%}.")
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from form.exports import EXPORT_CHUNK_SIZE, EXPORTERS, write_export
+from form.models import Form
+
+
+class Command(BaseCommand):
+    help = "Stream all submissions to a form as CSV or NDJSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument('form_id', type=int)
+        parser.add_argument('--format', choices=sorted(EXPORTERS), default='csv')
+        parser.add_argument('--output', help="File to write to (default: stdout).")
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            form = Form.objects.get(pk=options['form_id'])
+        except Form.DoesNotExist:
+            raise CommandError(f"Form {options['form_id']} does not exist.")
+
+        chunks = EXPORTERS[options['format']](form, chunk_size=options['chunk_size'])
+        started = time.perf_counter()
+        if options['output']:
+            with open(options['output'], 'w', newline='') as output:
+                rows = write_export(chunks, output.write)
+        else:
+            rows = write_export(chunks, lambda chunk: self.stdout.write(chunk, ending=''))
+        elapsed = time.perf_counter() - started
+
+        rate = rows / elapsed if elapsed else 0
+        self.stderr.write(f"Exported {rows} submissions in {elapsed:.2f}s ({rate:.0f} rows/s)")
@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from form.models import ReplicationHeartbeat
+from form.replicas import ReplicaSet, get_replica_set
+
+
+class Command(BaseCommand):
+    help = "Stamp the replication heartbeat on the primary, from which replica lag is measured."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=1.0,
+                            help="Seconds between beats (default: 1).")
+        parser.add_argument('--once', action='store_true',
+                            help="Beat once and report each replica's lag instead of running forever.")
+
+    def handle(self, *args, **options):
+        while True:
+            ReplicationHeartbeat.objects.using(DEFAULT_DB_ALIAS).update_or_create(
+                pk=1, defaults={'beat': time.time()},
+            )
+            if options['once']:
+                break
+            time.sleep(options['interval'])
+
+        configured = get_replica_set()
+        replicas = ReplicaSet(configured.aliases, configured.max_lag, configured.check_interval)
+        replicas.check()
+        for alias in replicas.aliases:
+            if alias not in replicas.lags:
+                self.stdout.write(f"{alias}: unavailable")
+            else:
+                state = 'ok' if alias in replicas.healthy else 'lagging'
+                self.stdout.write(f"{alias}: {replicas.lags[alias]:.3f}s behind ({state})")
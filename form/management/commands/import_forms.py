@@ -0,0 +1,53 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework import serializers
+
+from form.imports import flatten_errors, import_forms, read_definitions, validate_definitions
+
+
+class Command(BaseCommand):
+    help = (
+        "Create forms with their questions from a JSON (one definition or a list) or NDJSON "
+        "(one definition per line) file. Nothing is written unless every definition is valid."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Definition file, or - for standard input.")
+        parser.add_argument('--check', action='store_true',
+                            help="Only validate the definitions and report errors.")
+
+    def handle(self, *args, **options):
+        try:
+            if options['path'] == '-':
+                definitions = read_definitions(sys.stdin)
+            else:
+                with open(options['path'], encoding='utf-8') as f:
+                    definitions = read_definitions(f)
+        except OSError as exc:
+            raise CommandError(str(exc))
+        except ValueError as exc:
+            raise CommandError(f"Invalid JSON: {exc}")
+
+        started = time.perf_counter()
+        try:
+            if options['check']:
+                validate_definitions(definitions)
+                forms = []
+            else:
+                forms = import_forms(definitions)
+        except serializers.ValidationError as exc:
+            errors = list(flatten_errors(exc.detail))
+            for path, message in errors:
+                self.stderr.write(f"{path}: {message}")
+            raise CommandError(f"{len(errors)} errors in {options['path']}; nothing was imported.")
+
+        elapsed = time.perf_counter() - started
+        if options['check']:
+            self.stdout.write(f"{len(definitions)} forms are valid")
+            return
+        for form in forms:
+            self.stdout.write(f"Form {form.id}: {form.title} ({len(form.imported_questions)} questions)")
+        questions = sum(len(form.imported_questions) for form in forms)
+        self.stdout.write(f"Imported {len(forms)} forms and {questions} questions in {elapsed:.2f}s")
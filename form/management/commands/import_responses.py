@@ -0,0 +1,108 @@
+import csv
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from form.imports import RESPONSE_CHUNK_SIZE, RESPONSE_COLUMNS, ResponseImporter, read_response_rows
+from form.models import ResponseImport
+
+
+class ErrorFile:
+    """
+    Rejected rows in the input's format, with their row number and errors.
+    Opened lazily and appended to, so a resumed import continues it.
+    """
+
+    def __init__(self, path, format):
+        self.path = path
+        self.format = format
+        self.file = None
+        self.writer = None
+
+    def write(self, rejected):
+        for number, row, errors in rejected:
+            if self.file is None:
+                self.file = open(self.path, 'a', newline='', encoding='utf-8')
+            if self.format == 'ndjson':
+                self.file.write(json.dumps({'row': number, 'data': row, 'errors': errors}) + '\n')
+                continue
+            if self.writer is None:
+                columns = ['row', *(key for key in row if key is not None), 'errors']
+                self.writer = csv.DictWriter(self.file, columns, extrasaction='ignore')
+                if self.file.tell() == 0:
+                    self.writer.writeheader()
+            self.writer.writerow({**row, 'row': number, 'errors': json.dumps(errors)})
+        if self.file is not None:
+            self.file.flush()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream historical answers from a CSV or NDJSON file into the database in chunks, one answer per "
+        f"row with the columns {', '.join(RESPONSE_COLUMNS)}. Rejected rows go to an error file."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=['csv', 'ndjson'],
+                            help="Input format (default: from the file extension).")
+        parser.add_argument('--chunk-size', type=int, default=RESPONSE_CHUNK_SIZE,
+                            help="Rows per transaction (default: %(default)s).")
+        parser.add_argument('--errors', help="File for rejected rows (default: <path>.errors.<format>).")
+        parser.add_argument('--name', help="Name the progress is stored under (default: the absolute path).")
+        parser.add_argument('--resume', action='store_true',
+                            help="Continue after the last committed chunk of an earlier run.")
+        parser.add_argument('--restart', action='store_true',
+                            help="Forget an earlier run's progress and start from the first row.")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        format = options['format'] or ('ndjson' if path.endswith(('.ndjson', '.jsonl')) else 'csv')
+        if options['chunk_size'] < 1:
+            raise CommandError("--chunk-size must be positive.")
+        name = options['name'] or os.path.abspath(path)
+        errors_path = options['errors'] or f'{path}.errors.{format}'
+
+        progress, _ = ResponseImport.objects.get_or_create(name=name)
+        if progress.rows and options['restart']:
+            progress.rows = progress.imported = progress.rejected = 0
+            progress.save()
+            if os.path.exists(errors_path):
+                os.remove(errors_path)
+        elif progress.rows and not options['resume']:
+            raise CommandError(
+                f"{name} was already imported up to row {progress.rows}; "
+                "pass --resume to continue or --restart to import it again."
+            )
+
+        importer = ResponseImporter(progress, options['chunk_size'])
+        error_file = ErrorFile(errors_path, format)
+        started, imported, rejected = time.perf_counter(), 0, 0
+        try:
+            with open(path, newline='', encoding='utf-8') as f:
+                for result in importer.run(read_response_rows(f, format)):
+                    error_file.write(result.rejected)
+                    imported += result.imported
+                    rejected += len(result.rejected)
+                    elapsed = time.perf_counter() - started
+                    self.stderr.write(
+                        f"Row {result.rows}: {imported} answers imported, {rejected} rejected "
+                        f"({(imported + rejected) / elapsed if elapsed else 0:.0f} rows/s)"
+                    )
+        except OSError as exc:
+            raise CommandError(str(exc))
+        finally:
+            error_file.close()
+
+        self.stdout.write(
+            f"Imported {imported} answers in {time.perf_counter() - started:.2f}s; "
+            f"{progress.imported} imported and {progress.rejected} rejected in total"
+        )
+        if rejected:
+            self.stdout.write(f"Rejected rows were written to {errors_path}")
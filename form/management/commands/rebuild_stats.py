@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from form.models import Form, Question, QuestionStats
+from form.stats import compute_stats, rebuild_stats, stats_match
+
+
+class Command(BaseCommand):
+    help = "Rebuild per-question answer statistics from a full scan, or check them against one."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--form', type=int, action='append', dest='forms',
+                            help="Only this form (repeatable). Default: all forms.")
+        parser.add_argument('--check', action='store_true',
+                            help="Compare stored statistics with a full scan without changing them.")
+
+    def handle(self, *args, **options):
+        forms = Form.objects.order_by('id')
+        if options['forms']:
+            forms = forms.filter(id__in=options['forms'])
+
+        mismatches = 0
+        for form_id in forms.values_list('id', flat=True).iterator():
+            questions = list(Question.objects.filter(form_id=form_id))
+            if not options['check']:
+                rebuild_stats(questions)
+                self.stdout.write(f"Form {form_id}: rebuilt {len(questions)} questions")
+                continue
+
+            stored = QuestionStats.objects.in_bulk([question.id for question in questions])
+            for question_id, computed in compute_stats(questions).items():
+                current = stored.get(question_id, QuestionStats(question_id=question_id))
+                if not stats_match(current, computed):
+                    mismatches += 1
+                    self.stdout.write(f"Form {form_id}: statistics of question {question_id} are out of date")
+
+        if mismatches:
+            raise CommandError(f"{mismatches} questions have out-of-date statistics; run without --check.")
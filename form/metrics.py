@@ -0,0 +1,442 @@
+"""
+Per-request performance instrumentation.
+
+`MetricsMiddleware` times every request: wall time, the number and total
+duration of database queries, and the time spent in serializers and in
+`CustomRenderer`. The figures are sent back in a `Server-Timing` header
+and aggregated into per-route histograms, which `/metrics` exposes in the
+Prometheus text format together with interpolated percentiles.
+
+With `METRICS_DIR` set, every process periodically writes its histograms
+to a file in that directory and `/metrics` merges all of them, so any
+worker of a pre-forking server reports the totals of all workers. The
+files of exited workers are folded into one by `retire_process`.
+
+`/metrics` answers staff users, bearer `METRICS_TOKEN` and clients from
+`METRICS_ALLOWED_IPS`.
+"""
+import atexit
+import hmac
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from rest_framework import serializers
+
+
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200)
+QUANTILES = (0.5, 0.95, 0.99)
+
+PHASES = ('db', 'serialize', 'render')
+
+# name -> (help text, buckets)
+HISTOGRAMS = {
+    'http_request_duration_seconds': ('Wall time of a request.', DURATION_BUCKETS),
+    'http_request_db_seconds': ('Time spent executing database queries.', DURATION_BUCKETS),
+    'http_request_serialize_seconds': ('Time spent in serializers.', DURATION_BUCKETS),
+    'http_request_render_seconds': ('Time spent rendering the response body.', DURATION_BUCKETS),
+    'http_request_queries': ('Database queries executed by a request.', QUERY_BUCKETS),
+}
+
+_current = ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    """
+    Timings collected for the request being served.
+    """
+    __slots__ = ('started', 'queries', 'phases', 'active')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.active = set()
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def server_timing(self, total):
+        parts = [f'total;dur={total * 1000:.2f}']
+        for phase in PHASES:
+            part = f'{phase};dur={self.phases[phase] * 1000:.2f}'
+            if phase == 'db':
+                part += f';desc="{self.queries} queries"'
+            parts.append(part)
+        return ', '.join(parts)
+
+
+def time_query(execute, sql, params, many, context):
+    """
+    Database execute wrapper counting and timing queries of the current
+    request.
+
+    Installed on every connection when it is opened rather than per
+    request: connections are thread-local, and under ASGI the ORM runs in
+    other threads than the middleware. The request's timings follow it
+    there through the context variable.
+    """
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.queries += 1
+        timings.phases['db'] += time.perf_counter() - start
+
+
+def install_query_timer(sender, connection, **kwargs):
+    # connection_created receiver; fires again on every reconnect.
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
+
+
+@contextmanager
+def timed(phase):
+    """
+    Add the time spent in the block to `phase` of the current request.
+
+    Nested blocks of the same phase are only counted once; outside of an
+    instrumented request this does nothing.
+    """
+    timings = _current.get()
+    if timings is None or phase in timings.active:
+        yield
+        return
+    timings.active.add(phase)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.phases[phase] += time.perf_counter() - start
+        timings.active.discard(phase)
+
+
+class TimedSerializerMixin:
+    """
+    Counts validation and `.data` of a serializer, and of the list
+    serializer built for `many=True`, as serializer time.
+    """
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        serializer = super().many_init(*args, **kwargs)
+        if type(serializer) is serializers.ListSerializer:
+            serializer.__class__ = TimedListSerializer
+        return serializer
+
+    def is_valid(self, *args, **kwargs):
+        with timed('serialize'):
+            return super().is_valid(*args, **kwargs)
+
+    @property
+    def data(self):
+        with timed('serialize'):
+            return super().data
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets, counts=None, sum=0.0, count=0):
+        self.buckets = buckets
+        # One slot per bucket plus the +Inf bucket; not cumulative.
+        self.counts = counts or [0] * (len(buckets) + 1)
+        self.sum = sum
+        self.count = count
+
+    def observe(self, value):
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    def merge(self, other):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.sum += other.sum
+        self.count += other.count
+
+    def quantile(self, q):
+        """
+        Estimate a quantile by linear interpolation inside the bucket that
+        holds it, like Prometheus' `histogram_quantile`.
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for i, count in enumerate(self.counts):
+            if count and cumulative + count >= rank:
+                lower = self.buckets[i - 1] if i else 0
+                if i == len(self.buckets):
+                    return lower
+                return lower + (self.buckets[i] - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-1]
+
+
+class MetricsRegistry:
+    """
+    Histograms keyed by (metric, route, method) and request counters keyed
+    by (route, method, status).
+    """
+
+    def __init__(self, directory=None, flush_interval=1.0):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.histograms = {}
+        self.requests = {}
+        self.lock = threading.Lock()
+        self.last_flush = 0.0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            atexit.register(self.flush)
+
+    def observe(self, route, method, status, timings, total):
+        values = {
+            'http_request_duration_seconds': total,
+            'http_request_db_seconds': timings.phases['db'],
+            'http_request_serialize_seconds': timings.phases['serialize'],
+            'http_request_render_seconds': timings.phases['render'],
+            'http_request_queries': timings.queries,
+        }
+        with self.lock:
+            for name, value in values.items():
+                key = (name, route, method)
+                histogram = self.histograms.get(key)
+                if histogram is None:
+                    histogram = self.histograms[key] = Histogram(HISTOGRAMS[name][1])
+                histogram.observe(value)
+            key = (route, method, str(status))
+            self.requests[key] = self.requests.get(key, 0) + 1
+        if self.directory and time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def snapshot(self):
+        with self.lock:
+            return _snapshot(self.histograms, self.requests)
+
+    def path(self):
+        return _process_path(self.directory, os.getpid())
+
+    def flush(self):
+        """Write this process's snapshot to the shared directory."""
+        self.last_flush = time.monotonic()
+        _write(self.path(), self.snapshot())
+
+    def snapshots(self):
+        if not self.directory:
+            return [self.snapshot()]
+        self.flush()
+        result = []
+        for name in os.listdir(self.directory):
+            if not (name.startswith('metrics-') and name.endswith('.json')):
+                continue
+            try:
+                with open(os.path.join(self.directory, name)) as f:
+                    result.append(json.load(f))
+            except (OSError, ValueError):
+                continue  # Being replaced or removed by its process
+        return result
+
+    def collect(self):
+        """Merge the snapshots of every process into one set of series."""
+        return _merge(self.snapshots())
+
+    def render(self):
+        histograms, requests = self.collect()
+        lines = [
+            '# HELP http_requests_total Requests served.',
+            '# TYPE http_requests_total counter',
+        ]
+        for (route, method, status), count in sorted(requests.items()):
+            lines.append(f'http_requests_total{_labels(route=route, method=method, status=status)} {count}')
+
+        for name, (help_text, buckets) in HISTOGRAMS.items():
+            series = sorted((key[1:], h) for key, h in histograms.items() if key[0] == name)
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+            for (route, method), histogram in series:
+                cumulative = 0
+                for bound, count in zip((*buckets, '+Inf'), histogram.counts):
+                    cumulative += count
+                    labels = _labels(route=route, method=method, le=bound)
+                    lines.append(f'{name}_bucket{labels} {cumulative}')
+                labels = _labels(route=route, method=method)
+                lines.append(f'{name}_sum{labels} {histogram.sum}')
+                lines.append(f'{name}_count{labels} {histogram.count}')
+            lines += [f'# HELP {name}_quantile Estimated {help_text[0].lower()}{help_text[1:-1]} percentiles.',
+                      f'# TYPE {name}_quantile gauge']
+            for (route, method), histogram in series:
+                for q in QUANTILES:
+                    labels = _labels(route=route, method=method, quantile=q)
+                    lines.append(f'{name}_quantile{labels} {histogram.quantile(q)}')
+        return '\n'.join(lines) + '\n'
+
+
+def _snapshot(histograms, requests):
+    return {
+        'histograms': [
+            [name, route, method, h.counts[:], h.sum, h.count]
+            for (name, route, method), h in histograms.items()
+        ],
+        'requests': [[*key, count] for key, count in requests.items()],
+    }
+
+
+def _merge(snapshots):
+    histograms, requests = {}, {}
+    for snapshot in snapshots:
+        for name, route, method, counts, total, count in snapshot['histograms']:
+            buckets = HISTOGRAMS.get(name, (None, ()))[1]
+            if len(counts) != len(buckets) + 1:
+                continue  # Written with a different bucket layout
+            histogram = Histogram(buckets, counts, total, count)
+            key = (name, route, method)
+            if key in histograms:
+                histograms[key].merge(histogram)
+            else:
+                histograms[key] = histogram
+        for route, method, status, count in snapshot['requests']:
+            key = (route, method, status)
+            requests[key] = requests.get(key, 0) + count
+    return histograms, requests
+
+
+def _process_path(directory, pid):
+    return os.path.join(directory, f'metrics-{pid}.json')
+
+
+def _write(path, snapshot):
+    tmp = f'{path}.{threading.get_ident()}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(snapshot, f)
+    os.replace(tmp, path)
+
+
+def retire_process(directory, pid):
+    """
+    Fold the file of the exited process `pid` into `metrics-exited.json`.
+
+    Its counts stay in the totals, and the directory holds one file per
+    live worker plus that one instead of growing with every recycled
+    worker. Called by the gunicorn master (`child_exit` in
+    config/gunicorn.conf.py), which is the only writer of the merged file.
+    """
+    path = _process_path(directory, pid)
+    merged = os.path.join(directory, 'metrics-exited.json')
+    snapshots = []
+    for name in (merged, path):
+        try:
+            with open(name) as f:
+                snapshots.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    if snapshots:
+        _write(merged, _snapshot(*_merge(snapshots)))
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _labels(**labels):
+    def escape(value):
+        return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+    return '{' + ','.join(f'{key}="{escape(value)}"' for key, value in labels.items()) + '}'
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = MetricsRegistry(settings.METRICS_DIR, settings.METRICS_FLUSH_INTERVAL)
+    return _registry
+
+
+def route_name(request):
+    # URL names rather than paths keep the label set bounded.
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.view_name or match.route
+
+
+class MetricsMiddleware:
+    """
+    Instruments every request; keep it first in `MIDDLEWARE` so the wall
+    time covers the other middleware too. Works on both the sync and the
+    async request path.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings = RequestTimings()
+        with self.instrument(timings):
+            response = self.get_response(request)
+        return self.finish(request, response, timings)
+
+    async def __acall__(self, request):
+        timings = RequestTimings()
+        with self.instrument(timings):
+            response = await self.get_response(request)
+        return self.finish(request, response, timings)
+
+    @contextmanager
+    def instrument(self, timings):
+        token = _current.set(timings)
+        try:
+            yield
+        finally:
+            _current.reset(token)
+
+    def finish(self, request, response, timings):
+        total = timings.elapsed()
+        if settings.METRICS_SERVER_TIMING:
+            response['Server-Timing'] = timings.server_timing(total)
+        get_registry().observe(route_name(request), request.method, response.status_code, timings, total)
+        return response
+
+
+def may_scrape(request):
+    if request.user.is_authenticated and request.user.is_staff:
+        return True
+    token = settings.METRICS_TOKEN
+    if token and hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return True
+    return request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint."""
+    if not may_scrape(request):
+        return HttpResponseForbidden()
+    return HttpResponse(get_registry().render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+class TimedListSerializer(TimedSerializerMixin, serializers.ListSerializer):
+    pass
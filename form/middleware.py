@@ -0,0 +1,85 @@
+import gzip
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware, re_accepts_gzip
+from django.utils.cache import patch_vary_headers
+from whitenoise.middleware import WhiteNoiseMiddleware as BaseWhiteNoiseMiddleware
+
+
+class WhiteNoiseMiddleware(BaseWhiteNoiseMiddleware):
+    """
+    WhiteNoise that can also sit in an async middleware chain.
+
+    WhiteNoise's middleware is sync only, which makes Django run every
+    request under ASGI through a thread, async views included. Static file
+    lookups are in-memory; only opening a file is moved off the event loop.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file, thread_sensitive=False)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve, thread_sensitive=False)(static_file, request)
+        return await self.get_response(request)
+
+
+def precompress(content):
+    """
+    gzip `content` once for storing next to it (see `CompressionMiddleware`),
+    or None when it is too small to be compressed or does not shrink.
+
+    Stored payloads are compressed at the highest level since the cost is
+    paid once per version, and without a timestamp so the bytes only
+    depend on the content.
+    """
+    if len(content) < settings.GZIP_MIN_SIZE:
+        return None
+    compressed = gzip.compress(content, compresslevel=9, mtime=0)
+    return compressed if len(compressed) < len(content) else None
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    gzip responses of at least `GZIP_MIN_SIZE` bytes for clients that
+    accept it, always adding `Vary: Accept-Encoding` to such responses.
+
+    A response carrying `gzipped_content` (e.g. a cached form payload, see
+    `FormViewSet.cached_render`) is sent with those bytes instead of being
+    compressed again. Precompressed bodies skip the random padding that
+    GZipMiddleware adds against BREACH; they are only used for public form
+    definitions, which hold no secrets.
+    """
+
+    def process_response(self, request, response):
+        if not response.streaming and len(response.content) < settings.GZIP_MIN_SIZE:
+            return response
+        gzipped = getattr(response, 'gzipped_content', None)
+        if gzipped is None or response.has_header('Content-Encoding'):
+            return super().process_response(request, response)
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if not re_accepts_gzip.search(request.META.get('HTTP_ACCEPT_ENCODING', '')):
+            return response
+        response.content = gzipped
+        response.headers['Content-Length'] = str(len(gzipped))
+        # Like GZipMiddleware: the ETag names the uncompressed body.
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'gzip'
+        return response
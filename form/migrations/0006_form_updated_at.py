@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('form', '0005_question_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='form',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('form', '0006_form_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='formresponse',
+            index=models.Index(fields=['form', 'id'], name='response_form_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='formresponse',
+            index=models.Index(fields=['form', 'question', 'id'], name='response_form_question_id_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:54
+
+import django.db.models.deletion
+import django.utils.timezone
+import form.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('form', '0007_formresponse_form_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Submission',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('token', models.CharField(default=form.models.generate_submitter_token, max_length=64)),
+                ('form', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='submissions', to='form.form')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='formresponse',
+            name='submission',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='answers', to='form.submission'),
+        ),
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(fields=['form', 'created_at'], name='submission_form_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='formresponse',
+            index=models.Index(fields=['form', 'submission', 'id'], name='response_form_submission_idx'),
+        ),
+    ]
@@ -0,0 +1,75 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+BATCH_SIZE = 1000
+
+
+def backfill_submissions(apps, schema_editor):
+    """
+    Group existing answers into submissions.
+
+    Old rows carry no grouping, so rebuild it from the order they were
+    written in: consecutive answers to one form belong to the same
+    submission until a question repeats.
+    """
+    Submission = apps.get_model('form', 'Submission')
+    FormResponse = apps.get_model('form', 'FormResponse')
+
+    def save(groups):
+        submissions = Submission.objects.bulk_create([Submission(form_id=form_id) for form_id, _ in groups])
+        FormResponse.objects.bulk_update(
+            [
+                FormResponse(id=response_id, submission_id=submission.id)
+                for submission, (_, response_ids) in zip(submissions, groups)
+                for response_id in response_ids
+            ],
+            ['submission'],
+            batch_size=BATCH_SIZE,
+        )
+
+    form_ids = list(
+        FormResponse.objects.filter(submission__isnull=True)
+        .order_by('form_id').values_list('form_id', flat=True).distinct()
+    )
+    for form_id in form_ids:
+        # Page through the form's answers by id rather than holding a cursor
+        # open over the table being updated.
+        groups, questions, last_id = [], set(), 0
+        while True:
+            rows = list(
+                FormResponse.objects
+                .filter(form_id=form_id, submission__isnull=True, id__gt=last_id)
+                .order_by('id')
+                .values_list('id', 'question_id')[:BATCH_SIZE]
+            )
+            if not rows:
+                break
+            for response_id, question_id in rows:
+                if not groups or question_id in questions:
+                    groups.append((form_id, []))
+                    questions = set()
+                groups[-1][1].append(response_id)
+                questions.add(question_id)
+            last_id = rows[-1][0]
+            # The last group may continue in the next page.
+            save(groups[:-1])
+            groups = groups[-1:]
+        if groups:
+            save(groups)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('form', '0008_submission'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_submissions, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='formresponse',
+            name='submission',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='answers', to='form.submission'),
+        ),
+    ]
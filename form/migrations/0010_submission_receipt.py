@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('form', '0009_backfill_submissions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='submission',
+            name='receipt',
+            field=models.CharField(blank=True, max_length=32, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:58
+
+import math
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# QuestionStats.HISTOGRAM_BUCKETS when this migration was written.
+HISTOGRAM_BUCKETS = 10
+
+
+def backfill_stats(apps, schema_editor):
+    """
+    Count the existing answers of every question, as `rebuild_stats` does;
+    `record_answers` only adds the answers written after this migration.
+    """
+    Question = apps.get_model('form', 'Question')
+    FormResponse = apps.get_model('form', 'FormResponse')
+    QuestionStats = apps.get_model('form', 'QuestionStats')
+    questions = Question.objects.in_bulk()
+    stats = {}
+    rows = FormResponse.objects.values_list('question_id', 'answer').order_by().iterator(chunk_size=2000)
+    for question_id, answer in rows:
+        question = questions[question_id]
+        row = stats.get(question_id)
+        if row is None:
+            row = stats[question_id] = QuestionStats(question_id=question_id, histogram=[])
+        row.count += 1
+        if not answer.strip():
+            row.blank_count += 1
+            continue
+        if question.question_type != 'numeric_answer':
+            continue
+        try:
+            value = float(answer)
+        except ValueError:
+            continue
+        if not math.isfinite(value):
+            continue
+        row.numeric_count += 1
+        row.sum += value
+        row.sum_squares += value * value
+        row.min_value = value if row.min_value is None else min(row.min_value, value)
+        row.max_value = value if row.max_value is None else max(row.max_value, value)
+        if not row.histogram:
+            row.histogram = [0] * HISTOGRAM_BUCKETS
+        low, high = question.min_value, question.max_value
+        index = 0
+        if low is not None and high is not None and high > low:
+            index = min(max(int((value - low) / (high - low) * HISTOGRAM_BUCKETS), 0), HISTOGRAM_BUCKETS - 1)
+        row.histogram[index] += 1
+    QuestionStats.objects.bulk_create(stats.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('form', '0010_submission_receipt'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionStats',
+            fields=[
+                ('question', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='form.question')),
+                ('count', models.PositiveBigIntegerField(default=0)),
+                ('blank_count', models.PositiveBigIntegerField(default=0)),
+                ('numeric_count', models.PositiveBigIntegerField(default=0)),
+                ('min_value', models.FloatField(blank=True, null=True)),
+                ('max_value', models.FloatField(blank=True, null=True)),
+                ('sum', models.FloatField(default=0)),
+                ('sum_squares', models.FloatField(default=0)),
+                ('histogram', models.JSONField(blank=True, default=list)),
+            ],
+        ),
+        migrations.RunPython(backfill_stats, migrations.RunPython.noop),
+    ]
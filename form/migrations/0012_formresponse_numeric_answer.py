@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('form', '0011_questionstats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='formresponse',
+            name='numeric_answer',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='formresponse',
+            index=models.Index(fields=['question', 'numeric_answer'], name='response_question_numeric_idx'),
+        ),
+    ]
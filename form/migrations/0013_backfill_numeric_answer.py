@@ -0,0 +1,47 @@
+import math
+
+from django.db import migrations
+
+
+BATCH_SIZE = 1000
+
+
+def backfill_numeric_answer(apps, schema_editor):
+    """
+    Parse the answers of numeric questions into `numeric_answer`.
+
+    Answers that do not parse, or parse to NaN or infinity (written before
+    validation existed), stay NULL.
+    """
+    FormResponse = apps.get_model('form', 'FormResponse')
+    last_id = 0
+    while True:
+        rows = list(
+            FormResponse.objects
+            .filter(question__question_type='numeric_answer', numeric_answer__isnull=True, id__gt=last_id)
+            .order_by('id')
+            .values_list('id', 'answer')[:BATCH_SIZE]
+        )
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        parsed = []
+        for response_id, answer in rows:
+            try:
+                value = float(answer)
+            except ValueError:
+                continue
+            if math.isfinite(value):
+                parsed.append(FormResponse(id=response_id, numeric_answer=value))
+        FormResponse.objects.bulk_update(parsed, ['numeric_answer'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('form', '0012_formresponse_numeric_answer'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_numeric_answer, migrations.RunPython.noop),
+    ]
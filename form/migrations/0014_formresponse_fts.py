@@ -0,0 +1,22 @@
+from django.db import migrations
+
+from form.search import drop_answer_index, install_answer_index
+
+
+def create_index(apps, schema_editor):
+    install_answer_index(schema_editor.connection, rebuild=True)
+
+
+def remove_index(apps, schema_editor):
+    drop_answer_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('form', '0013_backfill_numeric_answer'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, remove_index),
+    ]
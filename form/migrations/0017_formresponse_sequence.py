@@ -0,0 +1,42 @@
+from django.db import migrations, models
+from django.db.models import F, Max
+
+
+def backfill_sequence(apps, schema_editor):
+    """
+    Number existing responses in id order and start `ResponseSequence`
+    after them.
+    """
+    FormResponse = apps.get_model('form', 'FormResponse')
+    ResponseSequence = apps.get_model('form', 'ResponseSequence')
+    FormResponse.objects.update(sequence=F('id'))
+    last = FormResponse.objects.aggregate(last=Max('id'))['last'] or 0
+    ResponseSequence.objects.update_or_create(pk=1, defaults={'value': last})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('form', '0016_responseimport'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResponseSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='formresponse',
+            name='sequence',
+            field=models.PositiveBigIntegerField(editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_sequence, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='formresponse',
+            name='sequence',
+            field=models.PositiveBigIntegerField(editable=False, unique=True),
+        ),
+    ]
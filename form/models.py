@@ -1,9 +1,16 @@
+import uuid
+
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import IntegrityError, connections, models, router, transaction
+from django.db.models import Max
+from django.utils import timezone
 
 class Form(models.Model):
     title = models.CharField(max_length=100)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Version marker for the form definition, bumped whenever the form or
+    # one of its questions is written (see form/signals.py).
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.title
@@ -47,6 +54,7 @@ class Question(models.Model):
         null=True,
         blank=True
     )
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.text    
@@ -84,13 +92,171 @@ class Question(models.Model):
         super().save(*args, **kwargs)
 
 
+def generate_submitter_token():
+    return uuid.uuid4().hex
+
+
+class Submission(models.Model):
+    """
+    One filling of a form; owns the answers given in it.
+    """
+    form = models.ForeignKey(Form, related_name="submissions", on_delete=models.CASCADE)
+    created_at = models.DateTimeField(default=timezone.now)
+    # Opaque respondent identifier, supplied by the client or generated.
+    token = models.CharField(max_length=64, default=generate_submitter_token)
+    # Set for submissions accepted through the ingestion queue, so their
+    # receipt can be looked up once they are written.
+    receipt = models.CharField(max_length=32, null=True, blank=True, unique=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['form', 'created_at'], name='submission_form_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"Submission {self.pk} to {self.form_id}"
+
+
+class FormResponseQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        if not objs:
+            return objs
+        self._for_write = True
+        with transaction.atomic(using=self.db, savepoint=False):
+            first = ResponseSequence.allocate(len(objs), self.db)
+            for offset, obj in enumerate(objs):
+                obj.sequence = first + offset
+            return super().bulk_create(objs, *args, **kwargs)
+
+
 class FormResponse(models.Model):
     question = models.ForeignKey(Question, related_name="responses", on_delete=models.CASCADE)
     form = models.ForeignKey(Form, related_name="responses", on_delete=models.CASCADE)
-    answer = models.TextField()     
+    submission = models.ForeignKey(Submission, related_name="answers", on_delete=models.CASCADE)
+    answer = models.TextField()
+    # Parsed value of answers to numeric questions, for range filters and
+    # database-side aggregates.
+    numeric_answer = models.FloatField(null=True, blank=True)
+    # Position in the change feed: a new number from `ResponseSequence` on
+    # every insert and save. `QuerySet.update()` does not take one.
+    sequence = models.PositiveBigIntegerField(unique=True, editable=False)
+
+    objects = FormResponseQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Listing a form's responses (optionally for one question) in
+            # primary-key order is an index range scan.
+            models.Index(fields=['form', 'id'], name='response_form_id_idx'),
+            models.Index(fields=['form', 'question', 'id'], name='response_form_question_id_idx'),
+            # Exports read a form's answers grouped by submission.
+            models.Index(fields=['form', 'submission', 'id'], name='response_form_submission_idx'),
+            # Range filters and ordered (percentile) scans over one question.
+            models.Index(fields=['question', 'numeric_answer'], name='response_question_numeric_idx'),
+        ]
+
+    def save(self, *args, using=None, update_fields=None, **kwargs):
+        using = using or router.db_for_write(type(self), instance=self)
+        if update_fields is not None:
+            update_fields = {*update_fields, 'sequence'}
+        with transaction.atomic(using=using, savepoint=False):
+            self.sequence = ResponseSequence.allocate(1, using)
+            super().save(*args, using=using, update_fields=update_fields, **kwargs)
 
 
+class ResponseSequence(models.Model):
+    """
+    A single row holding the last change sequence number given to a
+    `FormResponse`.
 
+    Numbers are taken with an UPDATE in the writing transaction, which
+    holds the row until it commits, so they become visible in increasing
+    order and a reader of the change feed that has seen number n will
+    never later find a smaller one committed.
+    """
+    value = models.PositiveBigIntegerField(default=0)
 
+    @classmethod
+    def allocate(cls, count, using):
+        """
+        Take `count` consecutive numbers and return the first. Must run in
+        the transaction that writes them.
+        """
+        connection = connections[using]
+        with connection.cursor() as cursor:
+            # RETURNING needs SQLite 3.35, like bulk_create's primary keys.
+            cursor.execute(
+                f'UPDATE {cls._meta.db_table} SET value = value + %s WHERE id = 1 RETURNING value', [count],
+            )
+            row = cursor.fetchone()
+        if row is not None:
+            return row[0] - count + 1
 
+        # First use, or a flushed table: continue after the numbers in use.
+        last = FormResponse.objects.using(using).aggregate(last=Max('sequence'))['last'] or 0
+        try:
+            with transaction.atomic(using=using):
+                cls.objects.using(using).create(pk=1, value=last + count)
+        except IntegrityError:
+            # Another writer created the row first.
+            return cls.allocate(count, using)
+        return last + 1
+
+    def __str__(self):
+        return f"Response sequence at {self.value}"
 
+
+class QuestionStats(models.Model):
+    """
+    Running aggregates over a question's answers, maintained on insert
+    (see form/stats.py) so reading them never scans responses.
+    """
+    HISTOGRAM_BUCKETS = 10
+
+    question = models.OneToOneField(Question, primary_key=True, related_name="stats", on_delete=models.CASCADE)
+    count = models.PositiveBigIntegerField(default=0)
+    blank_count = models.PositiveBigIntegerField(default=0)
+
+    # Numeric answers only
+    numeric_count = models.PositiveBigIntegerField(default=0)
+    min_value = models.FloatField(null=True, blank=True)
+    max_value = models.FloatField(null=True, blank=True)
+    sum = models.FloatField(default=0)
+    sum_squares = models.FloatField(default=0)
+    # HISTOGRAM_BUCKETS equal-width bucket counts over the question's
+    # min_value..max_value
+    histogram = models.JSONField(default=list, blank=True)
+
+    def __str__(self):
+        return f"Stats for {self.question_id}"
+
+
+
+class ReplicationHeartbeat(models.Model):
+    """
+    A single row stamped on the primary by `manage.py heartbeat`. How far a
+    replica's copy trails the primary's is its replication lag (see
+    form/replicas.py).
+    """
+    # time.time() of the last beat
+    beat = models.FloatField()
+
+    def __str__(self):
+        return f"Heartbeat at {self.beat}"
+
+
+class ResponseImport(models.Model):
+    """
+    Progress of a `manage.py import_responses` run, committed together
+    with each chunk of answers so an interrupted import can resume.
+    """
+    name = models.CharField(max_length=255, unique=True)
+    # Input rows processed (imported or rejected) so far
+    rows = models.PositiveBigIntegerField(default=0)
+    imported = models.PositiveBigIntegerField(default=0)
+    rejected = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Import {self.name} ({self.rows} rows)"
@@ -0,0 +1,31 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class IdCursorPagination(CursorPagination):
+    """
+    Keyset pagination on the primary key.
+
+    Each page is a `WHERE id > cursor ORDER BY id LIMIT n` range scan, so
+    paging deep into a large table costs the same as the first page,
+    unlike LIMIT/OFFSET. Clients may pick `?page_size=` up to
+    `API_MAX_PAGE_SIZE`.
+    """
+    ordering = 'id'
+    page_size_query_param = 'page_size'
+    max_page_size = settings.API_MAX_PAGE_SIZE
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        `paginate_queryset` for async views: the same cursors and links,
+        with the page read in a worker thread.
+        """
+        return await sync_to_async(self.paginate_queryset)(queryset, request, view)
+
+
+class SubmissionCursorPagination(IdCursorPagination):
+    """
+    Keyset pagination over submissions in the order they were made.
+    """
+    ordering = 'created_at'
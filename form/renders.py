@@ -1,7 +1,12 @@
-from rest_framework.renderers import JSONRenderer
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from .metrics import timed
 
 class CustomRenderer(JSONRenderer):
     def render(self, data, accepted_media_type=None, renderer_context=None):
+        with timed('render'):
+            return self._render(data, accepted_media_type, renderer_context)
+
+    def _render(self, data, accepted_media_type=None, renderer_context=None):
         status_code = renderer_context['response'].status_code
         response = {
             "success": True,
@@ -25,4 +30,32 @@ class CustomRenderer(JSONRenderer):
             except:
                 error_message =''
             response["message"] = error_message
-        return super(CustomRenderer,self).render(response,accepted_media_type,renderer_context)
\ No newline at end of file
+        return super(CustomRenderer,self).render(response,accepted_media_type,renderer_context)
+
+
+class StreamRenderer(BaseRenderer):
+    """
+    Renderer for views that stream their own body.
+
+    It only takes part in content negotiation; successful responses are
+    `StreamingHttpResponse`s and never reach `render`, so it just has to
+    turn error payloads into text.
+    """
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if isinstance(data, dict) and 'detail' in data:
+            data = data['detail']
+        return str(data).encode(self.charset)
+
+
+class CSVRenderer(StreamRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+
+class NDJSONRenderer(StreamRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
@@ -0,0 +1,225 @@
+"""
+Read replicas.
+
+`ReplicaRouter` sends reads of this app's models (form and question
+lookups, response lists, ...) to one of the `DATABASE_REPLICAS` and every
+write to the primary. A replica is only used while it answers and trails
+the primary by at most `REPLICA_MAX_LAG` seconds; both are checked at most
+every `REPLICA_CHECK_INTERVAL` seconds per process.
+
+Lag is measured with `ReplicationHeartbeat`: `manage.py heartbeat` stamps it
+on the primary and the stamp a replica has is as old as its copy. Without
+a running heartbeat every replica that answers counts as current.
+
+Reads your own writes: a request that writes, or is not a safe method,
+reads from the primary for the rest of the request, and
+`ReplicaPinMiddleware` then sets a cookie that keeps the client's requests
+on the primary for `REPLICA_PIN_SECONDS`.
+"""
+import asyncio
+import logging
+import math
+import random
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections as default_connections
+
+from .models import ReplicationHeartbeat
+
+
+logger = logging.getLogger(__name__)
+
+PIN_COOKIE = 'db_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+_pinned = ContextVar('replica_pinned', default=False)
+_wrote = ContextVar('replica_wrote', default=False)
+
+
+def pin_to_primary():
+    """Read from the primary for the rest of the current request."""
+    _pinned.set(True)
+
+
+def is_pinned():
+    return _pinned.get()
+
+
+def _in_event_loop():
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def read_heartbeat(connection):
+    """The heartbeat stamp `connection` has, or None if there is none."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT beat FROM {ReplicationHeartbeat._meta.db_table} WHERE id = 1')
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+class ReplicaSet:
+    """
+    The replicas currently fit to serve reads.
+    """
+
+    def __init__(self, aliases, max_lag, check_interval, connections=None):
+        self.aliases = list(aliases)
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.connections = connections or default_connections
+        self.healthy = []
+        self.lags = {}
+        self.checked_at = None
+        self.lock = threading.Lock()
+
+    def available(self):
+        """
+        Healthy replicas, re-checked once `check_interval` has passed.
+
+        One thread runs the check while the others keep using the previous
+        result. Checks need a blocking connection, so they are also skipped
+        on an event loop thread; the async ORM routes from worker threads.
+        """
+        if not self.aliases:
+            return self.healthy
+        due = self.checked_at is None or time.monotonic() - self.checked_at >= self.check_interval
+        if due and not _in_event_loop() and self.lock.acquire(blocking=False):
+            try:
+                self.check()
+            finally:
+                self.lock.release()
+        return self.healthy
+
+    def check(self):
+        try:
+            primary = read_heartbeat(self.connections[DEFAULT_DB_ALIAS])
+        except DatabaseError:
+            # Replicas are still as current as the primary's last beat.
+            logger.warning("Could not read the primary's replication heartbeat", exc_info=True)
+            primary = None
+
+        healthy, lags = [], {}
+        for alias in self.aliases:
+            connection = self.connections[alias]
+            try:
+                beat = read_heartbeat(connection)
+            except DatabaseError:
+                logger.warning("Replica %s is unavailable", alias, exc_info=True)
+                connection.close()
+                continue
+            if primary is None:
+                lag = 0.0
+            elif beat is None:
+                lag = math.inf
+            else:
+                lag = max(primary - beat, 0.0)
+            lags[alias] = lag
+            if lag <= self.max_lag:
+                healthy.append(alias)
+            else:
+                logger.warning("Replica %s is %.1fs behind the primary", alias, lag)
+        self.healthy, self.lags, self.checked_at = healthy, lags, time.monotonic()
+
+
+_replica_set = None
+_replica_set_lock = threading.Lock()
+
+
+def get_replica_set():
+    global _replica_set
+    with _replica_set_lock:
+        if _replica_set is None:
+            _replica_set = ReplicaSet(
+                settings.DATABASE_REPLICAS, settings.REPLICA_MAX_LAG, settings.REPLICA_CHECK_INTERVAL,
+            )
+    return _replica_set
+
+
+class ReplicaRouter:
+    app_label = 'form'
+
+    def __init__(self, replica_set=None):
+        self.replica_set = replica_set
+
+    def replicas(self):
+        return (self.replica_set or get_replica_set()).available()
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label != self.app_label or _pinned.get():
+            return None
+        replicas = self.replicas()
+        return random.choice(replicas) if replicas else None
+
+    def db_for_write(self, model, **hints):
+        # Anything read after a write in this request must see it.
+        _pinned.set(True)
+        _wrote.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema through replication.
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+class ReplicaPinMiddleware:
+    """
+    Pins requests to the primary: unsafe methods and clients holding the
+    pin cookie from the start, anything else from its first write. A
+    request that wrote (re)sets the cookie for REPLICA_PIN_SECONDS.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        tokens = _pinned.set(self.pinned(request)), _wrote.set(False)
+        try:
+            response = self.get_response(request)
+            wrote = _wrote.get()
+        finally:
+            self.reset(tokens)
+        return self.finish(response, wrote)
+
+    async def __acall__(self, request):
+        # sync_to_async copies context changes of sync views back here.
+        tokens = _pinned.set(self.pinned(request)), _wrote.set(False)
+        try:
+            response = await self.get_response(request)
+            wrote = _wrote.get()
+        finally:
+            self.reset(tokens)
+        return self.finish(response, wrote)
+
+    def pinned(self, request):
+        return request.method not in SAFE_METHODS or PIN_COOKIE in request.COOKIES
+
+    def reset(self, tokens):
+        pinned, wrote = tokens
+        _pinned.reset(pinned)
+        _wrote.reset(wrote)
+
+    def finish(self, response, wrote):
+        if wrote:
+            response.set_cookie(PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS,
+                                httponly=True, samesite='Lax')
+        return response
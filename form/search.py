@@ -0,0 +1,151 @@
+"""
+Full-text search over answers.
+
+On SQLite with FTS5, `form_formresponse_fts` is an external-content FTS5
+index over `FormResponse.answer`, kept in sync by triggers on insert,
+update and delete, so searches are index lookups ranked by bm25 instead of
+`LIKE '%term%'` scans. Elsewhere searches fall back to `icontains`.
+"""
+from django.db import connection as default_connection
+
+FTS_TABLE = 'form_formresponse_fts'
+
+CREATE_TABLE = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+    answer, content='form_formresponse', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+)
+"""
+
+CREATE_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON form_formresponse BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, answer) VALUES (new.id, new.answer);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON form_formresponse BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, answer) VALUES ('delete', old.id, old.answer);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF answer ON form_formresponse BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, answer) VALUES ('delete', old.id, old.answer);
+        INSERT INTO {FTS_TABLE}(rowid, answer) VALUES (new.id, new.answer);
+    END
+    """,
+]
+
+DROP = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def fts5_supported(connection):
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        if cursor.fetchone()[0]:
+            return True
+        # Some builds load FTS5 without advertising the compile option.
+        try:
+            cursor.execute("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x)")
+            cursor.execute("DROP TABLE temp.fts5_probe")
+        except Exception:
+            return False
+    return True
+
+
+def index_exists(connection):
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+        return cursor.fetchone() is not None
+
+
+def install_answer_index(connection, rebuild=False):
+    """
+    Create the FTS5 index and its triggers if the database supports them.
+
+    `rebuild` repopulates the index from the responses table.
+    """
+    if not fts5_supported(connection):
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(CREATE_TABLE)
+        for statement in CREATE_TRIGGERS:
+            cursor.execute(statement)
+        if rebuild:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    return True
+
+
+def drop_answer_index(connection):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for statement in DROP:
+            cursor.execute(statement)
+
+
+def restore_triggers(sender, using, **kwargs):
+    """
+    post_migrate handler.
+
+    SQLite migrations that rebuild `form_formresponse` drop its triggers;
+    put them back whenever the index exists.
+    """
+    from django.db import connections
+
+    connection = connections[using]
+    if index_exists(connection):
+        with connection.cursor() as cursor:
+            for statement in CREATE_TRIGGERS:
+                cursor.execute(statement)
+
+
+def match_expression(query, prefix=False):
+    """
+    Turn free text into an FTS5 query: every word must match, quoted so
+    user input cannot inject FTS5 syntax. With `prefix`, words also match
+    as prefixes.
+    """
+    terms = ['"{}"'.format(term.replace('"', '""')) for term in query.split()]
+    if prefix:
+        terms = [term + '*' for term in terms]
+    return ' '.join(terms)
+
+
+def search_answers(form_id, query, prefix=False, question_id=None, limit=50, offset=0, connection=None):
+    """
+    Return up to `limit` ids of a form's answers matching `query`, best
+    match first, or None when the FTS5 index is not available.
+    """
+    connection = connection or default_connection
+    if not query.split() or not index_exists(connection):
+        return None
+    sql = (
+        f"SELECT r.id FROM {FTS_TABLE} JOIN form_formresponse r ON r.id = {FTS_TABLE}.rowid "
+        f"WHERE {FTS_TABLE} MATCH %s AND r.form_id = %s"
+    )
+    params = [match_expression(query, prefix), form_id]
+    if question_id is not None:
+        sql += " AND r.question_id = %s"
+        params.append(question_id)
+    sql += f" ORDER BY {FTS_TABLE}.rank, r.id LIMIT %s OFFSET %s"
+    params += [limit, offset]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def matching_ids_sql(query, prefix=False):
+    """
+    `(sql, params)` selecting the ids of all answers matching `query`, for
+    use in `id__in=RawSQL(...)`.
+    """
+    return f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match_expression(query, prefix)]
@@ -1,53 +1,133 @@
 from rest_framework import serializers
-from .models import Form, Question, FormResponse
+from .metrics import TimedSerializerMixin
+from .models import Form, Question, FormResponse, Submission
+from .validators import get_validator
 
 
-class QuestionSerializer(serializers.ModelSerializer):
+class SparseFieldsMixin:
+    """
+    Accepts `fields`, the names of the subset of fields to serialize
+    (default: all of them).
+    """
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class QuestionSerializer(SparseFieldsMixin, TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Question
         fields = ['id', 'text', 'question_type', 'required', 'max_length', 'min_value', 'max_value', 'number_type']
 
 
-class FormSerializer(serializers.ModelSerializer):
+class FormSerializer(SparseFieldsMixin, TimedSerializerMixin, serializers.ModelSerializer):
+    """
+    `question_fields` selects the fields of the nested questions, like
+    `fields` does for the form.
+    """
     questions = QuestionSerializer(many=True, read_only=True)
 
     class Meta:
         model = Form
         fields = ['id', 'title', 'created_at', 'questions']
 
+    def __init__(self, *args, question_fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if question_fields is not None and 'questions' in self.fields:
+            self.fields['questions'] = QuestionSerializer(many=True, read_only=True, fields=question_fields)
+
+
+class ResponseSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    # Optional: add the answer to an existing submission instead of
+    # starting a new one.
+    submission = serializers.PrimaryKeyRelatedField(queryset=Submission.objects.all(), required=False)
 
-class ResponseSerializer(serializers.ModelSerializer):
     class Meta:
         model = FormResponse
-        fields = ['id', 'form', 'question', 'answer']  # Include all fields
-        read_only_fields = ['form']  # Make `form` field read-only
+        fields = ['id', 'form', 'submission', 'question', 'answer', 'numeric_answer']  # Include all fields
+        read_only_fields = ['form', 'numeric_answer']  # Make `form` field read-only
 
     def validate(self, data):
         question = data['question']
-        answer = data['answer']
+        form_id = self.context.get('form_id')
+        if form_id is not None and question.form_id != form_id:
+            raise serializers.ValidationError({'question': "Question does not belong to this form."})
+        submission = data.get('submission')
+        if submission is not None and submission.form_id != question.form_id:
+            raise serializers.ValidationError({'submission': "Submission does not belong to this form."})
+        data['numeric_answer'] = get_validator(question)(data['answer'])
+        return data
+
+
+class ResponseChangeSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = FormResponse
+        fields = ['sequence', 'id', 'form', 'submission', 'question', 'answer', 'numeric_answer']
+        read_only_fields = fields
+
+
+class SubmissionAnswerSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = FormResponse
+        fields = ['id', 'question', 'answer']
 
-        # Validate required questions
-        if question.required and not answer:
-            raise serializers.ValidationError(f"The question '{question.text}' is required.")
 
-        # Validate based on question type
-        if question.question_type == 'numeric_answer':
+class SubmissionSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    answers = SubmissionAnswerSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Submission
+        fields = ['id', 'form', 'token', 'created_at', 'answers']
+
+
+class AnswerSerializer(serializers.Serializer):
+    question = serializers.IntegerField()
+    answer = serializers.CharField(allow_blank=True, trim_whitespace=False)
+
+
+class FormSubmissionSerializer(TimedSerializerMixin, serializers.Serializer):
+    """
+    Validates every answer of one filling of a form in a single pass.
+
+    Expects the target form in `context['form']`, with its questions
+    already loaded, so validation never queries per answer.
+    """
+    token = serializers.CharField(max_length=64, required=False)
+    answers = AnswerSerializer(many=True)
+
+    def validate(self, data):
+        form = self.context['form']
+        questions = {question.id: question for question in form.questions.all()}
+        errors = {}
+        responses = []
+
+        answers = {}
+        for item in data['answers']:
+            question_id = item['question']
+            if question_id not in questions:
+                errors[str(question_id)] = ["Question does not belong to this form."]
+            elif question_id in answers:
+                errors[str(question_id)] = ["Question is answered more than once."]
+            else:
+                answers[question_id] = item['answer']
+
+        for question_id, question in questions.items():
+            validator = get_validator(question)
+            answer = answers.get(question_id, '')
+            if not answer and not validator.required:
+                continue  # Optional questions may be skipped
             try:
-                value = float(answer)
-                # Check for min and max value constraints
-                if question.min_value is not None and value < question.min_value:
-                    raise serializers.ValidationError(f"Answer must be at least {question.min_value}.")
-                if question.max_value is not None and value > question.max_value:
-                    raise serializers.ValidationError(f"Answer must be at most {question.max_value}.")
-                # Check for number type (integer or float)
-                if question.number_type == 'integer' and not float(value).is_integer():
-                    raise serializers.ValidationError("Answer must be an integer.")
-            except ValueError:
-                raise serializers.ValidationError("Answer must be a valid number.")
-
-        elif question.question_type in ['short_answer', 'complete_answer', 'email']:
-            # Validate the length of the answer for text-based questions
-            if len(answer) > question.max_length:
-                raise serializers.ValidationError(f"Answer cannot exceed {question.max_length} characters.")
-
-        return data       
\ No newline at end of file
+                value = validator(answer)
+            except serializers.ValidationError as exc:
+                errors[str(question_id)] = exc.detail
+            else:
+                responses.append(FormResponse(form=form, question=question, answer=answer, numeric_answer=value))
+
+        if errors:
+            raise serializers.ValidationError(errors)
+
+        data['responses'] = responses
+        return data
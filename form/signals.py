@@ -0,0 +1,45 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .caching import invalidate_form_payloads, invalidate_form_version
+from .models import Form, Question
+from .stats import rebuild_question_stats
+from .validators import invalidate_validator
+
+
+@receiver(pre_save, sender=Question)
+def question_saving(sender, instance, raw=False, **kwargs):
+    # Only numeric questions' answers are summed, into histogram buckets
+    # over min_value..max_value: changing either needs a recount.
+    instance._stats_stale = False
+    if instance.pk is not None and not raw:
+        previous = Question.objects.filter(pk=instance.pk).values_list(
+            'question_type', 'min_value', 'max_value'
+        ).first()
+        instance._stats_stale = previous is not None and previous != (
+            instance.question_type, instance.min_value, instance.max_value
+        )
+
+
+@receiver(post_save, sender=Question)
+def question_saved(sender, instance, raw=False, **kwargs):
+    if getattr(instance, '_stats_stale', False):
+        rebuild_question_stats([instance.pk])
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def question_changed(sender, instance, **kwargs):
+    invalidate_validator(instance.pk)
+    # A question change is a change of its form's definition.
+    Form.objects.filter(pk=instance.form_id).update(updated_at=timezone.now())
+    invalidate_form_version(instance.form_id)
+    invalidate_form_payloads(instance.form_id)
+
+
+@receiver(post_save, sender=Form)
+@receiver(post_delete, sender=Form)
+def form_changed(sender, instance, **kwargs):
+    invalidate_form_version(instance.pk)
+    invalidate_form_payloads(instance.pk)
@@ -0,0 +1,170 @@
+"""
+Incrementally maintained per-question answer statistics.
+
+Every insert path calls `record_answers` in the transaction that writes
+the answers, so `QuestionStats` always matches the responses table and
+reading statistics costs one row per question. Edits and deletions (API
+and admin) recount the affected questions with `rebuild_question_stats`,
+as does changing a question's type or bounds (form.signals).
+"""
+import math
+from collections import defaultdict
+
+from django.db import transaction
+
+from .models import FormResponse, Question, QuestionStats
+
+
+def _bucket(question, value):
+    low, high = question.min_value, question.max_value
+    buckets = QuestionStats.HISTOGRAM_BUCKETS
+    if low is None or high is None or high <= low:
+        return 0
+    index = int((value - low) / (high - low) * buckets)
+    return min(max(index, 0), buckets - 1)
+
+
+def _add(stats, question, answer):
+    stats.count += 1
+    if not answer.strip():
+        stats.blank_count += 1
+        return
+    if question.question_type != 'numeric_answer':
+        return
+    try:
+        value = float(answer)
+    except ValueError:
+        return  # Rows written before validation existed
+    if not math.isfinite(value):
+        return  # Likewise
+    stats.numeric_count += 1
+    stats.sum += value
+    stats.sum_squares += value * value
+    stats.min_value = value if stats.min_value is None else min(stats.min_value, value)
+    stats.max_value = value if stats.max_value is None else max(stats.max_value, value)
+    if not stats.histogram:
+        stats.histogram = [0] * QuestionStats.HISTOGRAM_BUCKETS
+    stats.histogram[_bucket(question, value)] += 1
+
+
+def record_answers(answers):
+    """
+    Fold newly inserted answers into their questions' statistics.
+
+    Must run inside the transaction that inserted `answers`, after the
+    insert: the transaction then already holds the write lock, so the
+    read-modify-write below cannot interleave with another writer.
+    """
+    by_question = defaultdict(list)
+    questions = {}
+    for answer in answers:
+        by_question[answer.question_id].append(answer.answer)
+        questions[answer.question_id] = answer.question
+    if not by_question:
+        return
+
+    with transaction.atomic(savepoint=False):
+        locked = QuestionStats.objects.select_for_update()
+        existing = locked.in_bulk(list(by_question))
+        missing = [question_id for question_id in by_question if question_id not in existing]
+        if missing:
+            # A concurrent first answer to the same question may insert the
+            # row too: keep whichever insert wins and lock that row.
+            QuestionStats.objects.bulk_create(
+                [QuestionStats(question_id=question_id) for question_id in missing], ignore_conflicts=True,
+            )
+            existing.update(locked.in_bulk(missing))
+        for question_id, values in by_question.items():
+            for value in values:
+                _add(existing[question_id], questions[question_id], value)
+        QuestionStats.objects.bulk_update(
+            list(existing.values()),
+            ['count', 'blank_count', 'numeric_count', 'min_value', 'max_value', 'sum', 'sum_squares', 'histogram'],
+        )
+
+
+def compute_stats(questions, chunk_size=2000):
+    """
+    Compute statistics for `questions` from scratch with a full scan of
+    their answers. Returns unsaved `QuestionStats` keyed by question id.
+    """
+    questions = {question.id: question for question in questions}
+    result = {question_id: QuestionStats(question_id=question_id) for question_id in questions}
+    rows = (
+        FormResponse.objects
+        .filter(question_id__in=list(questions))
+        .values_list('question_id', 'answer')
+        .iterator(chunk_size=chunk_size)
+    )
+    for question_id, answer in rows:
+        _add(result[question_id], questions[question_id], answer)
+    return result
+
+
+def rebuild_stats(questions):
+    """
+    Replace the stored statistics of `questions` with a full recount.
+    """
+    computed = compute_stats(questions)
+    with transaction.atomic():
+        QuestionStats.objects.filter(question_id__in=list(computed)).delete()
+        QuestionStats.objects.bulk_create(computed.values())
+    return computed
+
+
+def rebuild_question_stats(question_ids):
+    rebuild_stats(Question.objects.filter(id__in=question_ids))
+
+
+def stats_match(stored, computed):
+    """
+    Compare two `QuestionStats`, allowing for float rounding in sums.
+    """
+    if (stored.count, stored.blank_count, stored.numeric_count) != \
+            (computed.count, computed.blank_count, computed.numeric_count):
+        return False
+    if (stored.min_value, stored.max_value) != (computed.min_value, computed.max_value):
+        return False
+    if (stored.histogram or []) != (computed.histogram or []):
+        return False
+    return (math.isclose(stored.sum, computed.sum, rel_tol=1e-9, abs_tol=1e-9)
+            and math.isclose(stored.sum_squares, computed.sum_squares, rel_tol=1e-9, abs_tol=1e-9))
+
+
+def describe(question):
+    """
+    Serializable statistics of a question, from its (possibly missing)
+    `stats` row.
+    """
+    stats = getattr(question, 'stats', None) or QuestionStats(question=question)
+    data = {
+        'question': question.id,
+        'question_type': question.question_type,
+        'count': stats.count,
+        'blank_count': stats.blank_count,
+    }
+    if question.question_type == 'numeric_answer':
+        n = stats.numeric_count
+        mean = stats.sum / n if n else None
+        variance = max(stats.sum_squares / n - mean * mean, 0.0) if n else None
+        buckets = QuestionStats.HISTOGRAM_BUCKETS
+        histogram = stats.histogram or [0] * buckets
+        width = ((question.max_value - question.min_value) / buckets
+                 if question.min_value is not None and question.max_value is not None else None)
+        data.update({
+            'numeric_count': n,
+            'min': stats.min_value,
+            'max': stats.max_value,
+            'sum': stats.sum,
+            'mean': mean,
+            'stddev': math.sqrt(variance) if variance is not None else None,
+            'histogram': [
+                {
+                    'lower': question.min_value + index * width if width is not None else None,
+                    'upper': question.min_value + (index + 1) * width if width is not None else None,
+                    'count': count,
+                }
+                for index, count in enumerate(histogram)
+            ],
+        })
+    return data
@@ -0,0 +1,24 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """
+    Test mixin for pinning the number of SQL queries an endpoint may issue.
+
+    A budget is fixed per endpoint, independent of how many rows are
+    returned, so a serializer change that reintroduces per-row queries
+    fails loudly instead of silently slowing the API down.
+    """
+
+    def assertQueryBudget(self, budget, url, method='get', **kwargs):
+        with CaptureQueriesContext(connection) as context:
+            response = getattr(self.client, method)(url, **kwargs)
+
+        executed = [query['sql'] for query in context.captured_queries]
+        self.assertEqual(
+            len(executed), budget,
+            f"{method.upper()} {url} ran {len(executed)} queries, budget is {budget}:\n"
+            + "\n".join(executed)
+        )
+        return response
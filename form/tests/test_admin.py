@@ -0,0 +1,147 @@
+from django.contrib.auth.models import User
+from django.urls import reverse
+from django.test import TestCase
+from form.models import Form, Question, FormResponse, QuestionStats, Submission
+from form.stats import compute_stats, record_answers, stats_match
+
+
+class FormAdminTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(self.admin)
+        self.form = Form.objects.create(title="Feedback")
+        self.question = Question.objects.create(form=self.form, text="Comments?", question_type="short_answer")
+        self.submission = Submission.objects.create(form=self.form)
+
+    def add_responses(self, count):
+        FormResponse.objects.bulk_create(
+            FormResponse(form=self.form, submission=self.submission, question=self.question, answer=f"answer {i}")
+            for i in range(count)
+        )
+
+    def test_change_page_does_not_load_responses(self):
+        url = reverse('admin:form_form_change', args=[self.form.id])
+        self.add_responses(5)
+        self.client.get(url)  # Warm the content type cache
+        with self.assertNumQueries(6):
+            self.client.get(url)
+        self.add_responses(200)
+        with self.assertNumQueries(6):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, "answer 0")
+        self.assertContains(response, reverse('admin:form_form_responses', args=[self.form.id]))
+
+    def test_responses_panel_pages(self):
+        self.add_responses(60)
+        url = reverse('admin:form_form_responses', args=[self.form.id])
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertContains(first, "<tr>", count=50)
+        after = first['X-Next-After']
+        second = self.client.get(url, {'after': after})
+        self.assertContains(second, "<tr>", count=10)
+        self.assertContains(second, "answer 59")
+        self.assertNotIn('X-Next-After', second)
+
+    def test_responses_panel_requires_permission(self):
+        staff = User.objects.create_user('staff', password='password', is_staff=True)
+        self.client.force_login(staff)
+        response = self.client.get(reverse('admin:form_form_responses', args=[self.form.id]))
+        self.assertEqual(response.status_code, 403)
+
+    def test_response_change_page_does_not_list_related_objects(self):
+        Submission.objects.bulk_create(Submission(form=self.form) for _ in range(100))
+        self.add_responses(1)
+        response = self.client.get(
+            reverse('admin:form_formresponse_change', args=[FormResponse.objects.get().id])
+        )
+        self.assertEqual(response.status_code, 200)
+        # Only the selected form, question and submission
+        self.assertContains(response, "<option", count=3)
+
+    def test_autocomplete_filter(self):
+        self.add_responses(2)
+        other = Form.objects.create(title="Other")
+        question = Question.objects.create(form=other, text="Other?", question_type="short_answer")
+        FormResponse.objects.create(
+            form=other, submission=Submission.objects.create(form=other), question=question, answer="elsewhere"
+        )
+        url = reverse('admin:form_formresponse_changelist')
+        response = self.client.get(url, {'form__id__exact': other.id})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['cl'].result_list.values_list('answer', flat=True)), ["elsewhere"])
+        self.assertContains(response, 'data-parameter="form__id__exact"')
+        self.assertContains(response, 'admin/js/autocomplete.js')
+
+
+class StatsAdminTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(self.admin)
+        self.form = Form.objects.create(title="Survey")
+        self.age = Question.objects.create(
+            form=self.form, text="Age?", question_type="numeric_answer", number_type="float",
+            min_value=0, max_value=120,
+        )
+        self.name = Question.objects.create(form=self.form, text="Name?", question_type="short_answer")
+        self.submission = Submission.objects.create(form=self.form)
+        answers = FormResponse.objects.bulk_create([
+            FormResponse(form=self.form, submission=self.submission, question=self.age, answer="30", numeric_answer=30),
+            FormResponse(form=self.form, submission=self.submission, question=self.name, answer="Jane"),
+        ])
+        record_answers(answers)
+        self.answer = answers[0]
+
+    def assertStatsMatch(self):
+        computed = compute_stats([self.age, self.name])
+        for question_id, expected in computed.items():
+            stored = QuestionStats.objects.filter(question_id=question_id).first() or QuestionStats()
+            self.assertTrue(stats_match(stored, expected), f"Statistics of question {question_id} are stale")
+
+    def post_answer(self, url, question, answer):
+        return self.client.post(url, {
+            'form': self.form.id, 'submission': self.submission.id, 'question': question.id, 'answer': answer,
+        })
+
+    def test_add(self):
+        response = self.post_answer(reverse('admin:form_formresponse_add'), self.age, "40")
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(FormResponse.objects.latest('id').numeric_answer, 40)
+        self.assertStatsMatch()
+
+    def test_invalid_answer(self):
+        response = self.post_answer(reverse('admin:form_formresponse_add'), self.age, "nan")
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "valid number")
+        self.assertEqual(FormResponse.objects.count(), 2)
+
+    def test_change(self):
+        url = reverse('admin:form_formresponse_change', args=[self.answer.id])
+        response = self.post_answer(url, self.name, "Thirty")
+        self.assertEqual(response.status_code, 302)
+        self.assertStatsMatch()
+
+    def test_delete_response(self):
+        self.client.post(reverse('admin:form_formresponse_delete', args=[self.answer.id]), {'post': 'yes'})
+        self.assertFalse(FormResponse.objects.filter(pk=self.answer.id).exists())
+        self.assertStatsMatch()
+
+    def test_delete_selected_responses(self):
+        self.client.post(reverse('admin:form_formresponse_changelist'), {
+            'action': 'delete_selected', '_selected_action': [self.answer.id], 'post': 'yes',
+        })
+        self.assertFalse(FormResponse.objects.filter(pk=self.answer.id).exists())
+        self.assertStatsMatch()
+
+    def test_delete_submission(self):
+        self.client.post(reverse('admin:form_submission_delete', args=[self.submission.id]), {'post': 'yes'})
+        self.assertFalse(FormResponse.objects.exists())
+        self.assertStatsMatch()
+
+    def test_delete_selected_submissions(self):
+        self.client.post(reverse('admin:form_submission_changelist'), {
+            'action': 'delete_selected', '_selected_action': [self.submission.id], 'post': 'yes',
+        })
+        self.assertFalse(FormResponse.objects.exists())
+        self.assertStatsMatch()
@@ -0,0 +1,134 @@
+import gzip
+import json
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import AsyncClient, TestCase, override_settings
+from django.urls import reverse
+from form import ingestion
+from form.caching import payload_cache_stats
+from form.ingestion import IngestionQueue
+from form.models import Form, Question, FormResponse, Submission
+
+
+class AsyncFormViewTests(TestCase):
+    def setUp(self):
+        caches['forms'].clear()
+        self.form = Form.objects.create(title="Sample Form")
+        self.name = Question.objects.create(form=self.form, text="Name?", question_type="short_answer", required=True)
+        self.age = Question.objects.create(
+            form=self.form, text="Age?", question_type="numeric_answer", number_type="integer",
+            min_value=0, max_value=120,
+        )
+
+    async def test_detail_matches_sync_view(self):
+        response = await self.async_client.get(reverse('async-form-detail', args=[self.form.id]))
+        self.assertEqual(response.status_code, 200)
+        sync = await self.async_client.get(reverse('form-detail', args=[self.form.id]))
+        self.assertEqual(response.content, sync.content)
+        self.assertEqual(response['ETag'], sync['ETag'])
+
+    async def test_queries_are_timed(self):
+        response = await self.async_client.get(reverse('async-form-detail', args=[self.form.id]))
+        self.assertRegex(response['Server-Timing'], r'db;dur=[\d.]+;desc="[1-9]\d* queries"')
+
+    async def test_detail_is_served_from_cache(self):
+        url = reverse('async-form-detail', args=[self.form.id])
+        await self.async_client.get(url)
+        hits = payload_cache_stats()['hits']
+        response = await self.async_client.get(url)
+        self.assertEqual(payload_cache_stats()['hits'], hits + 1)
+        self.assertEqual(json.loads(response.content)['data']['title'], "Sample Form")
+
+    @override_settings(GZIP_MIN_SIZE=100)
+    async def test_detail_shares_the_gzipped_payload(self):
+        await self.async_client.get(reverse('form-detail', args=[self.form.id]))
+        with mock.patch('gzip.compress') as compress:
+            response = await self.async_client.get(
+                reverse('async-form-detail', args=[self.form.id]), headers={'Accept-Encoding': 'gzip'},
+            )
+        compress.assert_not_called()
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(json.loads(gzip.decompress(response.content))['data']['title'], "Sample Form")
+
+    async def test_conditional_get(self):
+        url = reverse('async-form-detail', args=[self.form.id])
+        etag = (await self.async_client.get(url))['ETag']
+        response = await self.async_client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+
+    async def test_missing_form(self):
+        response = await self.async_client.get(reverse('async-form-detail', args=[0]))
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(json.loads(response.content)['success'])
+
+    async def test_questions_pages(self):
+        url = reverse('async-form-questions', args=[self.form.id])
+        first = json.loads((await self.async_client.get(url, {'page_size': 1})).content)['data']
+        self.assertEqual([question['id'] for question in first['results']], [self.name.id])
+        self.assertIsNone(first['previous'])
+
+        second = json.loads((await self.async_client.get(first['next'])).content)['data']
+        self.assertEqual([question['id'] for question in second['results']], [self.age.id])
+        self.assertIsNone(second['next'])
+
+        back = json.loads((await self.async_client.get(second['previous'])).content)['data']
+        self.assertEqual([question['id'] for question in back['results']], [self.name.id])
+
+    async def test_questions_match_sync_view(self):
+        response = await self.async_client.get(reverse('async-form-questions', args=[self.form.id]))
+        sync = await self.async_client.get(reverse('form-get-questions', args=[self.form.id]))
+        self.assertEqual(json.loads(response.content), json.loads(sync.content))
+
+    async def test_invalid_cursor(self):
+        url = reverse('async-form-questions', args=[self.form.id])
+        response = await self.async_client.get(url, {'cursor': 'nonsense'})
+        self.assertEqual(response.status_code, 404)
+
+    async def test_submit(self):
+        url = reverse('async-form-submit', args=[self.form.id])
+        body = {'answers': [{'question': self.name.id, 'answer': "Jane"}, {'question': self.age.id, 'answer': "30"}]}
+        response = await self.async_client.post(url, body, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        data = json.loads(response.content)['data']
+        self.assertEqual([answer['answer'] for answer in data['answers']], ["Jane", "30"])
+        self.assertEqual(await FormResponse.objects.filter(submission_id=data['id']).acount(), 2)
+
+    async def test_submit_checks_csrf_of_logged_in_users(self):
+        url = reverse('async-form-submit', args=[self.form.id])
+        body = {'answers': [{'question': self.name.id, 'answer': "Jane"}]}
+        client = AsyncClient(enforce_csrf_checks=True)
+        response = await client.post(url, body, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+
+        await client.aforce_login(await User.objects.acreate_user('staff', is_staff=True))
+        response = await client.post(url, body, content_type='application/json')
+        self.assertEqual(response.status_code, 403)
+        self.assertIn("CSRF Failed", json.loads(response.content)['message'])
+        self.assertEqual(await Submission.objects.acount(), 1)
+
+    async def test_submit_validation_error(self):
+        url = reverse('async-form-submit', args=[self.form.id])
+        body = {'answers': [{'question': self.age.id, 'answer': "300"}]}
+        response = await self.async_client.post(url, body, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(json.loads(response.content)['message'], "The question 'Name?' is required.")
+        self.assertFalse(await Submission.objects.aexists())
+
+    async def test_submit_malformed_body(self):
+        url = reverse('async-form-submit', args=[self.form.id])
+        response = await self.async_client.post(url, "{", content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(INGESTION_MODE='queue')
+    async def test_submit_is_queued(self):
+        queue = IngestionQueue(maxsize=1, batch_size=10, flush_interval=0.01, put_timeout=0)
+        with mock.patch.object(ingestion, '_queue', queue):
+            url = reverse('async-form-submit', args=[self.form.id])
+            response = await self.async_client.post(
+                url, {'answers': [{'question': self.name.id, 'answer': "Jane"}]}, content_type='application/json',
+            )
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(queue.qsize(), 1)
+        self.assertFalse(await Submission.objects.aexists())
@@ -0,0 +1,39 @@
+from django.test import TestCase
+from form.benchmarks import SCENARIOS, compare, load_dataset, run_scenario, seed, summarize
+from form.models import Form, FormResponse, QuestionStats, Submission
+
+
+class BenchmarkTests(TestCase):
+    def setUp(self):
+        self.dataset = seed(forms=3, questions=20, responses=12)
+
+    def test_seed(self):
+        self.assertEqual(Form.objects.count(), 5)
+        self.assertEqual(FormResponse.objects.filter(form_id=self.dataset.busy_form).count(), 12)
+        self.assertEqual(Submission.objects.filter(form_id=self.dataset.busy_form).count(), 3)
+        self.assertEqual(QuestionStats.objects.get(question=self.dataset.busy_questions[0]).count, 3)
+        self.assertEqual(self.dataset.describe(), {'forms': 5, 'large_form_questions': 20, 'responses': 12})
+
+    def test_seed_reuses_existing_dataset(self):
+        self.assertEqual(load_dataset().busy_form, self.dataset.busy_form)
+        seed(forms=3, questions=20, responses=12)
+        self.assertEqual(Form.objects.count(), 5)
+
+    def test_scenarios_succeed(self):
+        for name, scenario in SCENARIOS.items():
+            samples, elapsed = run_scenario(scenario, self.dataset, requests=3, concurrency=1, warmup=0)
+            result = summarize(name, samples, elapsed, 1)
+            self.assertEqual(result['requests'], 3)
+            self.assertEqual(result['errors'], 0, name)
+            self.assertIsNotNone(result['queries']['mean'])
+            self.assertLessEqual(result['latency_ms']['p50'], result['latency_ms']['p99'])
+
+    def test_compare(self):
+        def report(p95, throughput):
+            latency = {'p50': 1.0, 'p95': p95, 'p99': 5.0}
+            return {'results': [{'scenario': 'form-list', 'latency_ms': latency, 'throughput': throughput,
+                                 'queries': {'mean': 2}}]}
+
+        rows = compare(report(2.0, 100), report(3.0, 95), tolerance=0.1)
+        regressed = {metric for _, metric, _, _, _, flag in rows if flag}
+        self.assertEqual(regressed, {'p95'})
@@ -0,0 +1,98 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.utils import ConnectionHandler
+from django.test import TestCase
+from config.database import cache_key_prefix, database_config
+
+
+def connect(config):
+    connection = ConnectionHandler({'default': {}, 'profile': config})['profile']
+    connection.ensure_connection()
+    return connection
+
+
+# TestCase rather than SimpleTestCase only so that connecting is allowed.
+class SQLiteProfileTests(TestCase):
+    def test_config(self):
+        config = database_config({'SQLITE_BUSY_TIMEOUT': '2'}, base_dir=Path('/srv'))
+        self.assertEqual(config['ENGINE'], 'django.db.backends.sqlite3')
+        self.assertEqual(config['NAME'], Path('/srv/db.sqlite3'))
+        self.assertEqual(config['OPTIONS']['timeout'], 2.0)
+        self.assertEqual(config['OPTIONS']['transaction_mode'], 'IMMEDIATE')
+        self.assertEqual(config['CONN_MAX_AGE'], 60)
+        self.assertTrue(config['CONN_HEALTH_CHECKS'])
+
+    def test_pragmas_are_applied_on_connect(self):
+        with tempfile.TemporaryDirectory() as directory:
+            env = {'SQLITE_PATH': os.path.join(directory, 'db.sqlite3'), 'SQLITE_CACHE_SIZE': '1024'}
+            connection = connect(database_config(env))
+            try:
+                with connection.cursor() as cursor:
+                    pragmas = {}
+                    for pragma in ('journal_mode', 'synchronous', 'busy_timeout', 'mmap_size', 'cache_size'):
+                        cursor.execute(f'PRAGMA {pragma}')
+                        pragmas[pragma] = cursor.fetchone()[0]
+            finally:
+                connection.close()
+        self.assertEqual(pragmas, {
+            'journal_mode': 'wal',
+            'synchronous': 1,  # NORMAL
+            'busy_timeout': 5000,
+            'mmap_size': 256 * 1024 * 1024,
+            'cache_size': -1024,
+        })
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ImproperlyConfigured):
+            database_config({'DB_ENGINE': 'oracle'})
+
+    def test_cache_key_prefix_names_the_database(self):
+        project = database_config({}, base_dir=Path('/srv'))
+        bench = database_config({'SQLITE_PATH': '/srv/bench.sqlite3'})
+        self.assertEqual(cache_key_prefix(project), cache_key_prefix(database_config({}, base_dir=Path('/srv'))))
+        self.assertNotEqual(cache_key_prefix(project), cache_key_prefix(bench))
+
+
+POSTGRES = {
+    'DB_ENGINE': 'postgresql',
+    'POSTGRES_DB': os.environ.get('POSTGRES_DB', 'postgres'),
+    'POSTGRES_USER': os.environ.get('POSTGRES_USER', 'postgres'),
+    'POSTGRES_PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+    'POSTGRES_HOST': os.environ.get('POSTGRES_HOST', ''),
+    'POSTGRES_PORT': os.environ.get('POSTGRES_PORT', '5432'),
+}
+
+
+class PostgreSQLProfileTests(TestCase):
+    def test_config(self):
+        config = database_config({**POSTGRES, 'POSTGRES_HOST': 'db', 'DB_CONN_MAX_AGE': '30'})
+        self.assertEqual(config['ENGINE'], 'django.db.backends.postgresql')
+        self.assertEqual(config['HOST'], 'db')
+        self.assertEqual(config['OPTIONS'], {})
+        self.assertEqual(config['CONN_MAX_AGE'], 30)
+
+    def test_pool(self):
+        config = database_config({**POSTGRES, 'DB_POOL': '1', 'DB_POOL_MAX_SIZE': '4'})
+        self.assertEqual(config['OPTIONS']['pool'], {'min_size': 2, 'max_size': 4})
+        # Django does not allow persistent connections with its pool.
+        self.assertEqual(config['CONN_MAX_AGE'], 0)
+        self.assertFalse(config['CONN_HEALTH_CHECKS'])
+
+    def test_pgbouncer(self):
+        self.assertTrue(database_config({**POSTGRES, 'DB_PGBOUNCER': '1'})['DISABLE_SERVER_SIDE_CURSORS'])
+
+    @unittest.skipUnless(POSTGRES['POSTGRES_HOST'], "POSTGRES_HOST is not set")
+    def test_pooled_connection(self):
+        connection = connect(database_config({**POSTGRES, 'DB_POOL': '1'}))
+        try:
+            self.assertIsNotNone(connection.pool)
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+                self.assertEqual(cursor.fetchone(), (1,))
+        finally:
+            connection.close()
+            connection.close_pool()
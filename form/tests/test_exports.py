@@ -0,0 +1,73 @@
+import csv
+import io
+import json
+
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from form.models import Form, Question, FormResponse, Submission
+
+
+class ExportTests(APITestCase):
+    def setUp(self):
+        self.form = Form.objects.create(title="Sample Form")
+        self.name = Question.objects.create(form=self.form, text="Name?", question_type="short_answer")
+        self.bio = Question.objects.create(form=self.form, text="Bio?", question_type="complete_answer")
+        self.first = Submission.objects.create(form=self.form, token="first")
+        self.second = Submission.objects.create(form=self.form, token="second")
+        FormResponse.objects.create(form=self.form, submission=self.first, question=self.name, answer="Jane")
+        FormResponse.objects.create(form=self.form, submission=self.second, question=self.name, answer="John")
+        FormResponse.objects.create(
+            form=self.form, submission=self.first, question=self.bio, answer="Line one\nline, two"
+        )
+        other_form = Form.objects.create(title="Other Form")
+        other = Question.objects.create(form=other_form, text="Other?", question_type="short_answer")
+        FormResponse.objects.create(
+            form=other_form, submission=Submission.objects.create(form=other_form), question=other, answer="Elsewhere"
+        )
+        self.url = reverse('form-export', args=[self.form.id])
+
+    def test_csv_export(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertTrue(response['Content-Type'].startswith('text/csv'))
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(rows, [
+            ['submission_id', 'submitted_at', 'token', "Name?", "Bio?"],
+            [str(self.first.id), self.first.created_at.isoformat(), "first", "Jane", "Line one\nline, two"],
+            [str(self.second.id), self.second.created_at.isoformat(), "second", "John", ""],
+        ])
+
+    def test_ndjson_export(self):
+        response = self.client.get(self.url, {'format': 'ndjson'})
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        lines = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([line['submission'] for line in lines], [self.first.id, self.second.id])
+        self.assertEqual(lines[0]['answers'], {str(self.name.id): "Jane", str(self.bio.id): "Line one\nline, two"})
+
+    def test_export_query_count_is_constant(self):
+        for index in range(10):
+            submission = Submission.objects.create(form=self.form)
+            FormResponse.objects.create(form=self.form, submission=submission, question=self.name, answer=f"N{index}")
+        response = self.client.get(self.url)
+        # questions and responses; the form is loaded before streaming starts
+        with self.assertNumQueries(2):
+            rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(len(rows), 13)
+
+    def test_missing_form(self):
+        response = self.client.get(reverse('form-export', args=[self.form.id + 100]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_export_command(self):
+        out = io.StringIO()
+        call_command('export_responses', self.form.id, '--format', 'ndjson', stdout=out, stderr=io.StringIO())
+        self.assertEqual(len(out.getvalue().splitlines()), 2)
+
+    def test_export_command_reports_rows_written(self):
+        Submission.objects.create(form=self.form)  # No answers, so no row
+        err = io.StringIO()
+        call_command('export_responses', self.form.id, stdout=io.StringIO(), stderr=err)
+        self.assertIn("Exported 2 submissions", err.getvalue())
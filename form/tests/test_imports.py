@@ -0,0 +1,272 @@
+import csv
+import io
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import serializers, status
+from rest_framework.test import APITestCase
+from form.imports import RESPONSE_COLUMNS, ResponseImporter, import_forms, read_definitions, validate_definitions
+from form.ingestion import save_submissions
+from form.models import Form, FormResponse, Question, QuestionStats, ResponseImport, Submission
+
+
+FEEDBACK = {'title': "Feedback", 'questions': [
+    {'text': "Name?", 'question_type': 'short_answer', 'required': True},
+    {'text': "Age?", 'question_type': 'numeric_answer', 'number_type': 'integer', 'min_value': 0, 'max_value': 120},
+]}
+SURVEY = {'title': "Survey", 'questions': [{'text': "Email?", 'question_type': 'email', 'max_length': 100}]}
+
+
+class ImportFormsTests(TestCase):
+    def test_read_json_and_ndjson(self):
+        self.assertEqual(read_definitions([json.dumps(FEEDBACK)]), [FEEDBACK])
+        self.assertEqual(read_definitions(json.dumps([FEEDBACK, SURVEY], indent=2).splitlines(True)),
+                         [FEEDBACK, SURVEY])
+        self.assertEqual(read_definitions([json.dumps(FEEDBACK) + '\n', '\n', json.dumps(SURVEY) + '\n']),
+                         [FEEDBACK, SURVEY])
+        with self.assertRaisesMessage(ValueError, 'line 2'):
+            read_definitions([json.dumps(FEEDBACK) + '\n', '{"title":\n'])
+
+    def test_import_creates_everything_in_bulk(self):
+        large = {'title': "Large", 'questions': [
+            {'text': f"Question {i}?", 'question_type': 'short_answer'} for i in range(100)
+        ]}
+        # Two bulk inserts inside a savepoint (SQLite splits larger ones at
+        # 999 parameters).
+        with self.assertNumQueries(4):
+            forms = import_forms([FEEDBACK, SURVEY, large])
+
+        self.assertEqual([form.title for form in forms], ["Feedback", "Survey", "Large"])
+        self.assertEqual(Question.objects.filter(form=forms[2]).count(), 100)
+        name, age = Question.objects.filter(form=forms[0]).order_by('id')
+        self.assertTrue(name.required)
+        # Question.clean's default
+        self.assertEqual(name.max_length, 200)
+        self.assertEqual((age.number_type, age.min_value, age.max_value), ('integer', 0, 120))
+        self.assertIsNotNone(forms[0].updated_at)
+
+    def test_all_errors_are_reported(self):
+        definitions = [
+            FEEDBACK,
+            {'title': "", 'questions': [
+                {'text': "Too long?", 'question_type': 'short_answer', 'max_length': 500},
+                {'text': "Number?", 'question_type': 'numeric_answer', 'number_type': 'integer'},
+                {'text': "Range?", 'question_type': 'numeric_answer', 'number_type': 'float',
+                 'min_value': 5, 'max_value': 1},
+                {'text': "Kind?", 'question_type': 'date', 'colour': 'red'},
+            ]},
+            "not a form",
+        ]
+        with self.assertNumQueries(0), self.assertRaises(serializers.ValidationError) as raised:
+            validate_definitions(definitions)
+
+        errors = raised.exception.detail
+        self.assertEqual(set(errors), {'1', '2'})
+        self.assertIn('title', errors['1'])
+        questions = errors['1']['questions']
+        self.assertEqual(set(questions), {'0', '1', '2', '3'})
+        self.assertIn('max_length', questions['0'])
+        self.assertIn('non_field_errors', questions['1'])
+        self.assertEqual(questions['2']['non_field_errors'], ["min_value cannot be greater than max_value."])
+        self.assertEqual(set(questions['3']), {'question_type', 'colour'})
+        self.assertIn('non_field_errors', errors['2'])
+
+    def test_invalid_import_writes_nothing(self):
+        with self.assertRaises(serializers.ValidationError):
+            import_forms([FEEDBACK, {'title': "Broken", 'questions': [{'text': "?", 'question_type': 'date'}]}])
+        self.assertFalse(Form.objects.exists())
+
+
+class ImportFormsAPITests(APITestCase):
+    def setUp(self):
+        self.url = reverse('form-import')
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+
+    def test_requires_admin(self):
+        response = self.client.post(self.url, FEEDBACK, format='json')
+        self.assertIn(response.status_code, (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN))
+        self.assertFalse(Form.objects.exists())
+
+    def test_json_import(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.post(self.url, FEEDBACK, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        form = Form.objects.get()
+        self.assertEqual(response.data, [{'id': form.id, 'title': "Feedback", 'questions': 2}])
+
+    def test_ndjson_import(self):
+        self.client.force_authenticate(self.admin)
+        body = '\n'.join(json.dumps(definition) for definition in (FEEDBACK, SURVEY))
+        response = self.client.post(self.url, body, content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([item['questions'] for item in response.data], [2, 1])
+        self.assertEqual(Question.objects.count(), 3)
+
+    def test_errors(self):
+        self.client.force_authenticate(self.admin)
+        broken = {'title': "Broken", 'questions': [{'text': "?", 'question_type': 'email', 'max_length': 1000}]}
+        response = self.client.post(self.url, [FEEDBACK, broken], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('max_length', response.data['1']['questions']['0'])
+        self.assertFalse(Form.objects.exists())
+
+        response = self.client.post(self.url, '{"title": ', content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ImportFormsCommandTests(APITestCase):
+    def write(self, definitions):
+        fd, path = tempfile.mkstemp(suffix='.ndjson')
+        self.addCleanup(os.remove, path)
+        with os.fdopen(fd, 'w') as f:
+            f.write('\n'.join(json.dumps(definition) for definition in definitions))
+        return path
+
+    def test_import(self):
+        stdout = io.StringIO()
+        call_command('import_forms', self.write([FEEDBACK, SURVEY]), stdout=stdout)
+        self.assertIn("Imported 2 forms and 3 questions", stdout.getvalue())
+        self.assertEqual(Form.objects.count(), 2)
+
+    def test_check(self):
+        call_command('import_forms', self.write([FEEDBACK]), '--check', stdout=io.StringIO())
+        self.assertFalse(Form.objects.exists())
+
+    def test_errors(self):
+        stderr = io.StringIO()
+        path = self.write([FEEDBACK, {'title': "", 'questions': [{'text': "?", 'question_type': 'date'}]}])
+        with self.assertRaisesMessage(CommandError, "2 errors"):
+            call_command('import_forms', path, stdout=io.StringIO(), stderr=stderr)
+        self.assertIn("1.questions.0.question_type:", stderr.getvalue())
+        self.assertFalse(Form.objects.exists())
+
+
+class ImportResponsesTests(TestCase):
+    def setUp(self):
+        self.form = Form.objects.create(title="Legacy")
+        self.name = Question.objects.create(form=self.form, text="Name?", question_type="short_answer",
+                                            required=True)
+        self.age = Question.objects.create(form=self.form, text="Age?", question_type="numeric_answer",
+                                           number_type="integer", min_value=0, max_value=120)
+        other = Form.objects.create(title="Other")
+        self.other = Question.objects.create(form=other, text="Other?", question_type="short_answer")
+
+    def rows(self, submission, name, age, **extra):
+        return [
+            {'form': self.form.id, 'question': self.name.id, 'answer': name, 'submission': submission, **extra},
+            {'form': self.form.id, 'question': self.age.id, 'answer': age, 'submission': submission, **extra},
+        ]
+
+    def write(self, rows, format='csv'):
+        fd, path = tempfile.mkstemp(suffix=f'.{format}')
+        self.addCleanup(os.remove, path)
+        for suffix in (f'.errors.{format}',):
+            self.addCleanup(lambda p=path + suffix: os.path.exists(p) and os.remove(p))
+        with os.fdopen(fd, 'w', newline='') as f:
+            if format == 'csv':
+                writer = csv.DictWriter(f, RESPONSE_COLUMNS, extrasaction='ignore')
+                writer.writeheader()
+                writer.writerows(rows)
+            else:
+                f.write('\n'.join(row if isinstance(row, str) else json.dumps(row) for row in rows))
+        return path
+
+    def test_rows_are_validated_like_the_api(self):
+        importer = ResponseImporter(ResponseImport(name='test'))
+        valid, errors = importer.validate({'form': str(self.form.id), 'question': str(self.age.id), 'answer': '42'})
+        self.assertEqual((valid.numeric_answer, errors), (42.0, {}))
+        cases = [
+            ({'form': self.form.id, 'question': self.age.id, 'answer': '200'}, 'answer'),
+            ({'form': self.form.id, 'question': self.name.id, 'answer': ''}, 'answer'),
+            ({'form': self.form.id, 'question': self.other.id, 'answer': 'x'}, 'question'),
+            ({'form': 999999, 'question': self.name.id, 'answer': 'x'}, 'form'),
+            ({'form': 'x', 'question': self.name.id, 'answer': 'x'}, 'form'),
+            ({'form': self.form.id, 'question': self.name.id}, 'answer'),
+            ({'form': self.form.id, 'question': self.name.id, 'answer': 'x', 'submitted_at': 'yesterday'},
+             'submitted_at'),
+            ('{"form": ', 'non_field_errors'),
+        ]
+        for row, field in cases:
+            answer, errors = importer.validate(row)
+            self.assertIsNone(answer, row)
+            self.assertIn(field, errors, row)
+
+    def test_import_csv(self):
+        rows = (
+            self.rows('legacy-1', 'Jane', '30', submitted_at='2020-01-02T03:04:05+00:00', token='jane')
+            + self.rows('legacy-2', 'John', '999')
+            + [{'form': self.form.id, 'question': self.name.id, 'answer': 'Solo'}]
+        )
+        stdout = io.StringIO()
+        path = self.write(rows)
+        call_command('import_responses', path, '--chunk-size', '2', stdout=stdout, stderr=io.StringIO())
+
+        submissions = list(Submission.objects.filter(form=self.form).order_by('id'))
+        self.assertEqual(len(submissions), 3)
+        self.assertEqual(submissions[0].token, 'jane')
+        self.assertEqual(submissions[0].created_at.year, 2020)
+        self.assertEqual(
+            list(submissions[0].answers.order_by('id').values_list('answer', 'numeric_answer')),
+            [('Jane', None), ('30', 30.0)],
+        )
+        # The rejected age does not take its submission's valid name with it.
+        self.assertEqual(list(submissions[1].answers.values_list('answer', flat=True)), ['John'])
+        self.assertEqual(QuestionStats.objects.get(question=self.name).count, 3)
+
+        with open(f'{path}.errors.csv', newline='') as f:
+            errors = list(csv.DictReader(f))
+        self.assertEqual([error['row'] for error in errors], ['4'])
+        self.assertIn('at most 120', errors[0]['errors'])
+        self.assertEqual(ResponseImport.objects.get().rows, 5)
+        self.assertIn("4 imported and 1 rejected in total", stdout.getvalue())
+
+    def test_submissions_are_not_split_across_chunks(self):
+        rows = self.rows('a', 'Jane', '30') + self.rows('b', 'John', '40') + self.rows('c', 'Joe', '50')
+        importer = ResponseImporter(ResponseImport.objects.create(name='test'), chunk_size=3)
+        results = list(importer.run(enumerate(rows, start=1)))
+        self.assertEqual([result.rows for result in results], [4, 6])
+        self.assertEqual([result.imported for result in results], [4, 2])
+        self.assertEqual(Submission.objects.filter(form=self.form).count(), 3)
+
+    def test_questions_are_loaded_once_per_form(self):
+        rows = [row for i in range(20) for row in self.rows(i, 'Jane', str(i))]
+        importer = ResponseImporter(ResponseImport.objects.create(name='test'), chunk_size=len(rows))
+        # Questions, then one transaction (two savepoints here): submissions,
+        # change sequence, answers, statistics (select, insert, select,
+        # update) and progress
+        with self.assertNumQueries(13):
+            list(importer.run(enumerate(rows, start=1)))
+        self.assertEqual(FormResponse.objects.filter(form=self.form).count(), 40)
+
+    def test_resume_after_failure(self):
+        rows = [row for i in range(3) for row in self.rows(i, 'Jane', str(i))]
+        path = self.write(rows, 'ndjson')
+        calls = []
+
+        def fail_on_second_chunk(items):
+            calls.append(items)
+            if len(calls) == 2:
+                raise RuntimeError("connection lost")
+            save_submissions(items)
+
+        with mock.patch('form.imports.save_submissions', fail_on_second_chunk), \
+                self.assertRaises(RuntimeError):
+            call_command('import_responses', path, '--chunk-size', '2', stdout=io.StringIO(), stderr=io.StringIO())
+        self.assertEqual(ResponseImport.objects.get().rows, 2)
+        self.assertEqual(FormResponse.objects.filter(form=self.form).count(), 2)
+
+        with self.assertRaisesMessage(CommandError, "--resume"):
+            call_command('import_responses', path, stdout=io.StringIO(), stderr=io.StringIO())
+        call_command('import_responses', path, '--resume', '--chunk-size', '2',
+                     stdout=io.StringIO(), stderr=io.StringIO())
+        self.assertEqual(FormResponse.objects.filter(form=self.form).count(), 6)
+        self.assertEqual(Submission.objects.filter(form=self.form).count(), 3)
+
+        call_command('import_responses', path, '--restart', stdout=io.StringIO(), stderr=io.StringIO())
+        self.assertEqual(FormResponse.objects.filter(form=self.form).count(), 12)
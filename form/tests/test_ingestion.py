@@ -0,0 +1,161 @@
+import time
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from form import ingestion
+from form.ingestion import IngestionQueue, QueueFull, save_submissions
+from form.models import Form, Question, FormResponse, Submission
+
+
+class IngestionQueueTest(TestCase):
+    def setUp(self):
+        caches['forms'].clear()
+        self.form = Form.objects.create(title="Sample Form")
+        self.question = Question.objects.create(form=self.form, text="Name?", question_type="short_answer")
+        self.queue = IngestionQueue(maxsize=3, batch_size=2, flush_interval=0.01, put_timeout=0)
+
+    def item(self, answer="Jane"):
+        return Submission(form=self.form), [FormResponse(form=self.form, question=self.question, answer=answer)]
+
+    def test_flush_writes_in_batches(self):
+        receipts = [self.queue.put(*self.item(f"Name {index}")) for index in range(3)]
+        self.assertFalse(Submission.objects.exists())
+        # 3 submissions in batches of 2: two transactions, each with two bulk
+        # inserts, a change sequence update and a read and write of the
+        # question's statistics; the first also creates and locks its row
+        with self.assertNumQueries(2 * 7 + 2):
+            self.queue.flush()
+        self.assertEqual(FormResponse.objects.count(), 3)
+        for receipt in receipts:
+            receipt_status, submission_id = ingestion.get_receipt_status(receipt)
+            self.assertEqual(receipt_status, ingestion.STORED)
+            self.assertEqual(Submission.objects.get(pk=submission_id).receipt, receipt)
+
+    def test_backpressure(self):
+        for _ in range(3):
+            self.queue.put(*self.item())
+        with self.assertRaises(QueueFull):
+            self.queue.put(*self.item())
+
+    def test_stop_refuses_new_work(self):
+        self.queue.put(*self.item())
+        self.queue.stop()
+        self.assertEqual(FormResponse.objects.count(), 1)
+        with self.assertRaises(QueueFull):
+            self.queue.put(*self.item())
+
+    def test_receipt_falls_back_to_database(self):
+        receipt = self.queue.put(*self.item())
+        self.queue.flush()
+        caches['forms'].clear()
+        self.assertEqual(ingestion.get_receipt_status(receipt)[0], ingestion.STORED)
+        self.assertIsNone(ingestion.get_receipt_status('0' * 32))
+
+
+class IngestionQueueTransactionTest(TransactionTestCase):
+    # The flusher thread uses its own connection, and foreign keys are only
+    # checked on commit; both need real transactions.
+
+    def setUp(self):
+        caches['forms'].clear()
+        self.form = Form.objects.create(title="Sample Form")
+        self.question = Question.objects.create(form=self.form, text="Name?", question_type="short_answer")
+        self.queue = IngestionQueue(maxsize=3, batch_size=2, flush_interval=0.01, put_timeout=0)
+
+    def item(self, answer="Jane"):
+        return Submission(form=self.form), [FormResponse(form=self.form, question=self.question, answer=answer)]
+
+    def test_failed_submission_does_not_sink_batch(self):
+        bad_submission, bad_answers = self.item()
+        bad_answers[0].question_id = self.question.id + 100
+        good = self.queue.put(*self.item())
+        bad = self.queue.put(bad_submission, bad_answers)
+        with self.assertLogs('form.ingestion', 'ERROR'):
+            self.queue.flush()
+        self.assertEqual(ingestion.get_receipt_status(good)[0], ingestion.STORED)
+        self.assertEqual(ingestion.get_receipt_status(bad)[0], ingestion.FAILED)
+        self.assertEqual(FormResponse.objects.count(), 1)
+
+    def test_background_flusher(self):
+        self.queue.start()
+        receipts = [self.queue.put(*self.item(f"Name {index}")) for index in range(3)]
+        self.queue.stop()
+        self.assertEqual(FormResponse.objects.count(), 3)
+        self.assertEqual(
+            {ingestion.get_receipt_status(receipt)[0] for receipt in receipts}, {ingestion.STORED}
+        )
+
+    def test_flusher_checks_its_connection_before_each_batch(self):
+        # Like the request cycle, so a dropped or expired persistent
+        # connection is replaced instead of failing every later batch.
+        calls = mock.Mock()
+        calls.save.side_effect = save_submissions
+        with mock.patch.object(ingestion, 'close_old_connections', calls.close_old_connections), \
+                mock.patch.object(ingestion, 'save_submissions', calls.save):
+            self.queue.start()
+            for index in range(2):
+                self.wait_for(self.queue.put(*self.item(f"Name {index}")))
+            self.queue.stop()
+        self.assertEqual(
+            [name for name, _, _ in calls.mock_calls], ['close_old_connections', 'save'] * 2,
+        )
+
+    def wait_for(self, receipt):
+        deadline = time.monotonic() + 5
+        while ingestion.get_receipt_status(receipt)[0] == ingestion.QUEUED and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+
+@override_settings(INGESTION_MODE='queue')
+class QueuedSubmissionTests(APITestCase):
+    def setUp(self):
+        caches['forms'].clear()
+        self.form = Form.objects.create(title="Sample Form")
+        self.question = Question.objects.create(
+            form=self.form, text="Name?", question_type="short_answer", required=True
+        )
+        self.queue = IngestionQueue(maxsize=1, batch_size=10, flush_interval=0.01, put_timeout=0)
+        patcher = mock.patch.object(ingestion, '_queue', self.queue)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_submit_is_accepted_and_stored_on_flush(self):
+        url = reverse('form-submit', args=[self.form.id])
+        response = self.client.post(url, {'answers': [{'question': self.question.id, 'answer': "Jane"}]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertFalse(FormResponse.objects.exists())
+
+        receipt_url = reverse('receipt-detail', args=[response.data['receipt']])
+        self.assertTrue(response['Location'].endswith(receipt_url))
+        self.assertEqual(self.client.get(receipt_url).data['status'], 'queued')
+
+        self.queue.flush()
+        receipt = self.client.get(receipt_url).data
+        self.assertEqual(receipt['status'], 'stored')
+        self.assertEqual(Submission.objects.get(pk=receipt['submission']).answers.get().answer, "Jane")
+
+    def test_single_answer_is_queued(self):
+        url = reverse('response-list', args=[self.form.id])
+        response = self.client.post(url, {'question': self.question.id, 'answer': "Jane"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+
+    def test_invalid_submission_is_rejected_before_queueing(self):
+        url = reverse('form-submit', args=[self.form.id])
+        response = self.client.post(url, {'answers': []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.queue.qsize(), 0)
+
+    def test_full_queue_returns_503(self):
+        url = reverse('response-list', args=[self.form.id])
+        self.client.post(url, {'question': self.question.id, 'answer': "Jane"}, format='json')
+        response = self.client.post(url, {'question': self.question.id, 'answer': "John"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response['Retry-After'], '1')
+
+    def test_unknown_receipt(self):
+        response = self.client.get(reverse('receipt-detail', args=['0' * 32]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
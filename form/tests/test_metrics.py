@@ -0,0 +1,125 @@
+import atexit
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from form import metrics
+from form.metrics import Histogram, MetricsRegistry, RequestTimings, retire_process
+from form.models import Form, Question
+
+
+class HistogramTests(TestCase):
+    def test_quantile_interpolates_within_bucket(self):
+        histogram = Histogram((1, 2, 4))
+        for value in (0.5, 1.5, 1.5, 3):
+            histogram.observe(value)
+        self.assertEqual(histogram.counts, [1, 2, 1, 0])
+        self.assertEqual(histogram.quantile(0.5), 1.5)
+        self.assertEqual(histogram.quantile(1.0), 4)
+
+    def test_quantile_above_last_bucket(self):
+        histogram = Histogram((1, 2))
+        histogram.observe(10)
+        self.assertEqual(histogram.quantile(0.99), 2)
+
+    def test_empty(self):
+        self.assertIsNone(Histogram((1,)).quantile(0.5))
+
+
+class MetricsMiddlewareTests(TestCase):
+    def setUp(self):
+        self.form = Form.objects.create(title="Feedback")
+        Question.objects.create(form=self.form, text="Name?", question_type="short_answer")
+        self.registry = MetricsRegistry()
+        patcher = mock.patch.object(metrics, '_registry', self.registry)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('form-get-questions', args=[self.form.id]))
+        timing = dict(part.split(';', 1) for part in response['Server-Timing'].split(', '))
+        self.assertEqual(set(timing), {'total', 'db', 'serialize', 'render'})
+        self.assertIn('desc="', timing['db'])
+
+    def test_requests_are_aggregated_per_route(self):
+        url = reverse('form-detail', args=[self.form.id])
+        for _ in range(3):
+            self.client.get(url, {'page_size': 5})
+        self.client.get('/does-not-exist/')
+        histogram = self.registry.histograms[('http_request_duration_seconds', 'form-detail', 'GET')]
+        self.assertEqual(histogram.count, 3)
+        queries = self.registry.histograms[('http_request_queries', 'form-detail', 'GET')]
+        self.assertGreater(queries.sum, 0)
+        self.assertEqual(self.registry.requests[('form-detail', 'GET', '200')], 3)
+        self.assertEqual(self.registry.requests[('unmatched', 'GET', '404')], 1)
+
+    def test_metrics_endpoint(self):
+        self.client.get(reverse('form-detail', args=[self.form.id]))
+        self.client.force_login(User.objects.create_user('ops', is_staff=True))
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        body = response.content.decode()
+        self.assertIn('http_requests_total{route="form-detail",method="GET",status="200"} 1', body)
+        self.assertIn('http_request_duration_seconds_bucket{route="form-detail",method="GET",le="+Inf"} 1', body)
+        self.assertIn('http_request_duration_seconds_quantile{route="form-detail",method="GET",quantile="0.99"}', body)
+
+    def test_metrics_endpoint_requires_access(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        self.client.force_login(User.objects.create_user('user'))
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_endpoint_token(self):
+        url = reverse('metrics')
+        self.assertEqual(self.client.get(url, headers={'Authorization': 'Bearer wrong'}).status_code, 403)
+        self.assertEqual(self.client.get(url, headers={'Authorization': 'Bearer secret'}).status_code, 200)
+
+    @override_settings(METRICS_ALLOWED_IPS=['10.0.0.5'])
+    def test_metrics_endpoint_allowed_ips(self):
+        self.assertEqual(self.client.get(reverse('metrics'), REMOTE_ADDR='10.0.0.6').status_code, 403)
+        self.assertEqual(self.client.get(reverse('metrics'), REMOTE_ADDR='10.0.0.5').status_code, 200)
+
+
+class SharedDirectoryTests(TestCase):
+    def test_processes_are_merged(self):
+        timings = RequestTimings()
+        timings.queries = 2
+        with tempfile.TemporaryDirectory() as directory:
+            with mock.patch('form.metrics.os.getpid', return_value=1):
+                first = MetricsRegistry(directory, flush_interval=0)
+                self.addCleanup(atexit.unregister, first.flush)
+                first.observe('form-detail', 'GET', 200, timings, 0.01)
+            with mock.patch('form.metrics.os.getpid', return_value=2):
+                second = MetricsRegistry(directory, flush_interval=60)
+                self.addCleanup(atexit.unregister, second.flush)
+                second.observe('form-detail', 'GET', 200, timings, 0.02)
+                second.observe('form-list', 'GET', 200, timings, 0.02)
+                self.assertEqual(sorted(os.listdir(directory)), ['metrics-1.json', 'metrics-2.json'])
+                histograms, requests = second.collect()
+            with open(os.path.join(directory, 'metrics-2.json')) as f:
+                self.assertEqual(len(json.load(f)['requests']), 2)
+        self.assertEqual(requests[('form-detail', 'GET', '200')], 2)
+        self.assertEqual(histograms[('http_request_queries', 'form-detail', 'GET')].sum, 4)
+        self.assertEqual(histograms[('http_request_duration_seconds', 'form-list', 'GET')].count, 1)
+
+    def test_exited_processes_are_folded_into_one_file(self):
+        timings = RequestTimings()
+        with tempfile.TemporaryDirectory() as directory:
+            for pid in (1, 2, 3):
+                with mock.patch('form.metrics.os.getpid', return_value=pid):
+                    registry = MetricsRegistry(directory, flush_interval=0)
+                    self.addCleanup(atexit.unregister, registry.flush)
+                    registry.observe('form-detail', 'GET', 200, timings, 0.01)
+            retire_process(directory, 1)
+            retire_process(directory, 2)
+            retire_process(directory, 4)  # Never wrote a file
+            self.assertEqual(sorted(os.listdir(directory)), ['metrics-3.json', 'metrics-exited.json'])
+            with mock.patch('form.metrics.os.getpid', return_value=3):
+                histograms, requests = registry.collect()
+        self.assertEqual(requests[('form-detail', 'GET', '200')], 3)
+        self.assertEqual(histograms[('http_request_duration_seconds', 'form-detail', 'GET')].count, 3)
@@ -1,6 +1,6 @@
 from django.test import TestCase
 from django.core.exceptions import ValidationError
-from form.models import Form, Question, FormResponse
+from form.models import Form, Question, FormResponse, ResponseSequence, Submission
 
 
 
@@ -92,6 +92,16 @@ class QuestionModelTest(TestCase):
         self.assertEqual(question.max_length, Question.DEFAULT_FORCE_LIMITS['email'])
 
 
+class SubmissionModelTest(TestCase):
+    def test_submission_defaults(self):
+        form = Form.objects.create(title="Feedback Form")
+        first = Submission.objects.create(form=form)
+        second = Submission.objects.create(form=form)
+        self.assertIsNotNone(first.created_at)
+        self.assertEqual(len(first.token), 32)
+        self.assertNotEqual(first.token, second.token)
+
+
 class ResponseModelTest(TestCase):
     def setUp(self):
         self.form = Form.objects.create(title="Feedback Form")
@@ -103,11 +113,34 @@ class ResponseModelTest(TestCase):
         )
 
     def test_response_creation(self):
+        submission = Submission.objects.create(form=self.form)
         response = FormResponse.objects.create(
             question=self.question,
             form=self.form,
+            submission=submission,
             answer="John Doe"
         )
         self.assertEqual(response.answer, "John Doe")
+        self.assertEqual(list(submission.answers.all()), [response])
         self.assertEqual(response.form, self.form)
         self.assertEqual(response.question, self.question)
+
+    def test_writes_take_increasing_sequence_numbers(self):
+        submission = Submission.objects.create(form=self.form)
+        first = FormResponse.objects.create(question=self.question, form=self.form, submission=submission, answer="A")
+        batch = FormResponse.objects.bulk_create(
+            FormResponse(question=self.question, form=self.form, submission=submission, answer=answer)
+            for answer in "BC"
+        )
+        self.assertEqual([response.sequence for response in batch], [first.sequence + 1, first.sequence + 2])
+        first.answer = "Z"
+        first.save(update_fields=['answer'])
+        first.refresh_from_db()
+        self.assertEqual(first.sequence, batch[-1].sequence + 1)
+
+    def test_sequence_restarts_after_existing_responses(self):
+        submission = Submission.objects.create(form=self.form)
+        first = FormResponse.objects.create(question=self.question, form=self.form, submission=submission, answer="A")
+        ResponseSequence.objects.all().delete()
+        second = FormResponse.objects.create(question=self.question, form=self.form, submission=submission, answer="B")
+        self.assertEqual(second.sequence, first.sequence + 1)
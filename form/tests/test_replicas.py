@@ -0,0 +1,251 @@
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import connections
+from django.db.utils import ConnectionHandler
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+from unittest import mock
+from django.urls import reverse
+from config.database import database_config, replica_configs
+from form import replicas as routing
+from form.models import Form, Question
+from form.replicas import PIN_COOKIE, ReplicaPinMiddleware, ReplicaRouter, ReplicaSet, is_pinned
+
+
+def create_heartbeat(connection, beat=None):
+    with connection.cursor() as cursor:
+        cursor.execute('CREATE TABLE form_replicationheartbeat (id integer PRIMARY KEY, beat real NOT NULL)')
+        if beat is not None:
+            cursor.execute('INSERT INTO form_replicationheartbeat (id, beat) VALUES (1, %s)', [beat])
+
+
+class ReplicaConfigTests(TestCase):
+    def test_sqlite_replicas(self):
+        primary = database_config({}, base_dir=Path('/srv'))
+        replicas = replica_configs(primary, {'DB_REPLICAS': '/srv/a.sqlite3, /srv/b.sqlite3'})
+        self.assertEqual(list(replicas), ['replica_1', 'replica_2'])
+        self.assertEqual(replicas['replica_2']['NAME'], '/srv/b.sqlite3')
+        self.assertEqual(replicas['replica_1']['OPTIONS'], primary['OPTIONS'])
+        self.assertEqual(replicas['replica_1']['TEST'], {'MIRROR': 'default'})
+
+    def test_postgresql_replicas(self):
+        primary = database_config({'DB_ENGINE': 'postgresql', 'POSTGRES_HOST': 'db'})
+        replicas = replica_configs(primary, {'DB_REPLICAS': 'db-replica,db-replica-2:6432'})
+        self.assertEqual(replicas['replica_1']['HOST'], 'db-replica')
+        self.assertEqual(replicas['replica_1']['PORT'], '5432')
+        self.assertEqual(replicas['replica_2']['PORT'], '6432')
+
+    def test_no_replicas(self):
+        self.assertEqual(replica_configs(database_config({}, base_dir=Path('/srv')), {}), {})
+
+
+# A primary and a replica in two local SQLite files.
+class ReplicaSetTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = directory.name
+
+    def replica_set(self, primary_beat, replica_beat, max_lag=2.0):
+        env = {'SQLITE_PATH': os.path.join(self.path, 'primary.sqlite3'),
+               'DB_REPLICAS': os.path.join(self.path, 'replica.sqlite3')}
+        primary = database_config(env)
+        connections = ConnectionHandler({'default': primary, **replica_configs(primary, env)})
+        self.addCleanup(connections.close_all)
+        create_heartbeat(connections['default'], primary_beat)
+        create_heartbeat(connections['replica_1'], replica_beat)
+        return ReplicaSet(['replica_1'], max_lag, check_interval=60, connections=connections)
+
+    def test_current_replica(self):
+        now = time.time()
+        replicas = self.replica_set(now, now - 0.5)
+        self.assertEqual(replicas.available(), ['replica_1'])
+        self.assertAlmostEqual(replicas.lags['replica_1'], 0.5)
+
+    def test_lagging_replica(self):
+        now = time.time()
+        replicas = self.replica_set(now, now - 10)
+        with self.assertLogs('form.replicas', 'WARNING'):
+            self.assertEqual(replicas.available(), [])
+        self.assertAlmostEqual(replicas.lags['replica_1'], 10)
+
+    def test_replica_without_heartbeat(self):
+        replicas = self.replica_set(time.time(), None)
+        with self.assertLogs('form.replicas', 'WARNING'):
+            self.assertEqual(replicas.available(), [])
+
+    def test_without_heartbeat_every_replica_is_current(self):
+        self.assertEqual(self.replica_set(None, None).available(), ['replica_1'])
+
+    def test_unavailable_replica(self):
+        primary = {**database_config({}, base_dir=Path('/srv')), 'NAME': os.path.join(self.path, 'primary.sqlite3')}
+        replica = {**primary, 'NAME': os.path.join(self.path, 'missing', 'replica.sqlite3')}
+        connections = ConnectionHandler({'default': primary, 'replica_1': replica})
+        self.addCleanup(connections.close_all)
+        create_heartbeat(connections['default'], time.time())
+        replicas = ReplicaSet(['replica_1'], 2.0, check_interval=60, connections=connections)
+        with self.assertLogs('form.replicas', 'WARNING') as logs:
+            self.assertEqual(replicas.available(), [])
+        self.assertIn('unavailable', logs.output[0])
+        self.assertNotIn('replica_1', replicas.lags)
+
+    def test_no_replicas_no_checks(self):
+        replicas = ReplicaSet([], 2.0, check_interval=0)
+        with self.assertNumQueries(0):
+            self.assertEqual(replicas.available(), [])
+
+    def test_checks_are_cached(self):
+        now = time.time()
+        replicas = self.replica_set(now, now)
+        replicas.available()
+        with replicas.connections['replica_1'].cursor() as cursor:
+            cursor.execute('DELETE FROM form_replicationheartbeat')
+        self.assertEqual(replicas.available(), ['replica_1'])
+        replicas.checked_at -= 60
+        with self.assertLogs('form.replicas', 'WARNING'):
+            self.assertEqual(replicas.available(), [])
+
+
+class StaticReplicaSet:
+    def __init__(self, healthy):
+        self.healthy = healthy
+
+    def available(self):
+        return self.healthy
+
+
+class ReplicaRouterTests(TestCase):
+    def setUp(self):
+        self.router = ReplicaRouter(StaticReplicaSet(['replica_1']))
+        self.middleware = ReplicaPinMiddleware(self.view)
+        self.routed = []
+        # Test setup writes, which pins this thread outside of any request.
+        token = routing._pinned.set(False)
+        self.addCleanup(routing._pinned.reset, token)
+
+    def view(self, request):
+        self.routed.append(self.router.db_for_read(Form))
+        if request.GET.get('write'):
+            self.router.db_for_write(Form)
+            self.routed.append(self.router.db_for_read(Question))
+        return HttpResponse()
+
+    def test_reads_go_to_a_replica(self):
+        self.assertEqual(self.router.db_for_read(Form), 'replica_1')
+        self.assertEqual(self.router.db_for_write(Form), 'default')
+
+    def test_other_apps_and_missing_replicas_use_the_primary(self):
+        self.assertIsNone(self.router.db_for_read(User))
+        self.assertIsNone(ReplicaRouter(StaticReplicaSet([])).db_for_read(Form))
+
+    def test_no_migrations_on_replicas(self):
+        with self.settings(DATABASE_REPLICAS=['replica_1']):
+            self.assertFalse(self.router.allow_migrate('replica_1', 'form'))
+            self.assertIsNone(self.router.allow_migrate('default', 'form'))
+
+    def test_safe_request(self):
+        response = self.middleware(RequestFactory().get('/'))
+        self.assertEqual(self.routed, ['replica_1'])
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+        self.assertFalse(is_pinned())
+
+    def test_reads_after_a_write_use_the_primary(self):
+        response = self.middleware(RequestFactory().get('/', {'write': 1}))
+        self.assertEqual(self.routed, ['replica_1', None])
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], 10)
+        self.assertFalse(is_pinned())
+
+    def test_unsafe_requests_use_the_primary(self):
+        self.middleware(RequestFactory().post('/'))
+        self.assertEqual(self.routed, [None])
+
+    def test_pin_cookie(self):
+        request = RequestFactory().get('/')
+        request.COOKIES[PIN_COOKIE] = '1'
+        self.middleware(request)
+        self.assertEqual(self.routed, [None])
+
+    def test_async(self):
+        async def view(request):
+            return self.view(request)
+
+        response = async_to_sync(ReplicaPinMiddleware(view))(RequestFactory().get('/', {'write': 1}))
+        self.assertEqual(self.routed, ['replica_1', None])
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+
+class PinCookieTests(TestCase):
+    def setUp(self):
+        self.form = Form.objects.create(title="Feedback")
+        self.question = Question.objects.create(form=self.form, text="Name?", question_type="short_answer")
+
+    def test_submitting_pins_the_client(self):
+        response = self.client.get(reverse('form-detail', args=[self.form.id]))
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+        response = self.client.post(
+            reverse('form-submit', args=[self.form.id]),
+            {'answers': [{'question': self.question.id, 'answer': 'Ada'}]},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+
+class LaggingReplicaCacheTests(TestCase):
+    """
+    The form cache against a replica that has not caught up with a write.
+    """
+    databases = {'default', 'replica_1'}
+
+    @classmethod
+    def setUpClass(cls):
+        directory = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(directory.cleanup)
+        connections.settings['replica_1'] = {
+            **connections.settings['default'], 'NAME': os.path.join(directory.name, 'replica.sqlite3'),
+        }
+        cls.addClassCleanup(cls.remove_replica)
+        with connections['replica_1'].schema_editor() as editor:
+            editor.create_model(Form)
+            editor.create_model(Question)
+        super().setUpClass()
+
+    @classmethod
+    def remove_replica(cls):
+        connections['replica_1'].close()
+        del connections['replica_1']
+        del connections.settings['replica_1']
+
+    def setUp(self):
+        caches['forms'].clear()
+        self.form = Form.objects.create(title="Feedback")
+        self.question = Question.objects.create(form=self.form, text="old text", question_type="short_answer")
+        # The replica has the form as it is now.
+        Form.objects.using('replica_1').bulk_create([self.form])
+        Question.objects.using('replica_1').bulk_create([self.question])
+
+        replicas = mock.patch.object(ReplicaRouter, 'replicas', return_value=['replica_1'])
+        replicas.start()
+        self.addCleanup(replicas.stop)
+
+    def test_edit_while_replica_lags(self):
+        url = reverse('form-detail', args=[self.form.id])
+        etag = self.client.get(url)['ETag']
+        # Reads that are not cached do come from the replica.
+        questions = self.client.get(reverse('form-get-questions', args=[self.form.id]), {'page_size': 10})
+        self.assertEqual(questions.data['results'][0]['text'], "old text")
+
+        self.question.text = "new text"
+        self.question.save()
+        # Built on the miss, then served from the cache.
+        for _ in range(2):
+            response = self.client.get(url)
+            self.assertEqual(json.loads(response.content)['data']['questions'][0]['text'], "new text")
+            self.assertNotEqual(response['ETag'], etag)
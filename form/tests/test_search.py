@@ -0,0 +1,80 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from form.models import Form, Question, FormResponse, Submission
+from form.search import index_exists, match_expression
+
+
+class AnswerSearchTests(APITestCase):
+    def setUp(self):
+        self.form = Form.objects.create(title="Feedback")
+        self.question = Question.objects.create(form=self.form, text="Comments?", question_type="complete_answer")
+        submission = Submission.objects.create(form=self.form)
+        self.answers = {}
+        for text in ["The coffee was great", "Great great service", "Slow service", "Nothing to add"]:
+            self.answers[text] = FormResponse.objects.create(
+                form=self.form, submission=submission, question=self.question, answer=text
+            )
+        other_form = Form.objects.create(title="Other")
+        other = Question.objects.create(form=other_form, text="Other?", question_type="short_answer")
+        FormResponse.objects.create(
+            form=other_form, submission=Submission.objects.create(form=other_form), question=other, answer="great"
+        )
+        self.url = reverse('response-list', args=[self.form.id])
+
+    def search(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item['answer'] for item in response.data['results']]
+
+    def test_index_is_installed(self):
+        self.assertTrue(index_exists(connection))
+
+    def test_ranked_search(self):
+        self.assertEqual(self.search(q="great"), ["Great great service", "The coffee was great"])
+
+    def test_all_terms_must_match(self):
+        self.assertEqual(self.search(q="slow service"), ["Slow service"])
+
+    def test_prefix_search(self):
+        self.assertEqual(self.search(q="serv"), [])
+        self.assertEqual(set(self.search(q="serv", prefix=1)), {"Great great service", "Slow service"})
+
+    def test_index_follows_updates_and_deletes(self):
+        answer = self.answers["Nothing to add"]
+        answer.answer = "Great muffins"
+        answer.save()
+        self.answers["Slow service"].delete()
+        self.assertIn("Great muffins", self.search(q="great"))
+        self.assertEqual(self.search(q="nothing"), [])
+        self.assertEqual(self.search(q="slow"), [])
+
+    def test_search_pagination(self):
+        response = self.client.get(self.url, {'q': "great", 'limit': 1})
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertIsNotNone(response.data['next'])
+        response = self.client.get(response.data['next'])
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertIsNone(response.data['next'])
+
+    def test_fts_syntax_is_escaped(self):
+        self.assertEqual(match_expression('great" OR "slow'), '"great""" "OR" """slow"')
+        self.assertEqual(self.search(q='great" OR'), [])
+
+    def test_fallback_without_index(self):
+        with mock.patch('form.search.index_exists', return_value=False):
+            self.assertEqual(self.search(q="great"), ["The coffee was great", "Great great service"])
+
+    def test_admin_search_uses_index(self):
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(admin)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('admin:form_formresponse_changelist'), {'q': "slow"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['cl'].queryset), [self.answers["Slow service"]])
+        self.assertFalse([query for query in context.captured_queries if 'LIKE' in query['sql']])
@@ -0,0 +1,109 @@
+import io
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.db.models import QuerySet
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from form.models import Form, Question, FormResponse, QuestionStats, Submission
+from form.stats import compute_stats, record_answers, stats_match
+from form.tests.helpers import QueryBudgetMixin
+
+
+class QuestionStatsTests(QueryBudgetMixin, APITestCase):
+    def setUp(self):
+        self.form = Form.objects.create(title="Survey")
+        self.age = Question.objects.create(
+            form=self.form, text="Age?", question_type="numeric_answer",
+            number_type="integer", min_value=0, max_value=100
+        )
+        self.name = Question.objects.create(form=self.form, text="Name?", question_type="short_answer")
+        self.submit_url = reverse('form-submit', args=[self.form.id])
+        self.stats_url = reverse('form-stats', args=[self.form.id])
+
+    def submit(self, age, name):
+        payload = {'answers': [{'question': self.age.id, 'answer': age}, {'question': self.name.id, 'answer': name}]}
+        response = self.client.post(self.submit_url, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_stats_are_maintained_on_insert(self):
+        self.submit("10", "Jane")
+        self.submit("30", "John")
+        response = self.client.post(
+            reverse('response-list', args=[self.form.id]), {'question': self.age.id, 'answer': "95"}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        age, name = self.assertQueryBudget(2, self.stats_url).data
+        self.assertEqual(age['count'], 3)
+        self.assertEqual(age['min'], 10)
+        self.assertEqual(age['max'], 95)
+        self.assertEqual(age['mean'], 45)
+        self.assertEqual([bucket['count'] for bucket in age['histogram']], [0, 1, 0, 1, 0, 0, 0, 0, 0, 1])
+        self.assertEqual(age['histogram'][1], {'lower': 10.0, 'upper': 20.0, 'count': 1})
+        self.assertEqual(name['count'], 2)
+        self.assertNotIn('histogram', name)
+
+    def test_stats_without_answers(self):
+        age, name = self.client.get(self.stats_url).data
+        self.assertEqual(age['count'], 0)
+        self.assertIsNone(age['mean'])
+
+    def test_delete_recounts(self):
+        self.submit("10", "Jane")
+        self.submit("30", "John")
+        response = FormResponse.objects.get(question=self.age, answer="30")
+        self.client.delete(reverse('response-detail', args=[self.form.id, response.id]))
+        age = self.client.get(self.stats_url).data[0]
+        self.assertEqual((age['count'], age['max']), (1, 10))
+
+    def test_changed_bounds_rebuild_histogram(self):
+        self.submit("10", "Jane")
+        self.submit("30", "John")
+        self.age.max_value = 50
+        self.age.save()
+        age = self.client.get(self.stats_url).data[0]
+        self.assertEqual([bucket['count'] for bucket in age['histogram']], [0, 0, 1, 0, 0, 0, 1, 0, 0, 0])
+        self.assertEqual(age['histogram'][2], {'lower': 10.0, 'upper': 15.0, 'count': 1})
+
+    def test_rebuild_command(self):
+        self.submit("10", "Jane")
+        # Rows written behind the API's back leave the statistics stale.
+        FormResponse.objects.create(
+            form=self.form, submission=Submission.objects.create(form=self.form), question=self.age, answer="50"
+        )
+        with self.assertRaises(CommandError):
+            call_command('rebuild_stats', '--check', stdout=io.StringIO())
+
+        call_command('rebuild_stats', '--form', str(self.form.id), stdout=io.StringIO())
+        call_command('rebuild_stats', '--check', stdout=io.StringIO())
+        stored = QuestionStats.objects.get(question=self.age)
+        self.assertEqual((stored.count, stored.sum), (2, 60))
+        self.assertTrue(stats_match(stored, compute_stats([self.age])[self.age.id]))
+
+    def test_legacy_non_finite_answers_are_not_numeric(self):
+        FormResponse.objects.create(
+            form=self.form, submission=Submission.objects.create(form=self.form), question=self.age, answer="nan"
+        )
+        stats = compute_stats([self.age])[self.age.id]
+        self.assertEqual((stats.count, stats.numeric_count, stats.sum), (1, 0, 0))
+
+    def test_row_created_concurrently_is_updated(self):
+        self.submit("10", "Jane")
+        answer = FormResponse.objects.create(
+            form=self.form, submission=Submission.objects.create(form=self.form), question=self.age, answer="30"
+        )
+        # The first lookup misses the row, as when another transaction
+        # inserted it in the meantime.
+        in_bulk = QuerySet.in_bulk
+        lookups = []
+
+        def miss_first(queryset, *args, **kwargs):
+            lookups.append(args)
+            return {} if len(lookups) == 1 else in_bulk(queryset, *args, **kwargs)
+
+        with mock.patch.object(QuerySet, 'in_bulk', miss_first):
+            record_answers([answer])
+        stored = QuestionStats.objects.get(question=self.age)
+        self.assertEqual((stored.count, stored.sum), (2, 40))
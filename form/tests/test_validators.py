@@ -0,0 +1,71 @@
+from rest_framework.exceptions import ValidationError
+from django.test import TestCase
+from form.models import Form, Question
+from form.validators import AnswerValidator, clear_validators, get_validator
+
+
+class AnswerValidatorTest(TestCase):
+    def setUp(self):
+        clear_validators()
+        self.form = Form.objects.create(title="Test Form")
+        self.question = Question.objects.create(
+            form=self.form,
+            text="How old are you?",
+            question_type="numeric_answer",
+            required=True,
+            min_value=18,
+            max_value=100,
+            number_type="integer"
+        )
+
+    def test_numeric_bounds(self):
+        validator = get_validator(self.question)
+        self.assertEqual(validator("30"), 30.0)
+        with self.assertRaises(ValidationError):
+            validator("10")
+        with self.assertRaises(ValidationError):
+            validator("101")
+        with self.assertRaises(ValidationError):
+            validator("25.5")
+        with self.assertRaises(ValidationError):
+            validator("abc")
+
+    def test_non_finite_numbers(self):
+        self.question.number_type = "float"
+        validator = AnswerValidator(self.question)
+        for answer in ("nan", "NaN", "inf", "-inf"):
+            with self.assertRaises(ValidationError):
+                validator(answer)
+
+    def test_required(self):
+        with self.assertRaises(ValidationError):
+            get_validator(self.question)("")
+
+    def test_default_length_limit_without_clean(self):
+        # bulk_create skips Question.clean, leaving max_length unset
+        question, = Question.objects.bulk_create([
+            Question(form=self.form, text="Name", question_type="short_answer")
+        ])
+        validator = AnswerValidator(question)
+        self.assertEqual(validator.max_length, Question.DEFAULT_FORCE_LIMITS['short_answer'])
+        with self.assertRaises(ValidationError):
+            validator("a" * 201)
+
+    def test_validator_is_cached(self):
+        self.assertIs(get_validator(self.question), get_validator(self.question))
+
+    def test_save_invalidates_cache(self):
+        validator = get_validator(self.question)
+        self.question.max_value = 50
+        self.question.save()
+        question = Question.objects.get(pk=self.question.pk)
+        self.assertIsNot(get_validator(question), validator)
+        with self.assertRaises(ValidationError):
+            get_validator(question)("60")
+
+    def test_stale_marker_recompiles(self):
+        validator = get_validator(self.question)
+        Question.objects.filter(pk=self.question.pk).update(max_value=50)
+        question = Question.objects.get(pk=self.question.pk)
+        question.updated_at = question.updated_at.replace(year=question.updated_at.year + 1)
+        self.assertIsNot(get_validator(question), validator)
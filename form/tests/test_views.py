@@ -1,7 +1,22 @@
+import gzip
+import os
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import override_settings
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
-from form.models import Form, Question, FormResponse
+from form.caching import VERSION_KEY
+from form.models import Form, Question, FormResponse, Submission
+from form.pagination import IdCursorPagination
+from form.tests.helpers import QueryBudgetMixin
 
 class FormViewSetTests(APITestCase):
     def setUp(self):
@@ -26,7 +41,7 @@ class FormViewSetTests(APITestCase):
         url = reverse('form-list')
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
 
     def test_retrieve_form(self):
         url = reverse('form-detail', args=[self.form.id])
@@ -34,5 +49,615 @@ class FormViewSetTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['title'], self.form.title)
 
-   
+    def test_get_questions(self):
+        url = reverse('form-get-questions', args=[self.form.id])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [question['id'] for question in response.data['results']],
+            [self.question1.id, self.question2.id]
+        )
+
+
+class FormViewSetQueryBudgetTests(QueryBudgetMixin, APITestCase):
+    def setUp(self):
+        for index in range(5):
+            form = Form.objects.create(title=f"Form {index}")
+            for position in range(3):
+                Question.objects.create(
+                    form=form,
+                    text=f"Question {position}",
+                    question_type="short_answer",
+                )
+        self.form = Form.objects.first()
+
+    def test_list_query_budget(self):
+        response = self.assertQueryBudget(2, reverse('form-list'))
+        self.assertEqual(len(response.data['results']), 5)
+
+    def test_list_query_budget_is_constant(self):
+        form = Form.objects.create(title="Extra Form")
+        Question.objects.create(form=form, text="Extra", question_type="email")
+        self.assertQueryBudget(2, reverse('form-list'))
+
+    def test_retrieve_query_budget(self):
+        # version marker lookup, form, questions
+        response = self.assertQueryBudget(3, reverse('form-detail', args=[self.form.id]))
+        self.assertEqual(len(response.data['questions']), 3)
+
+    def test_get_questions_query_budget(self):
+        response = self.assertQueryBudget(3, reverse('form-get-questions', args=[self.form.id]))
+        self.assertEqual(len(response.data['results']), 3)
+
+
+class SparseFieldsetTests(QueryBudgetMixin, APITestCase):
+    def setUp(self):
+        self.form = Form.objects.create(title="Feedback")
+        for position in range(3):
+            Question.objects.create(form=self.form, text=f"Question {position}", question_type="short_answer")
+
+    def test_list_without_questions(self):
+        response = self.assertQueryBudget(1, reverse('form-list'), data={'fields': 'id,title'})
+        self.assertEqual(response.data['results'], [{'id': self.form.id, 'title': "Feedback"}])
+
+    def test_include_questions(self):
+        response = self.assertQueryBudget(2, reverse('form-list'), data={'fields': 'title', 'include': 'questions'})
+        form = response.data['results'][0]
+        self.assertEqual(list(form), ['title', 'questions'])
+        self.assertEqual(len(form['questions']), 3)
+        self.assertEqual(len(form['questions'][0]), 8)
+
+    def test_question_fields(self):
+        response = self.client.get(reverse('form-list'), {'fields': 'id,questions.id,questions.text'})
+        form = response.data['results'][0]
+        self.assertEqual(list(form), ['id', 'questions'])
+        self.assertEqual(list(form['questions'][0]), ['id', 'text'])
+
+    def test_retrieve(self):
+        # version marker lookup, form
+        response = self.assertQueryBudget(2, reverse('form-detail', args=[self.form.id]), data={'fields': 'title'})
+        self.assertEqual(response.data, {'title': "Feedback"})
+
+    def test_defaults_are_unchanged(self):
+        response = self.client.get(reverse('form-detail', args=[self.form.id]), {'include': 'questions'})
+        self.assertEqual(list(response.data), ['id', 'title', 'created_at', 'questions'])
+
+    def test_get_questions(self):
+        url = reverse('form-get-questions', args=[self.form.id])
+        response = self.client.get(url, {'fields': 'id,text'})
+        self.assertEqual([list(question) for question in response.data['results']], [['id', 'text']] * 3)
+
+    def test_unknown_fields(self):
+        response = self.client.get(reverse('form-list'), {'fields': 'id,secret'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('secret', response.data['fields'][0])
+        response = self.client.get(reverse('form-list'), {'fields': 'id', 'include': 'answers'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(reverse('form-get-questions', args=[self.form.id]), {'fields': 'form'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class FormSubmitTests(QueryBudgetMixin, APITestCase):
+    def setUp(self):
+        self.form = Form.objects.create(title="Sample Form")
+        self.name = Question.objects.create(
+            form=self.form,
+            text="What is your name?",
+            question_type="short_answer",
+            required=True
+        )
+        self.age = Question.objects.create(
+            form=self.form,
+            text="What is your age?",
+            question_type="numeric_answer",
+            required=True,
+            number_type="integer",
+            min_value=0,
+            max_value=120
+        )
+        self.comment = Question.objects.create(
+            form=self.form,
+            text="Anything else?",
+            question_type="complete_answer",
+        )
+        self.url = reverse('form-submit', args=[self.form.id])
+
+    def test_submit_creates_all_answers(self):
+        payload = {'answers': [
+            {'question': self.name.id, 'answer': "Jane"},
+            {'question': self.age.id, 'answer': "30"},
+        ]}
+        response = self.client.post(self.url, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['answers']), 2)
+        submission = Submission.objects.get(pk=response.data['id'])
+        self.assertEqual(submission.answers.count(), 2)
+        self.assertEqual(FormResponse.objects.filter(form=self.form).count(), 2)
+
+    def test_submit_with_token(self):
+        payload = {'token': "respondent-1", 'answers': [
+            {'question': self.name.id, 'answer': "Jane"},
+            {'question': self.age.id, 'answer': "30"},
+        ]}
+        response = self.client.post(self.url, payload, format='json')
+        self.assertEqual(response.data['token'], "respondent-1")
+
+    def test_submit_query_budget(self):
+        payload = {'answers': [
+            {'question': self.name.id, 'answer': "Jane"},
+            {'question': self.age.id, 'answer': "30"},
+            {'question': self.comment.id, 'answer': "No"},
+        ]}
+        # form + questions, then savepoint, submission, change sequence and
+        # bulk insert, statistics read, insert, locking read and update,
+        # release
+        self.assertQueryBudget(11, self.url, method='post', data=payload, format='json')
+
+    def test_submit_missing_required_question(self):
+        payload = {'answers': [{'question': self.name.id, 'answer': "Jane"}]}
+        response = self.client.post(self.url, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(str(self.age.id), response.data)
+        self.assertFalse(FormResponse.objects.exists())
+
+    def test_submit_rejects_question_from_other_form(self):
+        other_form = Form.objects.create(title="Other Form")
+        other = Question.objects.create(form=other_form, text="Other", question_type="email")
+        payload = {'answers': [
+            {'question': self.name.id, 'answer': "Jane"},
+            {'question': self.age.id, 'answer': "30"},
+            {'question': other.id, 'answer': "a@example.com"},
+        ]}
+        response = self.client.post(self.url, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(str(other.id), response.data)
+        self.assertFalse(FormResponse.objects.exists())
+
+    def test_submit_is_all_or_nothing(self):
+        payload = {'answers': [
+            {'question': self.name.id, 'answer': "Jane"},
+            {'question': self.age.id, 'answer': "500"},
+        ]}
+        response = self.client.post(self.url, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(FormResponse.objects.exists())
+
+
+class FormConditionalGetTests(QueryBudgetMixin, APITestCase):
+    def setUp(self):
+        self.form = Form.objects.create(title="Sample Form")
+        self.question = Question.objects.create(
+            form=self.form,
+            text="What is your name?",
+            question_type="short_answer",
+        )
+        self.detail_url = reverse('form-detail', args=[self.form.id])
+        self.questions_url = reverse('form-get-questions', args=[self.form.id])
+
+    def test_validators_are_sent(self):
+        response = self.client.get(self.detail_url)
+        self.assertTrue(response['ETag'].startswith('"'))
+        self.assertIn('Last-Modified', response)
+
+    def test_if_none_match_returns_304(self):
+        for url in (self.detail_url, self.questions_url):
+            etag = self.client.get(url)['ETag']
+            # The version marker is cached, so a revalidation runs no queries.
+            response = self.assertQueryBudget(0, url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_if_modified_since_returns_304(self):
+        last_modified = self.client.get(self.detail_url)['Last-Modified']
+        response = self.client.get(self.detail_url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_question_change_changes_etag(self):
+        etag = self.client.get(self.detail_url)['ETag']
+        self.question.text = "What is your full name?"
+        self.question.save()
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_form_change_changes_etag(self):
+        etag = self.client.get(self.questions_url)['ETag']
+        self.form.title = "Renamed"
+        self.form.save()
+        response = self.client.get(self.questions_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_missing_form_is_404(self):
+        response = self.client.get(reverse('form-detail', args=[self.form.id + 100]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class FormPayloadCacheTests(QueryBudgetMixin, APITestCase):
+    def setUp(self):
+        caches['forms'].clear()
+        self.form = Form.objects.create(title="Sample Form")
+        self.question = Question.objects.create(
+            form=self.form,
+            text="What is your name?",
+            question_type="short_answer",
+        )
+        self.detail_url = reverse('form-detail', args=[self.form.id])
+        self.questions_url = reverse('form-get-questions', args=[self.form.id])
+
+    def test_hit_skips_database(self):
+        for url in (self.detail_url, self.questions_url):
+            first = self.client.get(url)
+            second = self.assertQueryBudget(0, url)
+            self.assertEqual(second.status_code, status.HTTP_200_OK)
+            self.assertEqual(second.content, first.content)
+            self.assertEqual(second['Content-Type'], first['Content-Type'])
+            self.assertEqual(second['ETag'], first['ETag'])
+
+    def test_question_change_invalidates_payload(self):
+        self.client.get(self.questions_url)
+        self.question.text = "What is your full name?"
+        self.question.save()
+        response = self.client.get(self.questions_url)
+        self.assertIn(b"What is your full name?", response.content)
+
+    def test_form_change_invalidates_payload(self):
+        self.client.get(self.detail_url)
+        self.form.title = "Renamed"
+        self.form.save()
+        response = self.client.get(self.detail_url)
+        self.assertIn(b"Renamed", response.content)
+
+    def test_browsable_api_is_not_cached(self):
+        self.client.get(self.detail_url)
+        response = self.client.get(self.detail_url, HTTP_ACCEPT='text/html')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('text/html', response['Content-Type'])
+
+    def test_cache_stats(self):
+        self.client.get(self.detail_url)
+        self.client.get(self.detail_url)
+        url = reverse('form-cache-stats')
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_authenticate(admin)
+        response = self.client.get(url)
+        self.assertEqual(response.data, {'hits': 1, 'misses': 1, 'hit_ratio': 0.5})
+
+    def cached_in_other_process(self, key, location):
+        script = (
+            "import django, sys; django.setup(); from django.core.cache import caches; "
+            f"sys.exit(caches['forms'].get({key!r}) is None)"
+        )
+        env = {
+            **os.environ, 'DJANGO_SETTINGS_MODULE': 'config.settings', 'SECRET_KEY': settings.SECRET_KEY,
+            'FORM_CACHE_BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'FORM_CACHE_LOCATION': location,
+        }
+        return subprocess.run([sys.executable, '-c', script], env=env).returncode == 0
+
+    def test_invalidation_reaches_other_workers(self):
+        # As in the Docker image: a cache directory shared by the workers.
+        with tempfile.TemporaryDirectory() as location, override_settings(CACHES={**settings.CACHES, 'forms': {
+            **settings.CACHES['forms'],
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': location,
+        }}):
+            self.client.get(self.detail_url)
+            key = VERSION_KEY.format(self.form.id)
+            self.assertTrue(self.cached_in_other_process(key, location))
+            self.question.text = "What is your full name?"
+            self.question.save()
+            self.assertFalse(self.cached_in_other_process(key, location))
+
+
+class CompressionTests(QueryBudgetMixin, APITestCase):
+    def setUp(self):
+        caches['forms'].clear()
+        self.form = Form.objects.create(title="Sample Form")
+        Question.objects.bulk_create(
+            Question(form=self.form, text=f"Question {i}?", question_type="short_answer", max_length=255)
+            for i in range(30)
+        )
+        self.detail_url = reverse('form-detail', args=[self.form.id])
+
+    def get(self, url, **headers):
+        return self.client.get(url, HTTP_ACCEPT_ENCODING='gzip, deflate', **headers)
+
+    def test_large_payload_is_gzipped(self):
+        plain = self.client.get(self.detail_url)
+        self.assertNotIn('Content-Encoding', plain)
+        self.assertIn('Accept-Encoding', plain['Vary'])
+
+        response = self.get(self.detail_url)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertEqual(response['Content-Length'], str(len(response.content)))
+        self.assertEqual(response['ETag'], 'W/' + plain['ETag'])
+
+    def test_cached_payload_is_compressed_once(self):
+        first = self.get(self.detail_url)
+        with mock.patch('gzip.compress') as compress:
+            second = self.assertQueryBudget(0, self.detail_url, HTTP_ACCEPT_ENCODING='gzip')
+        compress.assert_not_called()
+        self.assertEqual(second['Content-Encoding'], 'gzip')
+        self.assertEqual(second.content, first.content)
+
+    def test_weak_etag_revalidates(self):
+        etag = self.get(self.detail_url)['ETag']
+        response = self.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_small_payload_is_not_compressed(self):
+        with self.settings(GZIP_MIN_SIZE=10 ** 6):
+            response = self.get(self.detail_url)
+        self.assertNotIn('Content-Encoding', response)
+        self.assertNotIn('Accept-Encoding', response.get('Vary', ''))
+
+    def test_uncached_responses_are_compressed(self):
+        response = self.get(reverse('form-get-questions', args=[self.form.id]), data={'page_size': 30})
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn(b"Question 29?", gzip.decompress(response.content))
+
+
+class PaginationTests(APITestCase):
+    def setUp(self):
+        self.form = Form.objects.create(title="Sample Form")
+        self.questions = [
+            Question.objects.create(form=self.form, text=f"Question {index}", question_type="short_answer")
+            for index in range(5)
+        ]
+        submission = Submission.objects.create(form=self.form)
+        for question in self.questions:
+            FormResponse.objects.create(form=self.form, submission=submission, question=question, answer="Yes")
+
+    def collect(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertTrue(response.json()['success'])
+            page = response.json()['data']
+            self.assertLessEqual(len(page['results']), 2)
+            ids.extend(item['id'] for item in page['results'])
+            url = page['next']
+        return ids
+
+    def test_questions_are_paged_in_id_order(self):
+        url = reverse('form-get-questions', args=[self.form.id]) + '?page_size=2'
+        self.assertEqual(self.collect(url), [question.id for question in self.questions])
+
+    def test_responses_are_paged_in_id_order(self):
+        url = reverse('response-list', args=[self.form.id]) + '?page_size=2'
+        self.assertEqual(self.collect(url), list(FormResponse.objects.order_by('id').values_list('id', flat=True)))
+
+    def test_page_size_is_capped(self):
+        url = reverse('form-get-questions', args=[self.form.id]) + '?page_size=100000'
+        with mock.patch.object(IdCursorPagination, 'max_page_size', 2):
+            response = self.client.get(url)
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNotNone(response.data['next'])
+
+
+class ResponseViewSetTests(APITestCase):
+    def setUp(self):
+        self.form = Form.objects.create(title="Sample Form")
+        self.other_form = Form.objects.create(title="Other Form")
+        self.name = Question.objects.create(form=self.form, text="Name?", question_type="short_answer")
+        self.email = Question.objects.create(form=self.form, text="Email?", question_type="email")
+        self.other = Question.objects.create(form=self.other_form, text="Other?", question_type="short_answer")
+        self.submission = Submission.objects.create(form=self.form)
+        other_submission = Submission.objects.create(form=self.other_form)
+        self.name_response = FormResponse.objects.create(
+            form=self.form, submission=self.submission, question=self.name, answer="Jane"
+        )
+        self.email_response = FormResponse.objects.create(
+            form=self.form, submission=self.submission, question=self.email, answer="j@example.com"
+        )
+        self.other_response = FormResponse.objects.create(
+            form=self.other_form, submission=other_submission, question=self.other, answer="Elsewhere"
+        )
+        self.url = reverse('response-list', args=[self.form.id])
+
+    def test_list_is_scoped_to_form(self):
+        response = self.client.get(self.url)
+        self.assertEqual(
+            [item['id'] for item in response.data['results']],
+            [self.name_response.id, self.email_response.id]
+        )
+
+    def test_list_filtered_by_question(self):
+        response = self.client.get(self.url, {'question': self.email.id})
+        self.assertEqual([item['id'] for item in response.data['results']], [self.email_response.id])
+
+    def test_invalid_question_filter(self):
+        response = self.client.get(self.url, {'question': 'abc'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_retrieve_from_other_form_is_404(self):
+        url = reverse('response-detail', args=[self.other_form.id, self.name_response.id])
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_create(self):
+        response = self.client.post(self.url, {'question': self.name.id, 'answer': "John"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['form'], self.form.id)
+        self.assertNotEqual(response.data['submission'], self.submission.id)
+
+    def test_create_in_existing_submission(self):
+        payload = {'question': self.name.id, 'answer': "John", 'submission': self.submission.id}
+        response = self.client.post(self.url, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.submission.answers.count(), 3)
+
+    def test_create_rejects_submission_from_other_form(self):
+        other_submission = self.other_response.submission
+        payload = {'question': self.name.id, 'answer': "John", 'submission': other_submission.id}
+        response = self.client.post(self.url, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_create_rejects_question_from_other_form(self):
+        response = self.client.post(self.url, {'question': self.other.id, 'answer': "John"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(FormResponse.objects.filter(form=self.form).count(), 2)
+
+
+class ResponseChangeFeedTests(QueryBudgetMixin, APITestCase):
+    def setUp(self):
+        self.form = Form.objects.create(title="Sample Form")
+        self.other_form = Form.objects.create(title="Other Form")
+        self.name = Question.objects.create(form=self.form, text="Name?", question_type="short_answer")
+        self.other = Question.objects.create(form=self.other_form, text="Other?", question_type="short_answer")
+        submission = Submission.objects.create(form=self.form)
+        other_submission = Submission.objects.create(form=self.other_form)
+        self.responses = FormResponse.objects.bulk_create([
+            FormResponse(form=self.form, submission=submission, question=self.name, answer="Jane"),
+            FormResponse(form=self.other_form, submission=other_submission, question=self.other, answer="Elsewhere"),
+            FormResponse(form=self.form, submission=submission, question=self.name, answer="John"),
+        ])
+        self.url = reverse('response-changes-list')
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_authenticate(admin)
+
+    def changes(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_changes_across_forms_in_order(self):
+        data = self.changes()
+        self.assertEqual([item['id'] for item in data['results']], [response.id for response in self.responses])
+        self.assertEqual(data['results'][1]['form'], self.other_form.id)
+        self.assertEqual(data['cursor'], str(self.responses[-1].sequence))
+        self.assertFalse(data['has_more'])
+
+    def test_pages_follow_the_cursor(self):
+        first = self.changes(limit=2)
+        self.assertTrue(first['has_more'])
+        self.assertIn(f"after={first['cursor']}", first['next'])
+        second = self.changes(after=first['cursor'], limit=2)
+        self.assertEqual([item['id'] for item in second['results']], [self.responses[2].id])
+        self.assertFalse(second['has_more'])
+
+    def test_nothing_new_keeps_the_cursor(self):
+        cursor = self.changes()['cursor']
+        data = self.changes(after=cursor)
+        self.assertEqual(data['results'], [])
+        self.assertEqual(data['cursor'], cursor)
+
+    def test_new_and_edited_responses_come_after_the_cursor(self):
+        cursor = self.changes()['cursor']
+        edited = self.responses[0]
+        edited.answer = "Janet"
+        edited.save()
+        self.client.post(
+            reverse('response-list', args=[self.form.id]), {'question': self.name.id, 'answer': "Ada"}, format='json',
+        )
+        data = self.changes(after=cursor)
+        self.assertEqual([item['answer'] for item in data['results']], ["Janet", "Ada"])
+
+    def test_page_is_one_query(self):
+        # A range scan of the sequence index, however far the cursor is.
+        self.assertQueryBudget(1, self.url + f'?after={self.responses[0].sequence}')
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.url, {'after': 'abc'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_admin_only(self):
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_403_FORBIDDEN)
+
+
+class SubmissionViewSetTests(QueryBudgetMixin, APITestCase):
+    def setUp(self):
+        self.form = Form.objects.create(title="Sample Form")
+        self.name = Question.objects.create(form=self.form, text="Name?", question_type="short_answer")
+        self.email = Question.objects.create(form=self.form, text="Email?", question_type="email")
+        self.submissions = []
+        for day in range(1, 4):
+            submission = Submission.objects.create(
+                form=self.form, created_at=datetime(2024, 1, day, tzinfo=timezone.utc)
+            )
+            FormResponse.objects.create(form=self.form, submission=submission, question=self.name, answer="Jane")
+            FormResponse.objects.create(form=self.form, submission=submission, question=self.email, answer="j@x.io")
+            self.submissions.append(submission)
+        self.url = reverse('submission-list', args=[self.form.id])
+
+    def test_retrieve_in_one_query(self):
+        url = reverse('submission-detail', args=[self.form.id, self.submissions[0].id])
+        response = self.assertQueryBudget(1, url)
+        self.assertEqual([answer['question'] for answer in response.data['answers']], [self.name.id, self.email.id])
+
+    def test_retrieve_from_other_form_is_404(self):
+        other_form = Form.objects.create(title="Other Form")
+        url = reverse('submission-detail', args=[other_form.id, self.submissions[0].id])
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_list_by_time_range(self):
+        response = self.assertQueryBudget(2, self.url + '?since=2024-01-02T00:00:00Z&until=2024-01-03T00:00:00Z')
+        self.assertEqual([item['id'] for item in response.data['results']], [self.submissions[1].id])
+        self.assertEqual(len(response.data['results'][0]['answers']), 2)
+
+    def test_invalid_time_range(self):
+        response = self.client.get(self.url, {'since': 'yesterday'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class NumericAnswerTests(APITestCase):
+    def setUp(self):
+        self.form = Form.objects.create(title="Survey")
+        self.age = Question.objects.create(
+            form=self.form, text="Age?", question_type="numeric_answer",
+            number_type="integer", min_value=0, max_value=120
+        )
+        self.url = reverse('response-list', args=[self.form.id])
+        for age in ("15", "18", "25", "30", "45"):
+            response = self.client.post(self.url, {'question': self.age.id, 'answer': age}, format='json')
+            self.assertEqual(response.data['numeric_answer'], float(age))
+
+    def test_submit_stores_numeric_answer(self):
+        payload = {'answers': [{'question': self.age.id, 'answer': "42"}]}
+        response = self.client.post(reverse('form-submit', args=[self.form.id]), payload, format='json')
+        answer = FormResponse.objects.get(pk=response.data['answers'][0]['id'])
+        self.assertEqual(answer.numeric_answer, 42.0)
+
+    def test_range_filter(self):
+        response = self.client.get(self.url, {'question': self.age.id, 'min': 18, 'max': 30})
+        self.assertEqual([item['answer'] for item in response.data['results']], ["18", "25", "30"])
+
+    def test_invalid_range_filter(self):
+        response = self.client.get(self.url, {'min': 'old'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_summary(self):
+        url = reverse('response-summary', args=[self.form.id])
+        response = self.client.get(url, {'question': self.age.id, 'percentiles': '0,50,90'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 5)
+        self.assertEqual(response.data['avg'], 26.6)
+        self.assertEqual((response.data['min'], response.data['max']), (15, 45))
+        self.assertEqual(response.data['percentiles'], {'0': 15, '50': 25, '90': 45})
+
+    def test_summary_with_range(self):
+        url = reverse('response-summary', args=[self.form.id])
+        response = self.client.get(url, {'question': self.age.id, 'min': 20})
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual(response.data['percentiles']['50'], 30)
+
+    def test_nan_is_rejected(self):
+        score = Question.objects.create(
+            form=self.form, text="Score?", question_type="numeric_answer",
+            number_type="float", min_value=0, max_value=10
+        )
+        response = self.client.post(self.url, {'question': score.id, 'answer': "nan"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        payload = {'answers': [{'question': score.id, 'answer': "nan"}]}
+        response = self.client.post(reverse('form-submit', args=[self.form.id]), payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("valid number", str(response.data))
+        self.assertFalse(FormResponse.objects.filter(question=score).exists())
 
+    def test_summary_requires_question(self):
+        response = self.client.get(reverse('response-summary', args=[self.form.id]))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
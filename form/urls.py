@@ -1,13 +1,24 @@
 from django.urls import path, include
 from rest_framework_nested.routers import DefaultRouter, NestedDefaultRouter
-from .views import FormViewSet, ResponseViewSet
+from . import async_views
+from .views import FormViewSet, ReceiptViewSet, ResponseChangeViewSet, ResponseViewSet, SubmissionViewSet
 
 # Create the main router
 router = DefaultRouter()
 router.register(r'forms', FormViewSet, basename='form')
+router.register(r'receipts', ReceiptViewSet, basename='receipt')
+router.register(r'responses/changes', ResponseChangeViewSet, basename='response-changes')
 
 # Create a nested router for responses under forms
 forms_router = NestedDefaultRouter(router, r'forms', lookup='form')
 forms_router.register(r'responses', ResponseViewSet, basename='response')
+forms_router.register(r'submissions', SubmissionViewSet, basename='submission')
 
-urlpatterns = router.urls + forms_router.urls
\ No newline at end of file
+# Async versions of the hot endpoints, for ASGI deployments
+async_urlpatterns = [
+    path('async/forms/<int:pk>/', async_views.form_detail, name='async-form-detail'),
+    path('async/forms/<int:pk>/questions/', async_views.form_questions, name='async-form-questions'),
+    path('async/forms/<int:pk>/submit/', async_views.form_submit, name='async-form-submit'),
+]
+
+urlpatterns = router.urls + forms_router.urls + async_urlpatterns
\ No newline at end of file
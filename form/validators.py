@@ -0,0 +1,91 @@
+import math
+
+from rest_framework import serializers
+
+
+class AnswerValidator:
+    """
+    A question's answer rules, compiled once into a small callable.
+
+    Everything that depends only on the question (bounds, number mode,
+    length limit and error messages) is worked out up front, so checking
+    an answer is a handful of comparisons.
+    """
+    __slots__ = ('required', 'numeric', 'integer', 'min_value', 'max_value', 'max_length',
+                 'required_message', 'min_message', 'max_message', 'length_message')
+
+    def __init__(self, question):
+        self.required = question.required
+        self.required_message = f"The question '{question.text}' is required."
+        self.numeric = question.question_type == 'numeric_answer'
+        self.integer = self.numeric and question.number_type == 'integer'
+        self.min_value = -math.inf if question.min_value is None else question.min_value
+        self.max_value = math.inf if question.max_value is None else question.max_value
+        self.min_message = f"Answer must be at least {question.min_value}."
+        self.max_message = f"Answer must be at most {question.max_value}."
+
+        # `max_length` is only filled in by Question.clean, so fall back to
+        # the type's force limit for rows that never went through it.
+        self.max_length = None
+        if question.question_type in ['short_answer', 'complete_answer', 'email']:
+            self.max_length = question.max_length or question.DEFAULT_FORCE_LIMITS[question.question_type]
+        self.length_message = f"Answer cannot exceed {self.max_length} characters."
+
+    def __call__(self, answer):
+        """
+        Validate `answer` and return it as a number for numeric questions
+        (None otherwise), to be stored in `FormResponse.numeric_answer`.
+
+        Raises `serializers.ValidationError` on the first broken rule.
+        """
+        if self.required and not answer:
+            raise serializers.ValidationError(self.required_message)
+
+        if self.numeric:
+            try:
+                value = float(answer)
+            except ValueError:
+                raise serializers.ValidationError("Answer must be a valid number.")
+            # 'nan' and 'inf' parse, but pass every bound and break the statistics.
+            if not math.isfinite(value):
+                raise serializers.ValidationError("Answer must be a valid number.")
+            if value < self.min_value:
+                raise serializers.ValidationError(self.min_message)
+            if value > self.max_value:
+                raise serializers.ValidationError(self.max_message)
+            if self.integer and not value.is_integer():
+                raise serializers.ValidationError("Answer must be an integer.")
+            return value
+
+        if self.max_length is not None and len(answer) > self.max_length:
+            raise serializers.ValidationError(self.length_message)
+        return None
+
+
+# Process-local; each worker compiles its own validators.
+_validators = {}
+
+
+def get_validator(question):
+    """
+    Return the compiled validator for `question`, compiling it on a miss.
+
+    Entries are keyed by question id and checked against `updated_at`, so a
+    question edited by another process is recompiled the next time it is
+    loaded here.
+    """
+    entry = _validators.get(question.pk)
+    if entry is not None and entry[0] == question.updated_at:
+        return entry[1]
+
+    validator = AnswerValidator(question)
+    _validators[question.pk] = (question.updated_at, validator)
+    return validator
+
+
+def invalidate_validator(question_id):
+    _validators.pop(question_id, None)
+
+
+def clear_validators():
+    _validators.clear()
@@ -1,8 +1,100 @@
-from rest_framework import viewsets, permissions, serializers
+import math
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, Count, Max, Min, Prefetch
+from django.http import HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.dateparse import parse_datetime
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+from rest_framework import viewsets, permissions, serializers, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.parsers import JSONParser
 from rest_framework.response import Response
-from .models import Form, Question, FormResponse
-from .serializers import FormSerializer, ResponseSerializer, QuestionSerializer
+from rest_framework.utils.urls import replace_query_param
+from .caching import (
+    form_etag, form_last_modified, get_cached_payload, payload_cache_stats,
+    request_form_version, set_cached_payload,
+)
+from .exports import EXPORTERS
+from .imports import import_forms
+from .ingestion import QueueFull, get_ingestion_queue, get_receipt_status, queue_enabled, save_submissions
+from .middleware import precompress
+from .models import Form, Question, FormResponse, Submission
+from .pagination import SubmissionCursorPagination
+from .parsers import NDJSONParser
+from .renders import CSVRenderer, CustomRenderer, NDJSONRenderer
+from .replicas import pin_to_primary
+from .search import search_answers
+from .stats import describe, rebuild_question_stats, record_answers
+from .serializers import (
+    FormSerializer, ResponseChangeSerializer, ResponseSerializer, QuestionSerializer, FormSubmissionSerializer,
+    SubmissionSerializer,
+)
+
+
+def requested_fields(request, allowed, param='fields'):
+    """
+    The names listed in a comma-separated query parameter, or None if it is
+    absent. Unknown names are a 400.
+    """
+    value = request.query_params.get(param)
+    if value is None:
+        return None
+    fields = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in fields if name not in allowed]
+    if unknown:
+        raise serializers.ValidationError(
+            {param: [f"Unknown field(s) {', '.join(unknown)}; choose from {', '.join(allowed)}."]}
+        )
+    return fields
+
+
+class Fieldset:
+    """
+    The parts of a form a request asks for with `?fields=` and
+    `?include=questions`.
+
+    `fields` lists form fields and may name question fields as
+    `questions.<field>`; without it every form field is sent. Questions
+    are embedded when no `fields` are given, when `fields` lists
+    `questions` or any `questions.<field>`, or with `include=questions`.
+    """
+    __slots__ = ('form_fields', 'question_fields', 'questions')
+
+    FORM_FIELDS = [name for name in FormSerializer.Meta.fields if name != 'questions']
+    QUESTION_FIELDS = QuestionSerializer.Meta.fields
+    ALLOWED = [*FormSerializer.Meta.fields, *(f'questions.{name}' for name in QUESTION_FIELDS)]
+
+    def __init__(self, request):
+        fields = requested_fields(request, self.ALLOWED)
+        include = requested_fields(request, ['questions'], 'include') or []
+        if fields is None:
+            self.form_fields, self.question_fields, self.questions = None, None, True
+            return
+        self.form_fields = [name for name in fields if name in self.FORM_FIELDS]
+        self.question_fields = [name.split('.', 1)[1] for name in fields if name.startswith('questions.')] or None
+        self.questions = 'questions' in fields or 'questions' in include or self.question_fields is not None
+
+    def queryset(self):
+        queryset = Form.objects.only(*self.form_fields) if self.form_fields is not None else Form.objects.all()
+        if self.questions:
+            questions = Question.objects.order_by('id')
+            if self.question_fields is not None:
+                questions = questions.only('form', *self.question_fields)
+            queryset = queryset.prefetch_related(Prefetch('questions', queryset=questions))
+        return queryset.order_by('id')
+
+    def serializer_kwargs(self):
+        if self.form_fields is None:
+            return {'question_fields': self.question_fields}
+        return {
+            'fields': self.form_fields + (['questions'] if self.questions else []),
+            'question_fields': self.question_fields,
+        }
 
 
 class FormViewSet(viewsets.ReadOnlyModelViewSet):
@@ -10,15 +102,57 @@ class FormViewSet(viewsets.ReadOnlyModelViewSet):
     Viewset for retrieving and listing forms.
 
     Provides:
-    - GET /forms/ -> List all forms
+    - GET /forms/ -> List all forms (cursor paginated)
+      (`?fields=id,title` and `?include=questions` select what is sent, see `Fieldset`)
     - GET /forms/{id}/ -> Retrieve a specific form
-    - GET /forms/{id}/questions/ -> Retrieve all questions for a specific form
+    - GET /forms/{id}/questions/ -> Retrieve all questions for a specific form (cursor paginated)
+    - POST /forms/{id}/submit/ -> Submit answers to every question of a form at once
+      (queued with a receipt in ingestion queue mode)
+    - GET /forms/{id}/export/?format=csv|ndjson -> Stream all submissions to a form
+    - GET /forms/{id}/stats/ -> Answer statistics for every question of a form
+    - GET /forms/cache-stats/ -> Hit/miss counters of the rendered payload cache (admin only)
+    - POST /forms/import/ -> Create forms with their questions from JSON or NDJSON definitions (admin only)
     """
      
-    queryset = Form.objects.all()
+    # Questions are prefetched in a single query so listing N forms costs
+    # two queries instead of N + 1.
+    queryset = Form.objects.prefetch_related(
+        Prefetch('questions', queryset=Question.objects.order_by('id'))
+    ).order_by('id')
     serializer_class = FormSerializer
     permission_classes = [permissions.AllowAny]  # Allow anyone to view forms
+    lookup_value_regex = r'\d+'  # Also constrains `form_pk` on the nested routes
+
+    def get_queryset(self):
+        if self.action in ('get_questions', 'export', 'stats'):
+            # Questions are read separately; don't prefetch all of them.
+            return Form.objects.all()
+        if self.action in ('list', 'retrieve') and 'fields' in self.request.query_params:
+            # Only the requested columns, and no questions query unless
+            # they are asked for.
+            return self.fieldset().queryset()
+        return super().get_queryset()
 
+    def get_serializer(self, *args, **kwargs):
+        if self.action in ('list', 'retrieve'):
+            kwargs.update(self.fieldset().serializer_kwargs())
+        return super().get_serializer(*args, **kwargs)
+
+    def fieldset(self):
+        if not hasattr(self, '_fieldset'):
+            self._fieldset = Fieldset(self.request)
+        return self._fieldset
+
+    # Form definitions carry an ETag and Last-Modified derived from the
+    # form's version marker; a matching conditional GET is answered with
+    # 304 before the queryset or serializers are touched.
+    @method_decorator(condition(etag_func=form_etag, last_modified_func=form_last_modified))
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_render(
+            request, kwargs['pk'], 'detail', lambda: super(FormViewSet, self).retrieve(request, *args, **kwargs)
+        )
+
+    @method_decorator(condition(etag_func=form_etag, last_modified_func=form_last_modified))
     @action(detail=True, methods=['get'], url_path='questions')
     def get_questions(self, request, pk=None):
         """
@@ -26,30 +160,442 @@ class FormViewSet(viewsets.ReadOnlyModelViewSet):
 
         Args:
         - pk: ID of the form
+        - fields: Optional comma-separated question fields to return
 
         Returns:
-        - List of questions for the form
+        - A page of questions for the form, ordered by id
+        """
+        fields = requested_fields(request, QuestionSerializer.Meta.fields)
+
+        def build():
+            form = self.get_object()
+            questions = Question.objects.filter(form=form)
+            if fields is not None:
+                questions = questions.only(*fields)
+            page = self.paginate_queryset(questions)
+            serializer = QuestionSerializer(page, many=True, fields=fields)
+            return self.get_paginated_response(serializer.data)
+
+        return self.cached_render(request, pk, 'questions', build)
+
+    @action(detail=True, methods=['get'], url_path='export', renderer_classes=[CSVRenderer, NDJSONRenderer])
+    def export(self, request, pk=None):
+        """
+        Stream every submission to a form as CSV or NDJSON.
+
+        The format is negotiated from `?format=` or the Accept header and
+        defaults to CSV. Rows are read with a chunked cursor and written
+        as they are produced, so memory use does not grow with the number
+        of responses.
+
+        Args:
+        - pk: ID of the form
+        """
+        form = self.get_object()
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            EXPORTERS[renderer.format](form),
+            content_type=f'{renderer.media_type}; charset={renderer.charset}',
+        )
+        response['Content-Disposition'] = f'attachment; filename="form-{form.pk}-responses.{renderer.format}"'
+        return response
+
+    @action(detail=True, methods=['get'], url_path='stats')
+    def stats(self, request, pk=None):
+        """
+        Answer statistics for every question of a form.
+
+        Read from the incrementally maintained `QuestionStats` rows, so the
+        cost grows with the number of questions, not of responses.
+
+        Args:
+        - pk: ID of the form
         """
         form = self.get_object()
-        questions = form.questions.all()
-        serializer = QuestionSerializer(questions, many=True)
-        return Response(serializer.data)
-    
+        questions = Question.objects.filter(form=form).select_related('stats').order_by('id')
+        return Response([describe(question) for question in questions])
+
+    @action(detail=False, methods=['get'], url_path='cache-stats', permission_classes=[permissions.IsAdminUser])
+    def cache_stats(self, request):
+        """
+        Hit/miss counters of the rendered form payload cache.
+        """
+        return Response(payload_cache_stats())
+
+    @action(detail=False, methods=['post'], url_path='import', url_name='import',
+            permission_classes=[permissions.IsAdminUser], parser_classes=[JSONParser, NDJSONParser])
+    def import_forms(self, request):
+        """
+        Create forms with their questions in bulk (see form/imports.py).
+
+        Takes one form definition or a list of them as JSON, or one per
+        line as NDJSON. Every definition is validated before anything is
+        written; any error rejects the whole import and all errors are
+        reported, keyed by the position of the form and question.
+
+        Returns:
+        - The created forms with their number of questions
+        """
+        definitions = request.data if isinstance(request.data, list) else [request.data]
+        forms = import_forms(definitions)
+        return Response(
+            [{'id': form.id, 'title': form.title, 'questions': len(form.imported_questions)} for form in forms],
+            status=status.HTTP_201_CREATED,
+        )
+
+    def cached_render(self, request, pk, name, build):
+        """
+        Serve the rendered `CustomRenderer` envelope for a form from the
+        payload cache, or build, render and store it on a miss.
+
+        A hit skips the ORM, the serializer and JSON encoding. Only plain
+        `CustomRenderer` output without query parameters (cursors, page
+        sizes) is cached; other renderers and media type parameters (e.g.
+        `indent`) always go through `build`. Pagination links are absolute,
+        so the variant is keyed by host as well. The gzipped copy is stored
+        with it for `CompressionMiddleware`, so compression also happens once
+        per version.
+        """
+        renderer = request.accepted_renderer
+        version = request_form_version(request, pk)
+        if (version is None or request.query_params or type(renderer) is not CustomRenderer
+                or request.accepted_media_type != renderer.media_type):
+            return build()
+
+        variant = f'{name}:{request.build_absolute_uri("/")}'
+        payload = get_cached_payload(pk, variant, version)
+        if payload is not None:
+            content, gzipped = payload
+            response = HttpResponse(content, content_type=renderer.media_type)
+            response.gzipped_content = gzipped
+            return response
+
+        def store(response):
+            if response.status_code == status.HTTP_200_OK:
+                response.gzipped_content = precompress(response.content)
+                set_cached_payload(pk, variant, version, response.content, response.gzipped_content)
+
+        # The payload is stored under the primary's version, so it must not
+        # be built from a replica that may not have that version yet.
+        pin_to_primary()
+        response = build()
+        response.add_post_render_callback(store)
+        return response
+
+    @action(detail=True, methods=['post'], url_path='submit', serializer_class=FormSubmissionSerializer)
+    def submit(self, request, pk=None):
+        """
+        Submit answers to all questions of a form in one request.
+
+        The whole submission is validated against the form's questions
+        before anything is written, then stored as one `Submission` and a
+        single bulk insert of its answers inside one transaction.
+
+        Args:
+        - pk: ID of the form
+
+        Returns:
+        - The created submission with its answers
+        """
+        form = self.get_object()
+        serializer = FormSubmissionSerializer(data=request.data, context={'form': form})
+        serializer.is_valid(raise_exception=True)
+
+        submission = Submission(form=form)
+        if 'token' in serializer.validated_data:
+            submission.token = serializer.validated_data['token']
+        responses = serializer.validated_data['responses']
+        if queue_enabled():
+            return enqueue_submission(request, submission, responses)
+
+        save_submissions([(submission, responses)])
+        with_answers(submission, responses)
+        return Response(SubmissionSerializer(submission).data, status=status.HTTP_201_CREATED)
+
+
+def enqueue_submission(request, submission, answers):
+    """
+    Hand a validated submission to the ingestion queue and answer
+    202 Accepted with its receipt, or 503 when the queue is full.
+    """
+    try:
+        receipt = get_ingestion_queue().put(submission, answers)
+    except QueueFull as exc:
+        return Response({'detail': str(exc)}, status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={'Retry-After': '1'})
+    location = request.build_absolute_uri(reverse('receipt-detail', args=[receipt]))
+    return Response(
+        {'receipt': receipt, 'status': 'queued'},
+        status=status.HTTP_202_ACCEPTED,
+        headers={'Location': location},
+    )
+
+
+def with_answers(submission, answers):
+    """
+    Attach already loaded answers to a submission so serializing it does
+    not query them again.
+    """
+    submission._prefetched_objects_cache = {'answers': answers}
+    return submission
+
+
+class SubmissionViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Viewset for reading the submissions of a form.
+
+    Provides:
+    - GET /forms/{form_pk}/submissions/ -> List submissions by time (cursor paginated),
+      optionally limited with `?since=` and `?until=` (ISO 8601)
+    - GET /forms/{form_pk}/submissions/{id}/ -> Retrieve a submission with all its answers
+    """
+    serializer_class = SubmissionSerializer
+    pagination_class = SubmissionCursorPagination
+    permission_classes = [permissions.AllowAny]
+    lookup_value_regex = r'\d+'
+
+    def get_queryset(self):
+        # Served by the (form, created_at) index; answers for a whole page
+        # come from one extra query.
+        queryset = Submission.objects.filter(form_id=self.kwargs['form_pk']).prefetch_related(
+            Prefetch('answers', queryset=FormResponse.objects.order_by('id'))
+        )
+        for param, lookup in (('since', 'created_at__gte'), ('until', 'created_at__lt')):
+            value = self.request.query_params.get(param)
+            if value is not None:
+                moment = parse_datetime(value)
+                if moment is None:
+                    raise serializers.ValidationError({param: "Must be an ISO 8601 datetime."})
+                queryset = queryset.filter(**{lookup: moment})
+        return queryset
+
+    def retrieve(self, request, *args, **kwargs):
+        # Load the answers together with their submission in one query.
+        answers = list(
+            FormResponse.objects
+            .select_related('submission')
+            .filter(submission_id=kwargs['pk'], submission__form_id=kwargs['form_pk'])
+            .order_by('id')
+        )
+        if answers:
+            submission = with_answers(answers[0].submission, answers)
+        else:
+            submission = self.get_object()
+        return Response(self.get_serializer(submission).data)
+
 
 class ResponseViewSet(viewsets.ModelViewSet):
     """
     Viewset for handling responses to forms.
 
+    Mounted under a form, so every route is scoped to `form_pk`.
+
     Provides:
-    - POST /responses/ -> Create a new response
-    - GET /responses/{id}/ -> Retrieve a specific response
+    - POST /forms/{form_pk}/responses/ -> Create a new response, in a new submission
+      unless `submission` is given (queued with a receipt in ingestion queue mode)
+    - GET /forms/{form_pk}/responses/ -> List the form's responses (cursor paginated),
+      optionally filtered with `?question=<id>` and numeric `?min=`/`?max=`
+    - GET /forms/{form_pk}/responses/?q=<text>[&prefix=1] -> Full-text search over
+      answers, best match first (offset paginated)
+    - GET /forms/{form_pk}/responses/summary/?question=<id> -> Count, average and
+      percentiles of a numeric question's answers, computed in the database
+    - GET /forms/{form_pk}/responses/{id}/ -> Retrieve a specific response
     """
     queryset = FormResponse.objects.all()
     serializer_class = ResponseSerializer
     permission_classes = [permissions.AllowAny]  # Allow anyone to submit responses
 
+    def get_queryset(self):
+        # Served by the (form, id) and (form, question, id) indexes.
+        queryset = super().get_queryset().filter(form_id=self.kwargs['form_pk'])
+        question = self.request.query_params.get('question')
+        if question is not None:
+            if not question.isdigit():
+                raise serializers.ValidationError({'question': "Must be a question id."})
+            queryset = queryset.filter(question_id=question)
+        # Numeric ranges are served by the (question, numeric_answer) index.
+        for param, lookup in (('min', 'numeric_answer__gte'), ('max', 'numeric_answer__lte')):
+            value = self.request.query_params.get(param)
+            if value is not None:
+                try:
+                    queryset = queryset.filter(**{lookup: float(value)})
+                except ValueError:
+                    raise serializers.ValidationError({param: "Must be a number."})
+        return queryset
+
+    @action(detail=False, methods=['get'], url_path='summary')
+    def summary(self, request, form_pk=None):
+        """
+        Aggregate a numeric question's answers in the database.
+
+        Accepts the same `min`/`max` filters as the listing, plus
+        `?percentiles=50,90,99`. Each percentile (nearest rank) is read by
+        stepping through the (question, numeric_answer) index, never by
+        loading answers into Python.
+        """
+        if 'question' not in request.query_params:
+            raise serializers.ValidationError({'question': "This parameter is required."})
+        try:
+            percentiles = [float(p) for p in request.query_params.get('percentiles', '50,90,99').split(',')]
+        except ValueError:
+            raise serializers.ValidationError({'percentiles': "Must be comma-separated numbers."})
+        if any(not 0 <= p <= 100 for p in percentiles):
+            raise serializers.ValidationError({'percentiles': "Must be between 0 and 100."})
+
+        values = self.get_queryset().filter(numeric_answer__isnull=False)
+        summary = values.aggregate(
+            count=Count('numeric_answer'), avg=Avg('numeric_answer'),
+            min=Min('numeric_answer'), max=Max('numeric_answer'),
+        )
+        ordered = values.order_by('numeric_answer').values_list('numeric_answer', flat=True)
+        count = summary['count']
+        summary['percentiles'] = {
+            format(p, 'g'): ordered[math.ceil(p / 100 * count) - 1 if p else 0] if count else None
+            for p in percentiles
+        }
+        return Response(summary)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['form_id'] = int(self.kwargs['form_pk'])
+        return context
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params.get('q', '').strip():
+            return self.search(request)
+        return super().list(request, *args, **kwargs)
+
+    def search(self, request):
+        """
+        Ranked full-text search over the form's answers.
+
+        Uses the FTS5 index when the database has one and falls back to
+        case-insensitive substring matching in id order otherwise.
+        """
+        query = request.query_params['q']
+        prefix = request.query_params.get('prefix') in ('1', 'true')
+        question = request.query_params.get('question')
+        paginator = LimitOffsetPagination()
+        paginator.max_limit = settings.API_MAX_PAGE_SIZE
+        limit = paginator.get_limit(request)
+        offset = paginator.get_offset(request)
+
+        queryset = self.get_queryset()
+        # Fetch one extra row to know whether there is a next page.
+        ids = search_answers(self.kwargs['form_pk'], query, prefix, question, limit + 1, offset)
+        if ids is None:
+            for term in query.split():
+                queryset = queryset.filter(answer__icontains=term)
+            results = list(queryset.order_by('id')[offset:offset + limit + 1])
+            has_next = len(results) > limit
+        else:
+            has_next = len(ids) > limit
+            # Re-apply the listing filters (e.g. numeric ranges) and keep the rank order.
+            found = queryset.in_bulk(ids[:limit])
+            results = [found[pk] for pk in ids[:limit] if pk in found]
+
+        url = request.build_absolute_uri()
+        return Response({
+            'next': replace_query_param(url, 'offset', offset + limit) if has_next else None,
+            'previous': (replace_query_param(url, 'offset', max(offset - limit, 0)) if offset else None),
+            'results': self.get_serializer(results[:limit], many=True).data,
+        })
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        if queue_enabled() and 'submission' not in data:
+            question = data['question']
+            answer = FormResponse(
+                form_id=question.form_id, question=question,
+                answer=data['answer'], numeric_answer=data['numeric_answer'],
+            )
+            return enqueue_submission(request, Submission(form_id=question.form_id), [answer])
+        # Answers added to an existing submission are always written directly.
+        self.perform_create(serializer)
+        headers = self.get_success_headers(serializer.data)
+        return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
+
     def perform_create(self, serializer):
         question = serializer.validated_data['question']
-        form = question.form  # Automatically get the form from the question
-        serializer.save(form=form)
-  
\ No newline at end of file
+        # The form comes from the question; no need to load it.
+        with transaction.atomic():
+            submission = serializer.validated_data.get('submission')
+            if submission is None:
+                submission = Submission.objects.create(form_id=question.form_id)
+            serializer.save(form_id=question.form_id, submission=submission)
+            record_answers([serializer.instance])
+
+    # Edits and deletions are rare; recount the affected questions rather
+    # than trying to reverse min/max and histogram updates.
+
+    def perform_update(self, serializer):
+        old_question_id = serializer.instance.question_id
+        with transaction.atomic():
+            serializer.save()
+            rebuild_question_stats({old_question_id, serializer.instance.question_id})
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+            rebuild_question_stats([instance.question_id])
+
+
+class ResponseChangeViewSet(viewsets.GenericViewSet):
+    """
+    Change feed of responses across all forms, for incremental sync.
+
+    Provides (admin only):
+    - GET /responses/changes/?after=<cursor>&limit=<n> -> Responses created or
+      edited since `cursor`, in the order they were written, with the cursor
+      to pass next time (unchanged when there is nothing new)
+
+    Every insert or save of a response gives it a new `sequence` (see
+    `ResponseSequence`), which only grows in commit order. A page is one
+    range scan of the unique `sequence` index past the cursor, so a sync
+    costs the same however many responses came before. Deleted responses
+    do not appear.
+    """
+    queryset = FormResponse.objects.all()
+    serializer_class = ResponseChangeSerializer
+    permission_classes = [permissions.IsAdminUser]
+
+    def list(self, request):
+        after = request.query_params.get('after', '0')
+        if not after.isdigit():
+            raise serializers.ValidationError({'after': "Must be a cursor returned by this endpoint."})
+        after = int(after)
+        paginator = LimitOffsetPagination()
+        paginator.max_limit = settings.API_MAX_PAGE_SIZE
+        limit = paginator.get_limit(request)
+
+        # Fetch one extra row to know whether there is more.
+        results = list(self.get_queryset().filter(sequence__gt=after).order_by('sequence')[:limit + 1])
+        has_more = len(results) > limit
+        results = results[:limit]
+        cursor = results[-1].sequence if results else after
+        return Response({
+            'cursor': str(cursor),
+            'next': replace_query_param(request.build_absolute_uri(), 'after', cursor),
+            'has_more': has_more,
+            'results': self.get_serializer(results, many=True).data,
+        })
+
+
+class ReceiptViewSet(viewsets.ViewSet):
+    """
+    Viewset for following submissions accepted by the ingestion queue.
+
+    Provides:
+    - GET /receipts/{receipt}/ -> Status of a queued submission
+      (`queued`, `stored` with its submission id, or `failed`)
+    """
+    permission_classes = [permissions.AllowAny]
+    lookup_value_regex = r'[0-9a-f]{32}'
+
+    def retrieve(self, request, pk=None):
+        receipt = get_receipt_status(pk)
+        if receipt is None:
+            raise NotFound()
+        receipt_status, submission_id = receipt
+        return Response({'receipt': pk, 'status': receipt_status, 'submission': submission_id})